@@ -0,0 +1,144 @@
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, List, Optional, Type
+from langchain.chat_models.base import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import RunnableLambda
+from pydantic import BaseModel
+from obsidian_boy.daily_note_processor import BatchedDailyNoteResponse, DailyNoteResponse, SectionEntries
+from obsidian_boy.types import DailyNoteEntry
+
+_SECTION_PATTERN = re.compile(r'<section id="(\d+)">\n(.*?)\n</section>', re.DOTALL)
+_URL_PATTERN = re.compile(r"https?://\S+")
+# Guards FakeChatModel.calls, as requests arrive from the processor's worker threads
+_CALLS_LOCK = threading.Lock()
+
+
+def _entries(content: str) -> List[DailyNoteEntry]:
+    """Make one entry per non-empty paragraph, like a well-behaved model."""
+    entries = []
+    for paragraph in re.split(r"\n\s*\n", content.strip()):
+        if not paragraph.strip():
+            continue
+        url = _URL_PATTERN.search(paragraph)
+        entries.append(DailyNoteEntry(
+            title=paragraph.strip().splitlines()[0][:60],
+            link=url.group(0) if url else None,
+            description=paragraph.strip()[:200],
+        ))
+    return entries
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Offline chat model with a fixed latency per request.
+
+    Structured output requests for the daily note schemas are answered with
+    entries derived from the prompt, so ``DailyNoteProcessor`` can be
+    benchmarked end to end without network access.
+    """
+
+    latency: float = 0.05
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    @property
+    def _identifying_params(self) -> dict:
+        return {"latency": self.latency}
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="ok"))])
+
+    def _respond(self, prompt: Any, schema: Type[BaseModel]) -> BaseModel:
+        with _CALLS_LOCK:
+            self.calls += 1
+        time.sleep(self.latency)
+        text = prompt if isinstance(prompt, str) else str(prompt)
+        if schema is BatchedDailyNoteResponse:
+            return BatchedDailyNoteResponse(sections=[
+                SectionEntries(section_id=int(section_id), entries=_entries(content))
+                for section_id, content in _SECTION_PATTERN.findall(text)
+            ])
+        if schema is DailyNoteResponse:
+            return DailyNoteResponse(entries=_entries(text.split("Daily note content:", 1)[-1]))
+        raise ValueError(f"Unsupported schema {schema.__name__}")
+
+    def with_structured_output(self, schema: Type[BaseModel], **kwargs: Any) -> RunnableLambda:
+        return RunnableLambda(lambda prompt: self._respond(prompt, schema))
+
+
+def make_page(index: int, paragraphs: int = 40) -> bytes:
+    """Build an HTML page with boilerplate around the main content."""
+    body = "".join(
+        f"<p>Paragraph {i} of page {index} about agents, vectors and markdown vaults.</p>" for i in range(paragraphs)
+    )
+    return (
+        f"<html><head><title>Page {index}</title><meta name=\"description\" content=\"Page {index}\"></head>"
+        f"<body><nav>Home | Docs | Blog</nav><script>var tracking = {index};</script>"
+        f"<main><h1>Page {index}</h1>{body}</main><footer>Imprint</footer></body></html>"
+    ).encode("utf-8")
+
+
+class LocalHttpServer:
+    """
+    Local HTTP stand-in for scraped websites.
+
+    Serves generated pages at ``/page/<n>`` with a configurable latency and
+    answers conditional requests with 304. Use it as a context manager.
+    """
+
+    def __init__(self, latency: float = 0.0, paragraphs: int = 40):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                time.sleep(server.latency)
+                with server._lock:
+                    server.requests += 1
+                match = re.fullmatch(r"/page/(\d+)", self.path)
+                if not match:
+                    self.send_error(404)
+                    return
+                etag = f'"page-{match.group(1)}"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                body = make_page(int(match.group(1)), server.paragraphs)
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        self.latency = latency
+        self.paragraphs = paragraphs
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="bench-http", daemon=True)
+
+    def url(self, index: int) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/page/{index}"
+
+    def __enter__(self) -> "LocalHttpServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,289 @@
+"""
+Run the end-to-end benchmarks against a synthetic vault.
+
+Usage:
+    python -m benchmarks.run [--notes N] [--daily-notes N] [--repeat N] [--only NAME ...] [--json PATH]
+"""
+import argparse
+import gc
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+import numpy as np
+from obsidian_boy.daily_note_catalog import DailyNoteCatalog
+from obsidian_boy.daily_note_processor import DailyNoteProcessor
+from obsidian_boy.http_cache import HttpCache
+from obsidian_boy.knowledge_base import FileSystemKnowledgeBase, KnowledgeBase, SQLiteKnowledgeBase
+from obsidian_boy.search_index import SearchableKnowledgeBase
+from obsidian_boy.tag_index import TagIndex
+from obsidian_boy.vault_scanner import VaultScanner
+from obsidian_boy.vector_index import HashingEmbedder, VectorIndex
+from obsidian_boy.web_scraper import WebScraper
+from .fakes import FakeChatModel, LocalHttpServer
+from .synthetic_vault import VaultSpec, generate_vault
+
+
+@dataclass
+class BenchResult:
+    """Timing and memory of one benchmark."""
+    name: str
+    items: int
+    runs: List[float]
+    peak_bytes: int
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.runs)
+
+    @property
+    def items_per_second(self) -> float:
+        return self.items / self.median if self.median else 0.0
+
+
+def measure(name: str, run: Callable[[Any], Any], items: int, repeat: int,
+            setup: Callable[[], Any] = lambda: None) -> BenchResult:
+    """
+    Time a benchmark and measure its peak traced memory.
+
+    Every run gets a fresh ``setup()`` result. The runs are timed without
+    tracing, and one extra run is traced with tracemalloc for the peak
+    Python heap usage.
+
+    Args:
+        name (str): The benchmark name.
+        run (Callable[[Any], Any]): The benchmarked code, called with the setup result.
+        items (int): The number of items processed per run.
+        repeat (int): The number of timed runs.
+        setup (Callable[[], Any]): Prepares the state of a run; not timed.
+
+    Returns:
+        BenchResult: The run times and the peak memory.
+    """
+    runs = []
+    for _ in range(repeat):
+        state = setup()
+        gc.collect()
+        start = time.perf_counter()
+        run(state)
+        runs.append(time.perf_counter() - start)
+    state = setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run(state)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return BenchResult(name, items, runs, peak)
+
+
+def _read_texts(paths: List[Path]) -> List[str]:
+    return [path.read_text(encoding="utf-8") for path in paths]
+
+
+def bench_vault(vault: Path, work: Path, repeat: int) -> List[BenchResult]:
+    notes = sum(1 for _ in vault.rglob("*.md"))
+    counter = iter(range(10**6))
+
+    def cold_index() -> TagIndex:
+        return TagIndex(vault, work / f"tag_index_{next(counter)}.json", scanner=VaultScanner(use_processes=False))
+
+    def warm_index() -> TagIndex:
+        index = cold_index()
+        index.refresh()
+        return index
+
+    return [
+        measure("vault.tag_index.cold", lambda index: index.tags(), notes, repeat, cold_index),
+        measure("vault.tag_index.warm", lambda index: index.tags(), notes, repeat, warm_index),
+    ]
+
+
+def bench_daily_notes(vault: Path, repeat: int, llm_latency: float) -> List[BenchResult]:
+    daily_dir = vault / "Daily"
+    contents = _read_texts(sorted(daily_dir.glob("*.md")))
+    catalog = DailyNoteCatalog(daily_dir)
+
+    def queries(_: Any) -> None:
+        catalog.latest(30)
+        catalog.month(2020, 6)
+        catalog.page(3, 50)
+
+    parse_processor = DailyNoteProcessor(FakeChatModel(latency=0.0))
+    results = [
+        measure("daily_notes.catalog.queries", queries, 3, repeat),
+        measure("daily_notes.parse", lambda _: [parse_processor._plan(content) for content in contents],
+                len(contents), repeat),
+    ]
+    for budget in (None, 2000):
+        llm = FakeChatModel(latency=llm_latency)
+        processor = DailyNoteProcessor(llm, max_concurrency=8, batch_token_budget=budget)
+        result = measure(f"daily_notes.extract.batch_{budget or 'off'}",
+                         lambda _: processor.extract_entries_many(contents), len(contents), repeat)
+        result.extra["llm_calls_per_run"] = llm.calls // (repeat + 1)
+        results.append(result)
+    return results
+
+
+def bench_knowledge_bases(vault: Path, work: Path, repeat: int) -> List[BenchResult]:
+    items = {path.stem: path.read_text(encoding="utf-8") for path in vault.rglob("Note *.md")}
+    keys = list(items)
+    counter = iter(range(10**6))
+    backends: Dict[str, Callable[[Path], KnowledgeBase]] = {
+        "filesystem_json": FileSystemKnowledgeBase,
+        "filesystem_zlib": lambda path: FileSystemKnowledgeBase(path, codec="zlib"),
+        "sqlite": SQLiteKnowledgeBase,
+    }
+    results = []
+    for name, make in backends.items():
+        def empty() -> KnowledgeBase:
+            return make(work / f"kb_{name}_{next(counter)}")
+
+        filled = make(work / f"kb_{name}_filled")
+        filled.store_many(items)
+        result = measure(f"kb.{name}.store_many", lambda kb: kb.store_many(items), len(items), repeat, empty)
+        result.extra["disk_bytes"] = sum(path.stat().st_size for path in (work / f"kb_{name}_filled").iterdir())
+        results += [
+            result,
+            measure(f"kb.{name}.retrieve_many", lambda _: filled.retrieve_many(keys), len(keys), repeat),
+        ]
+
+    searchable = SearchableKnowledgeBase(SQLiteKnowledgeBase(work / "kb_sqlite_filled"))
+    results.append(measure("kb.search.build", lambda _: SearchableKnowledgeBase(searchable.knowledge_base).search("agent"),
+                           len(items), repeat))
+    searchable.search("agent")
+    persisted = SearchableKnowledgeBase(searchable.knowledge_base, index_path=work / "search_index.sqlite")
+    persisted.search("agent")
+    persisted.close()
+
+    def reopen(_):
+        reopened = SearchableKnowledgeBase(searchable.knowledge_base, index_path=work / "search_index.sqlite")
+        reopened.search("agent")
+        reopened.close()
+
+    results.append(measure("kb.search.reopen", reopen, len(items), repeat))
+    queries = ["vector index", "async python thread", "markdown vault link", "research paper"]
+    results.append(measure("kb.search.query", lambda _: [searchable.search(query) for query in queries],
+                           len(queries), repeat))
+    return results
+
+
+def bench_vectors(vault: Path, work: Path, repeat: int) -> List[BenchResult]:
+    items = {path.stem: path.read_text(encoding="utf-8") for path in vault.rglob("Note *.md")}
+    embed = HashingEmbedder(256)
+    vectors = embed(list(items.values()))
+    counter = iter(range(10**6))
+    index = VectorIndex(work / "vectors_filled", embed, 256)
+    index.add_vectors(list(items), vectors)
+    queries = vectors[: min(32, len(vectors))]
+    return [
+        measure("vectors.embed", lambda _: embed(list(items.values())), len(items), repeat),
+        measure("vectors.add", lambda fresh: fresh.add_vectors(list(items), vectors), len(items), repeat,
+                lambda: VectorIndex(work / f"vectors_{next(counter)}", embed, 256)),
+        measure("vectors.search_batch", lambda _: index.search_vectors(queries, k=10), len(queries), repeat),
+    ]
+
+
+def bench_scraping(work: Path, repeat: int, pages: int, latency: float) -> List[BenchResult]:
+    counter = iter(range(10**6))
+    with LocalHttpServer(latency=latency) as server:
+        urls = [server.url(i) for i in range(pages)]
+        cache = HttpCache(work / "http_cache.sqlite", ttl=0)
+        WebScraper(cache=cache).scrape_many(urls)
+        results = [
+            measure("scrape.scrape_many", lambda scraper: scraper.scrape_many(urls), pages, repeat,
+                    lambda: WebScraper(max_workers=8)),
+            measure("scrape.revalidate_cached", lambda scraper: scraper.scrape_many(urls), pages, repeat,
+                    lambda: WebScraper(max_workers=8, cache=cache)),
+        ]
+        cache.close()
+    return results
+
+
+SUITES = {
+    "vault": lambda args, vault, work: bench_vault(vault, work, args.repeat),
+    "daily_notes": lambda args, vault, work: bench_daily_notes(vault, args.repeat, args.llm_latency),
+    "kb": lambda args, vault, work: bench_knowledge_bases(vault, work, args.repeat),
+    "vectors": lambda args, vault, work: bench_vectors(vault, work, args.repeat),
+    "scrape": lambda args, vault, work: bench_scraping(work, args.repeat, args.pages, args.http_latency),
+}
+
+
+def format_report(results: List[BenchResult]) -> str:
+    """
+    Format benchmark results as a table.
+
+    Args:
+        results (List[BenchResult]): The results.
+
+    Returns:
+        str: One line per benchmark with median time, throughput and peak memory.
+    """
+    lines = [f"{'benchmark':<36} {'items':>7} {'median ms':>10} {'items/s':>10} {'peak KiB':>9}  extra"]
+    for result in results:
+        extra = " ".join(f"{key}={value}" for key, value in result.extra.items())
+        lines.append(
+            f"{result.name:<36} {result.items:>7} {result.median * 1000:>10.1f} "
+            f"{result.items_per_second:>10.0f} {result.peak_bytes / 1024:>9.0f}  {extra}"
+        )
+    return "\n".join(lines)
+
+
+def run(args: argparse.Namespace) -> List[BenchResult]:
+    """
+    Generate the synthetic vault and run the selected suites.
+
+    Args:
+        args (argparse.Namespace): The parsed command line arguments.
+
+    Returns:
+        List[BenchResult]: The results of all benchmarks.
+    """
+    spec = VaultSpec(notes=args.notes, daily_notes=args.daily_notes, seed=args.seed)
+    results = []
+    with tempfile.TemporaryDirectory(prefix="obsidian-boy-bench-") as tmp:
+        vault = generate_vault(Path(tmp) / "vault", spec)
+        for name in args.only or list(SUITES):
+            work = Path(tmp) / "work" / name
+            work.mkdir(parents=True)
+            results += SUITES[name](args, vault, work)
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark obsidian-boy against a synthetic vault.")
+    parser.add_argument("--notes", type=int, default=1000, help="Number of regular notes")
+    parser.add_argument("--daily-notes", type=int, default=365, help="Number of daily notes")
+    parser.add_argument("--pages", type=int, default=50, help="Number of pages to scrape")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per benchmark")
+    parser.add_argument("--llm-latency", type=float, default=0.02, help="Seconds per fake LLM request")
+    parser.add_argument("--http-latency", type=float, default=0.005, help="Seconds per local HTTP request")
+    parser.add_argument("--seed", type=int, default=42, help="Seed of the synthetic vault")
+    parser.add_argument("--only", nargs="+", choices=list(SUITES), help="Run only these suites")
+    parser.add_argument("--json", type=Path, help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = run(args)
+    print(format_report(results))
+    if args.json:
+        report = {
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "args": {key: value for key, value in vars(args).items() if key != "json"},
+            "results": [{**asdict(result), "median": result.median} for result in results],
+        }
+        args.json.write_text(json.dumps(report, indent=2, default=str), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+import os
+import random
+from dataclasses import dataclass
+from datetime import date, timedelta
+from pathlib import Path
+from typing import List
+
+WORDS = (
+    "agent graph vector index markdown vault note link tag model prompt token cache batch stream "
+    "python rust async thread process memory disk query search rank embed shard queue retry latency "
+    "research paper article tutorial library framework release benchmark profile trace metric"
+).split()
+
+# 2020-01-01T00:00:00Z
+AGED_MTIME = 1_577_836_800
+
+
+@dataclass
+class VaultSpec:
+    """The shape of a synthetic vault. The same spec always yields the same vault."""
+    notes: int = 1000
+    note_words: int = 300
+    tags_per_note: int = 3
+    tag_vocabulary: int = 200
+    folders: int = 10
+    daily_notes: int = 365
+    entries_per_daily_note: int = 6
+    # Share of daily note entries written as free text that needs the LLM
+    freeform_ratio: float = 0.3
+    seed: int = 42
+
+
+def _words(rng: random.Random, count: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(count))
+
+
+def _tags(rng: random.Random, spec: VaultSpec) -> List[str]:
+    return [f"topic/t{rng.randrange(spec.tag_vocabulary)}" for _ in range(spec.tags_per_note)]
+
+
+def make_note(rng: random.Random, spec: VaultSpec, title: str) -> str:
+    """Build a note with frontmatter tags, inline tags and paragraphs."""
+    tags = _tags(rng, spec)
+    lines = ["---", f"title: {title}", f"tags: [{', '.join(tags[:1])}]", "---", f"# {title}", ""]
+    remaining = spec.note_words
+    while remaining > 0:
+        count = min(remaining, rng.randint(20, 80))
+        lines += [_words(rng, count), ""]
+        remaining -= count
+    lines.append(" ".join(f"#{tag}" for tag in tags[1:]))
+    lines += ["", "```python", "# not a tag", "```"]
+    return "\n".join(lines) + "\n"
+
+
+def make_daily_note(rng: random.Random, spec: VaultSpec, day: date) -> str:
+    """Build a daily note of structured link entries and free-form entries."""
+    lines = ["---", f"date: {day.isoformat()}", "---"]
+    for i in range(spec.entries_per_daily_note):
+        title = f"{_words(rng, 3).title()} {i}"
+        if rng.random() < spec.freeform_ratio:
+            lines += [
+                "",
+                f"Read about {title} today, see https://example.com/{day.isoformat()}/{i} "
+                f"- {_words(rng, 25)}. Should {_words(rng, 4)} tomorrow.",
+            ]
+        else:
+            lines += [
+                "",
+                f"## {title}",
+                f"[{title}](https://example.com/{day.isoformat()}/{i})",
+                " ".join(f"#{tag}" for tag in _tags(rng, spec)),
+                _words(rng, 15),
+            ]
+            if rng.random() < 0.3:
+                lines.append(f"- [ ] {_words(rng, 5)}")
+    return "\n".join(lines) + "\n"
+
+
+def generate_vault(path: Path, spec: VaultSpec) -> Path:
+    """
+    Write a synthetic vault.
+
+    Args:
+        path (Path): The vault directory to create.
+        spec (VaultSpec): The shape of the vault.
+
+    Returns:
+        Path: The vault directory.
+    """
+    rng = random.Random(spec.seed)
+    path = Path(path)
+    for i in range(spec.notes):
+        folder = path / f"Folder {i % max(spec.folders, 1)}"
+        folder.mkdir(parents=True, exist_ok=True)
+        (folder / f"Note {i}.md").write_text(make_note(rng, spec, f"Note {i}"), encoding="utf-8")
+    daily_dir = path / "Daily"
+    daily_dir.mkdir(parents=True, exist_ok=True)
+    first_day = date(2020, 1, 1)
+    for i in range(spec.daily_notes):
+        day = first_day + timedelta(days=i)
+        (daily_dir / f"{day.isoformat()}.md").write_text(make_daily_note(rng, spec, day), encoding="utf-8")
+    (path / ".obsidian").mkdir(exist_ok=True)
+    # Age the directories like in a long-lived vault, so listings are cacheable
+    for directory in [path, *(entry for entry in path.rglob("*") if entry.is_dir())]:
+        os.utime(directory, (AGED_MTIME, AGED_MTIME))
+    return path
@@ -0,0 +1,233 @@
+import fnmatch
+import json
+import logging
+import re
+import sys
+import time
+from dataclasses import asdict, dataclass
+from datetime import date
+from pathlib import Path
+from typing import IO, Any, Dict, Iterator, List, Optional, Sequence
+from .daily_note_catalog import DailyNoteCatalog
+from .http_cache import normalize_url
+from .knowledge_base import KnowledgeBase
+from .obsidian_interface import ObsidianInterface
+from .processing_ledger import ProcessingLedger
+from .types import DailyNoteEntry, ProcessingStatus
+
+# Exit codes of the batch command
+EXIT_OK = 0
+EXIT_FAILED = 1  # some notes could not be processed, the others were
+EXIT_USAGE = 2  # invalid arguments, as reported by argparse
+EXIT_ERROR = 3  # the run could not start, e.g. no daily note directory or chat model
+EXIT_INTERRUPTED = 130
+
+_URL_PATTERN = re.compile(r"https?://[^\s<>()\[\]\"']+")
+
+
+def select_notes(catalog: DailyNoteCatalog, since: Optional[date] = None, until: Optional[date] = None,
+                 pattern: Optional[str] = None, latest: Optional[int] = None) -> List[Path]:
+    """
+    Select daily notes by date range and file name pattern.
+
+    Without a date range or ``latest`` all notes are selected, including
+    ones whose name is not a date.
+
+    Args:
+        catalog (DailyNoteCatalog): The catalog of the daily notes.
+        since (Optional[date]): The first date, inclusive.
+        until (Optional[date]): The last date, inclusive.
+        pattern (Optional[str]): A glob the note's name or stem must match, e.g. ``2024-05-*``.
+        latest (Optional[int]): Only the N newest notes.
+
+    Returns:
+        List[Path]: The selected notes, oldest first.
+    """
+    if latest is not None:
+        paths = [note.path for note in catalog.latest(latest)]
+    elif since is not None or until is not None:
+        paths = [note.path for note in catalog.between(since or date.min, until or date.max)]
+    else:
+        paths = catalog.paths()
+    if pattern is not None:
+        paths = [path for path in paths if fnmatch.fnmatch(path.name, pattern) or fnmatch.fnmatch(path.stem, pattern)]
+    return paths[::-1]
+
+
+def entry_urls(entries: Sequence[DailyNoteEntry]) -> List[str]:
+    """
+    Collect the web links of entries.
+
+    Args:
+        entries (Sequence[DailyNoteEntry]): The entries.
+
+    Returns:
+        List[str]: The distinct http(s) URLs in the entries' links, in order.
+    """
+    urls = (url.rstrip(".,;") for entry in entries if entry.link for url in _URL_PATTERN.findall(entry.link))
+    return list(dict.fromkeys(urls))
+
+
+class ProgressReporter:
+    """
+    Streams progress events as JSON lines, one object per line.
+
+    Every event has an ``event`` name and a Unix ``time``; the other fields
+    depend on the event.
+    """
+
+    def __init__(self, stream: Optional[IO[str]] = None):
+        self.stream = stream or sys.stdout
+
+    def emit(self, event: str, **fields: Any) -> None:
+        """
+        Write one event and flush it, so consumers see it immediately.
+
+        Args:
+            event (str): The event name.
+            **fields: The fields of the event.
+        """
+        self.stream.write(json.dumps({"event": event, "time": round(time.time(), 3), **fields}, default=str) + "\n")
+        self.stream.flush()
+
+
+@dataclass
+class BatchSummary:
+    """Counts of a batch run."""
+    selected: int = 0
+    skipped: int = 0
+    pending: int = 0
+    extracted: int = 0
+    failed: int = 0
+    entries: int = 0
+    scraped: int = 0
+    scrape_failed: int = 0
+
+    @property
+    def exit_code(self) -> int:
+        """``EXIT_FAILED`` if any note failed. Failed scrapes are retried on the next run and do not count."""
+        return EXIT_FAILED if self.failed else EXIT_OK
+
+
+class BatchRunner:
+    """
+    Processes daily notes without interaction.
+
+    Notes are handled in chunks of ``chunk_size``: the chunk is read, notes
+    the ledger has seen in their current version are skipped, the rest are
+    extracted concurrently and recorded in the ledger before the next chunk
+    starts, so an interrupted run resumes where it stopped. If extracting a
+    chunk fails, its remaining notes are extracted one by one to isolate the
+    failing notes, which are recorded as failed and retried on the next run.
+    With a scraper and a knowledge base, the links of the extracted entries
+    are scraped and stored by normalized URL. A dry run only reports the
+    notes that would be processed and needs no processor.
+    """
+
+    def __init__(self, obsidian_interface: ObsidianInterface, processor=None,
+                 ledger: Optional[ProcessingLedger] = None, scraper=None,
+                 knowledge_base: Optional[KnowledgeBase] = None, reporter: Optional[ProgressReporter] = None,
+                 chunk_size: int = 50, only_changed: bool = True, dry_run: bool = False):
+        if processor is None and not dry_run:
+            raise ValueError("A processor is required unless dry_run is set.")
+        self.obsidian_interface = obsidian_interface
+        self.processor = processor
+        self.ledger = ledger
+        self.scraper = scraper
+        self.knowledge_base = knowledge_base
+        self.reporter = reporter or ProgressReporter()
+        self.chunk_size = max(1, chunk_size)
+        self.only_changed = only_changed
+        self.dry_run = dry_run
+        self.logger = logging.getLogger(__name__)
+
+    def run(self, paths: Sequence[Path]) -> BatchSummary:
+        """
+        Process daily notes and report the progress.
+
+        Args:
+            paths (Sequence[Path]): The notes to process, in processing order.
+
+        Returns:
+            BatchSummary: The counts of the run.
+        """
+        summary = BatchSummary(selected=len(paths))
+        start = time.perf_counter()
+        self.reporter.emit("start", notes=len(paths), dry_run=self.dry_run)
+        for offset in range(0, len(paths), self.chunk_size):
+            self._run_chunk(paths[offset:offset + self.chunk_size], summary)
+        self.reporter.emit("done", elapsed=round(time.perf_counter() - start, 3), **asdict(summary))
+        return summary
+
+    def _run_chunk(self, paths: Sequence[Path], summary: BatchSummary) -> None:
+        contents: Dict[Path, str] = {}
+        for path in paths:
+            try:
+                contents[path] = self.obsidian_interface.read_daily_note(path)
+            except OSError as e:
+                summary.failed += 1
+                self.reporter.emit("note", path=path, status="failed", error=str(e))
+        if self.ledger is not None and self.only_changed:
+            changed = set(self.ledger.changed_notes(contents))
+            for path in [path for path in contents if path not in changed]:
+                del contents[path]
+                summary.skipped += 1
+                self.reporter.emit("note", path=path, status="skipped")
+        if self.dry_run:
+            for path in contents:
+                summary.pending += 1
+                self.reporter.emit("note", path=path, status="pending")
+            return
+        if not contents:
+            return
+
+        extracted: Dict[Path, List[DailyNoteEntry]] = {}
+        for path, result in self._extract(contents):
+            if isinstance(result, Exception):
+                summary.failed += 1
+                if self.ledger is not None:
+                    self.ledger.record_note(path, contents[path], ProcessingStatus.FAILED)
+                self.reporter.emit("note", path=path, status="failed", error=str(result))
+                continue
+            extracted[path] = result
+            summary.extracted += 1
+            summary.entries += len(result)
+            if self.ledger is not None:
+                self.ledger.record_entries(path, self.ledger.pending_entries(path, result), ProcessingStatus.EXTRACTED)
+                self.ledger.record_note(path, contents[path], ProcessingStatus.EXTRACTED)
+            self.reporter.emit("note", path=path, status="extracted", entries=len(result))
+        if self.scraper is not None and self.knowledge_base is not None:
+            self._scrape([entry for entries in extracted.values() for entry in entries], summary)
+
+    def _extract(self, contents: Dict[Path, str]) -> Iterator[tuple]:
+        """Yield (path, entries or exception) per note, in order."""
+        paths = list(contents)
+        done = 0
+        try:
+            for entries in self.processor.iter_extract_entries(list(contents.values())):
+                yield paths[done], entries
+                done += 1
+        except Exception as e:
+            self.logger.warning(f"Extracting {len(paths) - done} notes failed ({e}), retrying them one by one")
+            for path in paths[done:]:
+                try:
+                    yield path, self.processor.extract_entries(contents[path])
+                except Exception as e:
+                    yield path, e
+
+    def _scrape(self, entries: List[DailyNoteEntry], summary: BatchSummary) -> None:
+        urls = {normalize_url(url): url for url in entry_urls(entries)}
+        stored = self.knowledge_base.retrieve_many(urls)
+        new = [key for key in urls if key not in stored]
+        pages = {}
+        for key, content in zip(new, self.scraper.scrape_many([urls[key] for key in new])):
+            # The scraper reports failures in place of the content
+            if content.startswith(f"Error scraping {urls[key]}:"):
+                summary.scrape_failed += 1
+                self.reporter.emit("scrape", url=urls[key], status="failed", error=content)
+            else:
+                pages[key] = content
+                summary.scraped += 1
+                self.reporter.emit("scrape", url=urls[key], status="stored", bytes=len(content))
+        if pages:
+            self.knowledge_base.store_many(pages)
@@ -0,0 +1,15 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class CacheStats:
+    """Hit, miss and eviction counters of a cache."""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """The share of lookups that were hits."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
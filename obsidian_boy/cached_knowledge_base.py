@@ -0,0 +1,273 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+from .cache_stats import CacheStats
+from .knowledge_base import KnowledgeBase, content_version
+
+
+@dataclass
+class FlushStats:
+    """Counters of the write-behind flushes of a cache."""
+    flushes: int = 0
+    entries: int = 0
+    total_seconds: float = 0.0
+    last_seconds: float = 0.0
+
+
+class CachedKnowledgeBase(KnowledgeBase):
+    """
+    Adds an in-process read cache and optional write buffering to any
+    knowledge base.
+
+    Retrieved and stored entries are kept in an LRU bounded by both the
+    number of entries and their approximate size in bytes. With
+    ``write_behind`` enabled, stores are buffered and written to the wrapped
+    knowledge base in one ``store_many`` call on ``flush()``, when
+    ``max_pending`` entries are buffered, or on ``close()``. Buffered entries
+    are visible to reads until the flush that writes them has finished.
+    """
+
+    def __init__(self, knowledge_base: KnowledgeBase, max_entries: int = 1024,
+                 max_bytes: int = 64 * 1024 * 1024, write_behind: bool = False, max_pending: int = 256):
+        self.knowledge_base = knowledge_base
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.write_behind = write_behind
+        self.max_pending = max_pending
+        self.stats = CacheStats()
+        self.flush_stats = FlushStats()
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._bytes = 0
+        self._pending: Dict[str, str] = {}
+        # The entries of the running flush, until the wrapped knowledge base has them
+        self._in_flight: Dict[str, str] = {}
+        # Keys being read from the wrapped knowledge base after a miss, with the
+        # number of reads, and those of them stored again while being read
+        self._loading: Dict[str, int] = {}
+        self._overwritten: Set[str] = set()
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+
+    @staticmethod
+    def _size(content: str) -> int:
+        return sys.getsizeof(content)
+
+    def _remember(self, key: str, content: str) -> None:
+        size = self._size(content)
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= self._size(previous)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = content
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= self._size(evicted)
+            self.stats.evictions += 1
+
+    def _start_loading(self, keys: List[str]) -> None:
+        for key in keys:
+            self._loading[key] = self._loading.get(key, 0) + 1
+
+    def _finish_loading(self, keys: List[str], loaded: Dict[str, str]) -> None:
+        """Cache what a read after a miss loaded, unless a key was stored again meanwhile."""
+        for key in keys:
+            if key in loaded and key not in self._overwritten:
+                self._remember(key, loaded[key])
+            self._loading[key] -= 1
+            if not self._loading[key]:
+                del self._loading[key]
+                self._overwritten.discard(key)
+
+    def _buffered(self) -> Dict[str, str]:
+        return {**self._in_flight, **self._pending}
+
+    def _lookup(self, key: str) -> Optional[str]:
+        for buffer in (self._pending, self._in_flight):
+            if key in buffer:
+                self.stats.hits += 1
+                return buffer[key]
+        content = self._entries.get(key)
+        if content is None:
+            self.stats.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats.hits += 1
+        return content
+
+    def store(self, key: str, content: str) -> None:
+        """
+        Store content, either directly or in the write buffer.
+
+        Args:
+            key (str): The unique identifier for the content.
+            content (str): The content to be stored.
+        """
+        self.store_many({key: content})
+
+    def store_many(self, items: Dict[str, str]) -> None:
+        """
+        Store several entries, either directly or in the write buffer.
+
+        Args:
+            items (Dict[str, str]): The content to be stored by key.
+        """
+        if not self.write_behind:
+            self.knowledge_base.store_many(items)
+        with self._lock:
+            for key, content in items.items():
+                self._remember(key, content)
+                if key in self._loading:
+                    self._overwritten.add(key)
+            if self.write_behind:
+                self._pending.update(items)
+                full = len(self._pending) >= self.max_pending
+        if self.write_behind and full:
+            self.flush()
+
+    def retrieve(self, key: str) -> str:
+        """
+        Retrieve content from the cache or the wrapped knowledge base.
+
+        Args:
+            key (str): The unique identifier for the content.
+
+        Returns:
+            str: The retrieved content.
+
+        Raises:
+            KeyError: If the key is not found in the knowledge base.
+        """
+        with self._lock:
+            content = self._lookup(key)
+            if content is not None:
+                return content
+            self._start_loading([key])
+        loaded = {}
+        try:
+            loaded[key] = self.knowledge_base.retrieve(key)
+        finally:
+            with self._lock:
+                self._finish_loading([key], loaded)
+        return loaded[key]
+
+    def retrieve_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        """
+        Retrieve several entries, reading only the uncached ones from the
+        wrapped knowledge base in one batch.
+
+        Args:
+            keys (Iterable[str]): The keys to look up.
+
+        Returns:
+            Dict[str, str]: The content of every key that was found. Missing
+                keys are left out.
+        """
+        found = {}
+        missing = []
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                content = self._lookup(key)
+                if content is None:
+                    missing.append(key)
+                else:
+                    found[key] = content
+            self._start_loading(missing)
+        if missing:
+            loaded = {}
+            try:
+                loaded = self.knowledge_base.retrieve_many(missing)
+            finally:
+                with self._lock:
+                    self._finish_loading(missing, loaded)
+            found.update(loaded)
+        return found
+
+    def keys(self) -> Iterator[str]:
+        """
+        Enumerate the keys of the wrapped knowledge base and the write buffer.
+
+        Returns:
+            Iterator[str]: The stored keys, in no particular order.
+        """
+        with self._lock:
+            pending = set(self._buffered())
+        yield from pending
+        for key in self.knowledge_base.keys():
+            if key not in pending:
+                yield key
+
+    def versions(self, keys: Iterable[str]) -> Dict[str, str]:
+        """
+        Get the versions of several entries, hashing the buffered ones.
+
+        Args:
+            keys (Iterable[str]): The keys to look up.
+
+        Returns:
+            Dict[str, str]: The version of every key that was found.
+        """
+        keys = list(keys)
+        with self._lock:
+            buffered = self._buffered()
+            pending = {key: buffered[key] for key in keys if key in buffered}
+        found = self.knowledge_base.versions([key for key in keys if key not in pending])
+        found.update((key, content_version(content)) for key, content in pending.items())
+        return found
+
+    def flush(self) -> None:
+        """
+        Write all buffered entries to the wrapped knowledge base.
+
+        If the write fails the entries stay buffered, unless they were
+        overwritten in the meantime, and the error is raised.
+        """
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                self._in_flight = pending
+            if not pending:
+                return
+            start = time.perf_counter()
+            try:
+                self.knowledge_base.store_many(pending)
+            except Exception:
+                with self._lock:
+                    self._pending = {**pending, **self._pending}
+                    self._in_flight = {}
+                raise
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._in_flight = {}
+                self.flush_stats.flushes += 1
+                self.flush_stats.entries += len(pending)
+                self.flush_stats.total_seconds += elapsed
+                self.flush_stats.last_seconds = elapsed
+
+    def clear(self) -> None:
+        """
+        Drop all cached entries. Buffered writes are kept.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def close(self) -> None:
+        """
+        Flush buffered writes.
+        """
+        self.flush()
+
+    def __enter__(self) -> "CachedKnowledgeBase":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
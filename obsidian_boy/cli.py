@@ -0,0 +1,342 @@
+"""
+Command line interface of obsidian-boy.
+
+Usage:
+    obsidian-boy [--vault PATH] list [--latest N | --month YYYY-MM]
+    obsidian-boy [--vault PATH] process [--all] [--provider NAME] [--model NAME] [--trace] [--stats]
+    obsidian-boy [--vault PATH] watch [--provider NAME] [--model NAME] [--trace] [--stats]
+    obsidian-boy [--vault PATH] batch [--since DATE] [--until DATE] [--glob PATTERN] [--dry-run] [--scrape] ...
+
+Only the standard library and the vault modules are imported at startup.
+Chat model providers, tracing and the processing pipeline are imported by
+the commands that use them, so listing and selecting notes comes up
+without loading LangChain.
+"""
+import argparse
+import os
+import sys
+from datetime import date
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from . import instrumentation
+from .obsidian_interface import ObsidianInterface
+from .processing_ledger import ProcessingLedger
+from .terminal_interface import TerminalInterface
+
+DEFAULT_TRACE_ENDPOINT = "http://localhost:6006/v1/traces"
+
+
+def _openai(model: Optional[str]):
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(model=model or "gpt-4o-mini", temperature=0.0)
+
+
+def _anthropic(model: Optional[str]):
+    from langchain_anthropic import ChatAnthropic
+    return ChatAnthropic(model=model or "claude-3-5-sonnet-20240620", api_key=os.getenv("ANTHROPIC_API_KEY"),
+                         temperature=0.0)
+
+
+def _deepseek(model: Optional[str]):
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(model=model or "deepseek-chat", api_key=os.getenv("DEEPSEEK_API_KEY"),
+                      base_url="https://api.deepseek.com/v1", temperature=0.0)
+
+
+PROVIDERS: Dict[str, Callable] = {
+    "openai": _openai,
+    "anthropic": _anthropic,
+    "deepseek": _deepseek,
+}
+
+
+def make_llm(provider: str, model: Optional[str] = None):
+    """
+    Create the chat model of a provider, importing its integration on first use.
+
+    Args:
+        provider (str): The provider, one of ``PROVIDERS``.
+        model (Optional[str]): The model name. Defaults to the provider's default model.
+
+    Returns:
+        BaseChatModel: The chat model.
+    """
+    return PROVIDERS[provider](model)
+
+
+def setup_tracing(endpoint: str = DEFAULT_TRACE_ENDPOINT) -> None:
+    """
+    Export LangChain traces to Phoenix.
+
+    Args:
+        endpoint (str): The OTLP endpoint of the Phoenix collector.
+    """
+    from phoenix.otel import register
+    from openinference.instrumentation.langchain import LangChainInstrumentor
+    tracer_provider = register(project_name="obsidian-boy", endpoint=endpoint)
+    LangChainInstrumentor().instrument(tracer_provider=tracer_provider)
+
+
+def print_entries(extracted: Dict[Path, List]) -> None:
+    """
+    Print the entries extracted from daily notes.
+
+    Args:
+        extracted (Dict[Path, List[DailyNoteEntry]]): The entries of each note.
+    """
+    for note_path, entries in extracted.items():
+        print(f"\nEntries extracted from {note_path.name}:")
+        for entry in entries:
+            print(f"Title: {entry.title}")
+            print(f"Link: {entry.link}")
+            print(f"Description: {entry.description}")
+            print(f"Tags: {', '.join(entry.tags)}")
+            print(f"Todo: {entry.todo}")
+            print("-" * 40)
+
+
+def _make_processor(args: argparse.Namespace, obsidian_interface: ObsidianInterface):
+    """Set up tracing, the chat model and the cached daily note processor."""
+    from dotenv import load_dotenv
+    from .daily_note_processor import DailyNoteProcessor
+    from .extraction_cache import ExtractionCache
+    from .llm_caller import RetryPolicy
+
+    load_dotenv()
+    if args.trace:
+        setup_tracing(args.trace_endpoint)
+    if args.stats:
+        # Enabled after the tracer provider is registered so that spans are exported to it
+        instrumentation.enable()
+    cache = None if args.no_cache else ExtractionCache(obsidian_interface.STATE_DIR / "extraction_cache.sqlite")
+    processor = DailyNoteProcessor(llm=make_llm(args.provider, args.model), max_concurrency=args.concurrency,
+                                   cache=cache, batch_token_budget=args.batch_token_budget,
+                                   max_prompt_tokens=args.max_prompt_tokens,
+                                   fallbacks=[make_llm(provider) for provider in args.fallback],
+                                   retry_policy=RetryPolicy(max_attempts=args.retries + 1),
+                                   hedge_after=args.hedge_after)
+    return processor, cache
+
+
+def cmd_list(args: argparse.Namespace, obsidian_interface: ObsidianInterface) -> int:
+    catalog = obsidian_interface.daily_notes
+    if args.month:
+        year, month = args.month
+        paths = [note.path for note in catalog.month(year, month)]
+    elif args.latest:
+        paths = [note.path for note in catalog.latest(args.latest)]
+    else:
+        paths = catalog.paths()
+    TerminalInterface(obsidian_interface).list_daily_notes(paths)
+    return 0
+
+
+def cmd_process(args: argparse.Namespace, obsidian_interface: ObsidianInterface) -> int:
+    from .daily_note_watcher import process_changed_notes
+    from .llm_caller import LLMCallError
+
+    ledger = ProcessingLedger(obsidian_interface.STATE_DIR / "ledger.sqlite")
+    try:
+        terminal_interface = TerminalInterface(obsidian_interface, ledger=None if args.all else ledger)
+        selected_notes = terminal_interface.select_daily_notes()
+        if not selected_notes:
+            print("No notes selected.")
+            return 0
+        processor, cache = _make_processor(args, obsidian_interface)
+        try:
+            extracted = process_changed_notes(selected_notes, obsidian_interface, processor, ledger,
+                                              only_changed=not args.all)
+        except LLMCallError as e:
+            print(f"Processing stopped, notes extracted so far are kept: {e}")
+            return 1
+        finally:
+            processor.close()
+            if cache is not None:
+                cache.close()
+        print(f"Skipping {len(selected_notes) - len(extracted)} unchanged notes")
+        print_entries(extracted)
+        if cache is not None:
+            print(f"Extraction cache: {cache.stats.hits} hits, {cache.stats.misses} misses")
+    finally:
+        ledger.close()
+    return 0
+
+
+def cmd_watch(args: argparse.Namespace, obsidian_interface: ObsidianInterface) -> int:
+    from .daily_note_watcher import DailyNoteWatcher, process_changed_notes
+
+    ledger = ProcessingLedger(obsidian_interface.STATE_DIR / "ledger.sqlite")
+    processor = cache = None
+    try:
+        processor, cache = _make_processor(args, obsidian_interface)
+        print(f"Watching {obsidian_interface.DAILY_NOTE_DIR} for changes. Press Ctrl+C to stop.")
+        watcher = DailyNoteWatcher(
+            obsidian_interface.DAILY_NOTE_DIR,
+            lambda paths: print_entries(process_changed_notes(paths, obsidian_interface, processor, ledger)),
+            debounce=args.debounce,
+        )
+        watcher.run_forever()
+    finally:
+        if processor is not None:
+            processor.close()
+        if cache is not None:
+            cache.close()
+        ledger.close()
+    return 0
+
+
+def cmd_batch(args: argparse.Namespace, obsidian_interface: ObsidianInterface) -> int:
+    from .batch import EXIT_ERROR, EXIT_INTERRUPTED, BatchRunner, ProgressReporter, select_notes
+
+    reporter = ProgressReporter()
+    if not obsidian_interface.DAILY_NOTE_DIR.is_dir():
+        reporter.emit("error", message=f"No daily note directory at {obsidian_interface.DAILY_NOTE_DIR}")
+        return EXIT_ERROR
+    paths = select_notes(obsidian_interface.daily_notes, since=args.since, until=args.until, pattern=args.glob,
+                         latest=args.latest)
+    ledger = ProcessingLedger(obsidian_interface.STATE_DIR / "ledger.sqlite")
+    closing = [ledger]
+    try:
+        processor = scraper = knowledge_base = None
+        if not args.dry_run:
+            try:
+                processor, cache = _make_processor(args, obsidian_interface)
+            except Exception as e:
+                reporter.emit("error", message=f"Could not set up the chat model: {e}")
+                return EXIT_ERROR
+            closing += [processor, cache]
+            if args.scrape:
+                from .http_cache import HttpCache
+                from .knowledge_base import SQLiteKnowledgeBase
+                from .web_scraper import WebScraper
+                http_cache = None if args.no_cache else HttpCache(obsidian_interface.STATE_DIR / "http_cache.sqlite")
+                scraper = WebScraper(max_workers=args.scrape_workers, cache=http_cache)
+                knowledge_base = SQLiteKnowledgeBase(obsidian_interface.STATE_DIR / "knowledge_base")
+                closing += [http_cache, scraper, knowledge_base]
+        runner = BatchRunner(obsidian_interface, processor, ledger=ledger, scraper=scraper,
+                             knowledge_base=knowledge_base, reporter=reporter, chunk_size=args.chunk_size,
+                             only_changed=not args.all, dry_run=args.dry_run)
+        try:
+            summary = runner.run(paths)
+        except KeyboardInterrupt:
+            reporter.emit("interrupted")
+            return EXIT_INTERRUPTED
+        recorder = instrumentation.get_recorder()
+        if recorder is not None:
+            reporter.emit("stats", counters=recorder.counters, stages={
+                name: {"count": histogram.count, "total": round(histogram.total, 6),
+                       "p50": round(histogram.percentile(50), 6), "p95": round(histogram.percentile(95), 6)}
+                for name, histogram in recorder.histograms.items()
+            })
+        return summary.exit_code
+    finally:
+        for resource in closing:
+            if resource is not None:
+                resource.close()
+
+
+def _parse_date(value: str) -> date:
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date {value!r}, expected YYYY-MM-DD")
+
+
+def _parse_month(value: str) -> Tuple[int, int]:
+    try:
+        month = date.fromisoformat(f"{value}-01")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid month {value!r}, expected YYYY-MM")
+    return month.year, month.month
+
+
+def _add_llm_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--provider", choices=list(PROVIDERS), default="openai", help="Chat model provider")
+    parser.add_argument("--model", help="Chat model name, defaults to the provider's default model")
+    parser.add_argument("--fallback", action="append", choices=list(PROVIDERS), default=[],
+                        help="Provider to use when the previous ones fail; may be repeated")
+    parser.add_argument("--retries", type=int, default=3, help="Retries per provider on rate limits and server errors")
+    parser.add_argument("--hedge-after", type=float,
+                        help="Send a duplicate request if there is no answer after this many seconds")
+    parser.add_argument("--concurrency", type=int, default=4, help="Maximum number of LLM requests in flight")
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write the extraction cache")
+    parser.add_argument("--batch-token-budget", type=int, default=2000,
+                        help="Prompt tokens per batched extraction request, including the instructions")
+    parser.add_argument("--max-prompt-tokens", type=int,
+                        help="Split note sections and batches so that no prompt exceeds this many tokens")
+    parser.add_argument("--trace", action="store_true", help="Export traces to Phoenix")
+    parser.add_argument("--trace-endpoint", default=DEFAULT_TRACE_ENDPOINT, help="Phoenix OTLP endpoint")
+    parser.add_argument("--stats", action="store_true", help="Print the per-stage timings at the end of the run")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Build the argument parser with one subcommand per command.
+
+    Returns:
+        argparse.ArgumentParser: The parser.
+    """
+    parser = argparse.ArgumentParser(prog="obsidian-boy", description="An Obsidian AI assistant.")
+    parser.add_argument("--vault", type=Path, default=Path(os.getenv("VAULT_PATH", "./vault")),
+                        help="Path of the vault, defaults to $VAULT_PATH or ./vault")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = commands.add_parser("list", help="List daily notes")
+    selection = list_parser.add_mutually_exclusive_group()
+    selection.add_argument("--latest", type=int, help="Only the N newest notes")
+    selection.add_argument("--month", type=_parse_month, help="Only the notes of a month, as YYYY-MM")
+    list_parser.set_defaults(run=cmd_list)
+
+    process_parser = commands.add_parser("process", help="Select daily notes and extract their entries")
+    process_parser.add_argument("--all", action="store_true", help="Also process notes that did not change")
+    _add_llm_arguments(process_parser)
+    process_parser.set_defaults(run=cmd_process)
+
+    watch_parser = commands.add_parser("watch", help="Extract the entries of daily notes whenever they are saved")
+    watch_parser.add_argument("--debounce", type=float, default=1.0, help="Seconds a note must be unchanged")
+    _add_llm_arguments(watch_parser)
+    watch_parser.set_defaults(run=cmd_watch)
+
+    batch_parser = commands.add_parser(
+        "batch", help="Process daily notes without prompts, reporting progress as JSON lines",
+        description="Process daily notes without prompts. Progress is written to stdout as JSON lines. "
+                    "Exit codes: 0 success, 1 some notes failed, 2 invalid arguments, 3 setup failed, "
+                    "130 interrupted.",
+    )
+    batch_parser.add_argument("--since", type=_parse_date, help="First date to process, YYYY-MM-DD")
+    batch_parser.add_argument("--until", type=_parse_date, help="Last date to process, YYYY-MM-DD")
+    batch_parser.add_argument("--latest", type=int, help="Only the N newest notes")
+    batch_parser.add_argument("--glob", help="Only notes whose name matches, e.g. '2024-05-*'")
+    batch_parser.add_argument("--all", action="store_true", help="Also process notes that did not change")
+    batch_parser.add_argument("--dry-run", action="store_true", help="Only report the notes that would be processed")
+    batch_parser.add_argument("--chunk-size", type=int, default=50, help="Notes extracted and recorded together")
+    batch_parser.add_argument("--scrape", action="store_true",
+                              help="Scrape the links of the extracted entries into the knowledge base")
+    batch_parser.add_argument("--scrape-workers", type=int, default=8, help="Maximum number of pages fetched at once")
+    _add_llm_arguments(batch_parser)
+    batch_parser.set_defaults(run=cmd_batch)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Run the command line interface.
+
+    Args:
+        argv (Optional[List[str]]): The arguments. Defaults to ``sys.argv[1:]``.
+
+    Returns:
+        int: The exit code.
+    """
+    args = build_parser().parse_args(argv)
+    obsidian_interface = ObsidianInterface(vault_path=args.vault)
+    try:
+        return args.run(args, obsidian_interface)
+    finally:
+        # The batch command reports its stats as a JSON line instead
+        if getattr(args, "stats", False) and args.command != "batch":
+            instrumentation.report()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+import bisect
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+_DATE_PATTERN = re.compile(r"^(\d{4})-(\d{2})-(\d{2})")
+
+
+def parse_note_date(stem: str) -> Optional[date]:
+    """
+    Parse the date a daily note's file name starts with.
+
+    Args:
+        stem (str): The file name without extension, e.g. ``2024-05-01``.
+
+    Returns:
+        Optional[date]: The date, or None if the name does not start with a
+            valid ``YYYY-MM-DD`` date.
+    """
+    match = _DATE_PATTERN.match(stem)
+    if not match:
+        return None
+    try:
+        return date(*(int(part) for part in match.groups()))
+    except ValueError:
+        return None
+
+
+@dataclass(frozen=True)
+class DailyNote:
+    """A daily note and the date it is for."""
+    date: date
+    path: Path
+
+
+class DailyNoteCatalog:
+    """
+    Cached listing of the daily notes directory, indexed by date.
+
+    The directory is only listed again when its modification time changes,
+    i.e. when notes are added, removed or renamed. Date queries use binary
+    search over the notes sorted by date. Results are sorted newest first,
+    like the daily note list in the UI.
+    """
+
+    # A directory modified this recently may change again within the same
+    # timestamp tick, so its listing is not trusted on the next call
+    RACY_WINDOW_NS = 2_000_000_000
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self._lock = threading.Lock()
+        self._mtime_ns: Optional[int] = None
+        self._paths: List[Path] = []
+        self._notes: List[DailyNote] = []
+        self._dates: List[date] = []
+
+    def _refresh(self) -> Tuple[List[Path], List[DailyNote], List[date]]:
+        try:
+            mtime_ns = os.stat(self.directory).st_mtime_ns
+        except FileNotFoundError:
+            mtime_ns = None
+        with self._lock:
+            if mtime_ns != self._mtime_ns or mtime_ns is None:
+                listed_at = time.time_ns()
+                paths = []
+                if mtime_ns is not None:
+                    with os.scandir(self.directory) as entries:
+                        paths = [
+                            Path(entry.path) for entry in entries
+                            if entry.name.endswith(".md") and entry.is_file()
+                        ]
+                notes = sorted(
+                    (DailyNote(note_date, path) for path in paths
+                     if (note_date := parse_note_date(path.stem)) is not None),
+                    key=lambda note: (note.date, note.path.stem),
+                )
+                self._paths = sorted(paths, key=lambda path: path.stem, reverse=True)
+                self._notes = notes
+                self._dates = [note.date for note in notes]
+                racy = mtime_ns is not None and listed_at - mtime_ns < self.RACY_WINDOW_NS
+                self._mtime_ns = None if racy else mtime_ns
+            return self._paths, self._notes, self._dates
+
+    def paths(self) -> List[Path]:
+        """
+        List all notes in the directory, including ones without a date.
+
+        Returns:
+            List[Path]: The note paths sorted by name, newest first.
+        """
+        return list(self._refresh()[0])
+
+    def notes(self) -> List[DailyNote]:
+        """
+        List all dated notes.
+
+        Returns:
+            List[DailyNote]: The notes, newest first.
+        """
+        return self._refresh()[1][::-1]
+
+    def latest(self, n: int) -> List[DailyNote]:
+        """
+        Get the most recent notes.
+
+        Args:
+            n (int): The maximum number of notes.
+
+        Returns:
+            List[DailyNote]: The notes, newest first.
+        """
+        return self.page(0, n)
+
+    def page(self, page: int, page_size: int) -> List[DailyNote]:
+        """
+        Get one page of the notes.
+
+        Args:
+            page (int): The zero-based page number; page 0 holds the newest notes.
+            page_size (int): The number of notes per page.
+
+        Returns:
+            List[DailyNote]: The notes of the page, newest first.
+        """
+        notes = self._refresh()[1]
+        end = len(notes) - page * page_size
+        if end <= 0 or page_size <= 0:
+            return []
+        return notes[max(0, end - page_size):end][::-1]
+
+    def between(self, start: date, end: date) -> List[DailyNote]:
+        """
+        Get the notes within a date range.
+
+        Args:
+            start (date): The first date, inclusive.
+            end (date): The last date, inclusive.
+
+        Returns:
+            List[DailyNote]: The notes, newest first.
+        """
+        _, notes, dates = self._refresh()
+        return notes[bisect.bisect_left(dates, start):bisect.bisect_right(dates, end)][::-1]
+
+    def month(self, year: int, month: int) -> List[DailyNote]:
+        """
+        Get the notes of a calendar month.
+
+        Args:
+            year (int): The year.
+            month (int): The month, 1 to 12.
+
+        Returns:
+            List[DailyNote]: The notes, newest first.
+        """
+        next_month = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+        _, notes, dates = self._refresh()
+        return notes[bisect.bisect_left(dates, date(year, month, 1)):bisect.bisect_left(dates, next_month)][::-1]
+
+    def since(self, after: date) -> List[DailyNote]:
+        """
+        Get the notes after a date, e.g. the last processed one.
+
+        Args:
+            after (date): The date, exclusive.
+
+        Returns:
+            List[DailyNote]: The notes, newest first.
+        """
+        _, notes, dates = self._refresh()
+        return notes[bisect.bisect_right(dates, after):][::-1]
+
+    def __len__(self) -> int:
+        return len(self._refresh()[1])
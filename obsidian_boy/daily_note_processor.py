@@ -1,8 +1,17 @@
-from typing import List
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Type, TypeVar, Union
 from langchain.chat_models.base import BaseChatModel
 import logging
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 import markdownify
+from .entry_parser import parse_section
+from .extraction_cache import ExtractionCache, extraction_cache_key, model_identity
+from .instrumentation import count, span
+from .llm_caller import LLMCaller, RetryPolicy
+from .note_parser import split_frontmatter, split_sections
+from .prompt_compaction import CompactedText, compact, estimate_tokens, split_to_budget
+from .rate_limiter import RateLimiterRegistry
 from .types import DailyNoteEntry
 # Define the Pydantic model for the daily note entry
 # class DailyNoteEntry(BaseModel):
@@ -15,37 +24,321 @@ from .types import DailyNoteEntry
 class DailyNoteResponse(BaseModel):
     entries: List[DailyNoteEntry]
 
+class SectionEntries(BaseModel):
+    section_id: int = Field(..., description="The id of the section the entries were extracted from")
+    entries: List[DailyNoteEntry]
+
+class BatchedDailyNoteResponse(BaseModel):
+    sections: List[SectionEntries]
+
+PROMPT_TEMPLATE = """
+        Extract entries from the following daily note content. Each entry should have at least a title or a link, and may include a description, tags, and an optional todo item.
+        Make sure to call the DailyNoteResponse function with the extracted entries.
+
+        Daily note content:
+        {note_content}
+        """
+
+BATCH_PROMPT_TEMPLATE = """
+        Extract entries from each of the following daily note sections. Each entry should have at least a title or a link, and may include a description, tags, and an optional todo item.
+        Make sure to call the BatchedDailyNoteResponse function with one item per section, using the section id given in its <section> tag.
+
+        {sections}
+        """
+
+# Prompt tokens besides the section content, counted against the token budgets
+PROMPT_OVERHEAD_TOKENS = estimate_tokens(PROMPT_TEMPLATE.format(note_content=""))
+BATCH_PROMPT_OVERHEAD_TOKENS = estimate_tokens(BATCH_PROMPT_TEMPLATE.format(sections=""))
+SECTION_OVERHEAD_TOKENS = estimate_tokens('<section id="999">\n\n</section>\n')
+
+# A section resolved to its entries, or the section content still to be extracted
+SectionPlan = Union[List[DailyNoteEntry], str]
+
+ResponseT = TypeVar("ResponseT", bound=BaseModel)
+
+
 class DailyNoteProcessor:
-    def __init__(self, llm: BaseChatModel):
+    def __init__(self, llm: BaseChatModel, max_concurrency: int = 4,
+                 rate_limiters: Optional[RateLimiterRegistry] = None,
+                 cache: Optional[ExtractionCache] = None, fast_path: bool = True,
+                 batch_token_budget: Optional[int] = None, compact_prompts: bool = True,
+                 max_prompt_tokens: Optional[int] = None, fallbacks: Optional[Sequence[BaseChatModel]] = None,
+                 retry_policy: Optional[RetryPolicy] = None, hedge_after: Optional[float] = None):
         self.llm = llm
+        self.max_concurrency = max_concurrency
+        self.rate_limiters = rate_limiters
+        self.cache = cache
+        self.fast_path = fast_path
+        self.batch_token_budget = batch_token_budget
+        # Sections are compacted before they are sent and split so no prompt exceeds max_prompt_tokens
+        self.compact_prompts = compact_prompts
+        self.max_prompt_tokens = max_prompt_tokens
+        # Requests are retried, hedged and handed to the fallback models by the caller
+        self.caller = LLMCaller([llm, *(fallbacks or [])], rate_limiters=rate_limiters, policy=retry_policy,
+                                hedge_after=hedge_after)
         self.logger = logging.getLogger(__name__)
 
     def extract_entries(self, note_content: str) -> List[DailyNoteEntry]:
         """
-        Extract entries from a daily note using an LLM.
+        Extract entries from a daily note.
+
+        The note is split into sections at its headings. With the fast path
+        enabled, well-formed sections are parsed locally; every other section
+        is extracted by the LLM on its own, so a cache hit on unchanged
+        sections leaves only new or edited sections to send.
 
         Args:
             note_content (str): The content of the daily note.
 
         Returns:
             List[DailyNoteEntry]: A list of extracted entries.
+
+        Raises:
+            LLMCallError: If a section could not be extracted by any provider.
+                Sections extracted before are cached, so a retry only pays
+                for the rest.
         """
-        # Convert HTML content to Markdown
-        note_content = markdownify.markdownify(note_content)
+        return self.extract_entries_many([note_content])[0]
 
-        prompt = f"""
-        Extract entries from the following daily note content. Each entry should have at least a title or a link, and may include a description, tags, and an optional todo item.
-        Make sure to call the DailyNoteResponse function with the extracted entries.
+    def _plan(self, note_content: str) -> List[SectionPlan]:
+        """
+        Split a note into sections and resolve those that need no LLM.
 
-        Daily note content:
-        {note_content}
+        Args:
+            note_content (str): The content of the daily note.
+
+        Returns:
+            List[SectionPlan]: Per section either its entries or, if the LLM
+                is needed, the section content converted to Markdown. With
+                ``max_prompt_tokens`` sections whose prompt would be larger
+                are split into several parts that are extracted separately.
+        """
+        _, body = split_frontmatter(note_content)
+        plan: List[SectionPlan] = []
+        for section in split_sections(body):
+            entries = parse_section(section) if self.fast_path else None
+            if entries is not None:
+                count("extract.fast_path_sections")
+                plan.append(entries)
+                continue
+            # Convert HTML content to Markdown
+            with span("extract.markdownify"):
+                markdown = markdownify.markdownify(section.text)
+            if self.max_prompt_tokens:
+                budget = max(1, self.max_prompt_tokens - PROMPT_OVERHEAD_TOKENS)
+                plan.extend(split_to_budget(markdown, budget, self._prompt_tokens))
+            else:
+                plan.append(markdown)
+        return plan
+
+    def _compact(self, content: str) -> CompactedText:
+        if not self.compact_prompts:
+            return CompactedText(content)
+        compacted = compact(content, strip_frontmatter=False)
+        count("extract.compaction_tokens_saved", estimate_tokens(content) - estimate_tokens(compacted.text))
+        return compacted
+
+    def _prompt_tokens(self, content: str) -> int:
+        if not self.compact_prompts:
+            return estimate_tokens(content)
+        return estimate_tokens(compact(content, strip_frontmatter=False).text)
+
+    def _cache_key(self, content: str, llm: Optional[BaseChatModel] = None) -> str:
+        return extraction_cache_key(content, PROMPT_TEMPLATE, model_identity(llm or self.llm), DailyNoteResponse)
+
+    def _cached(self, content: str) -> Optional[List[DailyNoteEntry]]:
+        if self.cache is None:
+            return None
+        entries = self.cache.get(self._cache_key(content))
+        count("extract.cache_hits" if entries is not None else "extract.cache_misses")
+        return entries
+
+    def _store(self, content: str, entries: List[DailyNoteEntry], llm: BaseChatModel) -> None:
+        if self.cache is not None:
+            # Keyed by the model that answered, so fallback answers never pass for the primary's
+            self.cache.put(self._cache_key(content, llm), entries)
+
+    def _extract_with_llm(self, note_content: str) -> List[DailyNoteEntry]:
+        """
+        Extract entries from a daily note section using an LLM.
+
+        The section is compacted for the prompt and the URLs replaced by
+        placeholders are restored in the extracted entries. Successful
+        results are stored in the cache if one is configured.
+
+        Args:
+            note_content (str): The daily note section to send to the LLM.
+
+        Returns:
+            List[DailyNoteEntry]: A list of extracted entries.
+
+        Raises:
+            LLMCallError: If the request failed at every provider.
         """
+        compacted = self._compact(note_content)
+        prompt = PROMPT_TEMPLATE.format(note_content=compacted.text)
 
         try:
-            # Create a structured LLM with the Pydantic model
-            structured_llm = self.llm.with_structured_output(DailyNoteResponse)
-            response = structured_llm.invoke(prompt)
-            return response.entries
+            response, answered_by = self._invoke(prompt, DailyNoteResponse)
         except Exception as e:
             self.logger.error(f"Error processing daily note: {str(e)}")
-            return []
+            raise
+        entries = compacted.restore_entries(response.entries)
+        self._store(note_content, entries, answered_by)
+        return entries
+
+    def _extract_batch(self, contents: List[str]) -> Dict[str, List[DailyNoteEntry]]:
+        """
+        Extract entries from several small sections in a single LLM request.
+
+        Sections whose results cannot be attributed unambiguously, because
+        the model skipped or repeated their id, fall back to single requests.
+
+        Args:
+            contents (List[str]): The daily note sections to send to the LLM.
+
+        Returns:
+            Dict[str, List[DailyNoteEntry]]: The extracted entries per section.
+        """
+        compacted = [self._compact(content) for content in contents]
+        sections = "\n".join(
+            f'<section id="{i}">\n{section.text}\n</section>' for i, section in enumerate(compacted, 1)
+        )
+        try:
+            response, answered_by = self._invoke(BATCH_PROMPT_TEMPLATE.format(sections=sections),
+                                                 BatchedDailyNoteResponse)
+            items = response.sections
+        except Exception as e:
+            self.logger.warning(f"Batched extraction failed, retrying sections one by one: {str(e)}")
+            items = []
+
+        id_counts = Counter(item.section_id for item in items)
+        results = {}
+        for item in items:
+            if id_counts[item.section_id] == 1 and 1 <= item.section_id <= len(contents):
+                content = contents[item.section_id - 1]
+                results[content] = compacted[item.section_id - 1].restore_entries(item.entries)
+                self._store(content, results[content], answered_by)
+        for content in contents:
+            if content not in results:
+                count("llm.batch_fallbacks")
+                results[content] = self._extract_with_llm(content)
+        return results
+
+    def _extract_job(self, contents: List[str]) -> Dict[str, List[DailyNoteEntry]]:
+        if len(contents) == 1:
+            return {contents[0]: self._extract_with_llm(contents[0])}
+        return self._extract_batch(contents)
+
+    def _batches(self, contents: List[str]) -> List[List[str]]:
+        """
+        Group sections into LLM requests.
+
+        Without a batch token budget every section is its own request.
+        Otherwise consecutive sections are packed into requests whose whole
+        prompt, measured after compaction, stays within the budget and within
+        ``max_prompt_tokens``. Sections that do not fit are sent alone.
+
+        Args:
+            contents (List[str]): The daily note sections to extract.
+
+        Returns:
+            List[List[str]]: The sections of each request.
+        """
+        if not self.batch_token_budget:
+            return [[content] for content in contents]
+        limit = min(self.batch_token_budget, self.max_prompt_tokens or self.batch_token_budget)
+        batches: List[List[str]] = []
+        current: List[str] = []
+        used = BATCH_PROMPT_OVERHEAD_TOKENS
+        for content in contents:
+            tokens = self._prompt_tokens(content) + SECTION_OVERHEAD_TOKENS
+            if BATCH_PROMPT_OVERHEAD_TOKENS + tokens > limit:
+                batches.append([content])
+                continue
+            if current and used + tokens > limit:
+                batches.append(current)
+                current, used = [], BATCH_PROMPT_OVERHEAD_TOKENS
+            current.append(content)
+            used += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    def _invoke(self, prompt: str, schema: Type[ResponseT]) -> Tuple[ResponseT, BaseChatModel]:
+        count("llm.prompt_tokens_estimated", estimate_tokens(prompt))
+        return self.caller.invoke_with_model(prompt, schema)
+
+    def iter_extract_entries(self, notes: Sequence[str],
+                             max_concurrency: Optional[int] = None) -> Iterator[List[DailyNoteEntry]]:
+        """
+        Extract entries from several daily notes concurrently.
+
+        The sections of all notes that need the LLM are extracted on one
+        thread pool so the network round trips overlap, and identical sections
+        are only extracted once. Cached sections are resolved up front and the
+        rest may be packed into batched requests (see ``batch_token_budget``).
+        Results are yielded in the order of the input notes as soon as each
+        one and all its predecessors are done.
+
+        Args:
+            notes (Sequence[str]): The contents of the daily notes.
+            max_concurrency (Optional[int]): The maximum number of LLM calls in
+                flight. Defaults to the processor's ``max_concurrency``.
+
+        Yields:
+            List[DailyNoteEntry]: The extracted entries of each note.
+
+        Raises:
+            LLMCallError: If a section of the next note could not be extracted
+                by any provider.
+        """
+        plans = [self._plan(note) for note in notes]
+        resolved: Dict[str, List[DailyNoteEntry]] = {}
+        pending = []
+        for content in dict.fromkeys(item for plan in plans for item in plan if isinstance(item, str)):
+            cached = self._cached(content)
+            if cached is not None:
+                resolved[content] = cached
+            else:
+                pending.append(content)
+
+        batches = self._batches(pending)
+        workers = max(1, min(max_concurrency or self.max_concurrency, len(batches) or 1))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="extract") as executor:
+            futures = {}
+            for batch in batches:
+                future = executor.submit(self._extract_job, batch)
+                futures.update(dict.fromkeys(batch, future))
+
+            def entries_of(item: SectionPlan) -> List[DailyNoteEntry]:
+                if not isinstance(item, str):
+                    return item
+                if item in resolved:
+                    return resolved[item]
+                return futures[item].result()[item]
+
+            for plan in plans:
+                yield [entry for item in plan for entry in entries_of(item)]
+
+    def extract_entries_many(self, notes: Sequence[str],
+                             max_concurrency: Optional[int] = None) -> List[List[DailyNoteEntry]]:
+        """
+        Extract entries from several daily notes concurrently.
+
+        Args:
+            notes (Sequence[str]): The contents of the daily notes.
+            max_concurrency (Optional[int]): The maximum number of LLM calls in
+                flight. Defaults to the processor's ``max_concurrency``.
+
+        Returns:
+            List[List[DailyNoteEntry]]: The extracted entries of each note, in
+                the order of the input notes.
+        """
+        return list(self.iter_extract_entries(notes, max_concurrency))
+
+    def close(self) -> None:
+        """
+        Release the threads of the LLM caller.
+        """
+        self.caller.close()
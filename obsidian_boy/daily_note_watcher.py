@@ -0,0 +1,244 @@
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from .daily_note_processor import DailyNoteProcessor
+from .obsidian_interface import ObsidianInterface
+from .processing_ledger import ProcessingLedger
+from .types import DailyNoteEntry, ProcessingStatus
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # watchdog is optional, the watcher falls back to polling
+    FileSystemEventHandler = object
+    Observer = None
+
+
+class _NoteEventHandler(FileSystemEventHandler):
+    """Forwards file system events on Markdown files."""
+
+    def __init__(self, notify: Callable[[Path], None]):
+        super().__init__()
+        self.notify = notify
+
+    def on_any_event(self, event) -> None:
+        if event.is_directory:
+            return
+        for path in (event.src_path, getattr(event, "dest_path", "")):
+            if path and str(path).endswith(".md"):
+                self.notify(Path(os.fsdecode(path)))
+
+
+class PollingObserver:
+    """
+    Fallback observer that detects changed notes by polling their signatures.
+
+    Only the file names, modification times and sizes are compared; the
+    notes themselves are not read.
+    """
+
+    def __init__(self, directory: Path, notify: Callable[[Path], None], interval: float = 2.0):
+        self.directory = Path(directory)
+        self.notify = notify
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="note-poller", daemon=True)
+        self._signatures: Dict[str, Tuple[int, int]] = {}
+
+    def _snapshot(self) -> Dict[str, Tuple[int, int]]:
+        signatures = {}
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if entry.name.endswith(".md") and entry.is_file():
+                        stat = entry.stat()
+                        signatures[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            pass
+        return signatures
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            signatures = self._snapshot()
+            for path, signature in signatures.items():
+                if self._signatures.get(path) != signature:
+                    self.notify(Path(path))
+            self._signatures = signatures
+
+    def start(self) -> None:
+        self._signatures = self._snapshot()
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        self._thread.join(timeout)
+
+
+class DailyNoteWatcher:
+    """
+    Watches the daily note directory and reports changed notes.
+
+    File system events come from watchdog (inotify on Linux) when it is
+    installed, otherwise from a ``PollingObserver``. Events are coalesced per
+    file and a note is only reported once it has not changed for
+    ``debounce`` seconds, so the rapid saves of an editor end up as one
+    change. Changed notes that are due together are passed to ``on_change``
+    as one batch on the watcher's dispatch thread.
+    """
+
+    def __init__(self, directory: Path, on_change: Callable[[List[Path]], None], debounce: float = 1.0,
+                 use_polling: Optional[bool] = None, poll_interval: float = 2.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.directory = Path(directory)
+        self.on_change = on_change
+        self.debounce = debounce
+        self.use_polling = Observer is None if use_polling is None else use_polling
+        self.poll_interval = poll_interval
+        self.logger = logging.getLogger(__name__)
+        self._clock = clock
+        self._pending: Dict[Path, float] = {}
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._observer = None
+        self._dispatcher: Optional[threading.Thread] = None
+
+    def notify(self, path: Path) -> None:
+        """
+        Register a change of a note, restarting its debounce period.
+
+        Args:
+            path (Path): The path of the changed note.
+        """
+        with self._condition:
+            self._pending[Path(path)] = self._clock() + self.debounce
+            self._condition.notify()
+
+    def take_due(self) -> List[Path]:
+        """
+        Remove and return the notes whose debounce period has passed.
+
+        Returns:
+            List[Path]: The paths of the due notes that still exist, sorted.
+        """
+        now = self._clock()
+        with self._condition:
+            due = [path for path, deadline in self._pending.items() if deadline <= now]
+            for path in due:
+                del self._pending[path]
+        return sorted(path for path in due if path.exists())
+
+    def _dispatch(self) -> None:
+        while True:
+            with self._condition:
+                while not self._stopped:
+                    deadlines = self._pending.values()
+                    timeout = min(deadlines) - self._clock() if deadlines else None
+                    if timeout is not None and timeout <= 0:
+                        break
+                    self._condition.wait(timeout)
+                if self._stopped:
+                    return
+            due = self.take_due()
+            if not due:
+                continue
+            try:
+                self.on_change(due)
+            except Exception as e:
+                self.logger.error(f"Error handling changed notes {[path.name for path in due]}: {e}")
+
+    def start(self) -> None:
+        """
+        Start watching in background threads.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if self.use_polling:
+            self._observer = PollingObserver(self.directory, self.notify, self.poll_interval)
+        else:
+            self._observer = Observer()
+            self._observer.schedule(_NoteEventHandler(self.notify), str(self.directory), recursive=False)
+        self._observer.start()
+        self._dispatcher = threading.Thread(target=self._dispatch, name="note-watcher", daemon=True)
+        self._dispatcher.start()
+
+    def stop(self) -> None:
+        """
+        Stop watching. Changes still in their debounce period are dropped.
+        """
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+        if self._dispatcher is not None:
+            self._dispatcher.join()
+
+    def run_forever(self) -> None:
+        """
+        Watch until interrupted with Ctrl+C.
+        """
+        self.start()
+        try:
+            while self._dispatcher.is_alive():
+                self._dispatcher.join(1.0)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def __enter__(self) -> "DailyNoteWatcher":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+def process_changed_notes(paths: List[Path], obsidian_interface: ObsidianInterface, processor: DailyNoteProcessor,
+                          ledger: Optional[ProcessingLedger] = None,
+                          only_changed: bool = True) -> Dict[Path, List[DailyNoteEntry]]:
+    """
+    Extract the entries of changed daily notes.
+
+    With a ledger, the extracted notes and entries are recorded, a note
+    whose extraction failed is recorded as failed, and unless
+    ``only_changed`` is disabled notes whose content was already extracted
+    are skipped.
+
+    Args:
+        paths (List[Path]): The paths of the changed notes.
+        obsidian_interface (ObsidianInterface): The interface to read the notes with.
+        processor (DailyNoteProcessor): The processor to extract the entries with.
+        ledger (Optional[ProcessingLedger]): The processing ledger.
+        only_changed (bool): Whether to skip notes the ledger has seen in their current version.
+
+    Returns:
+        Dict[Path, List[DailyNoteEntry]]: The entries of each processed note.
+
+    Raises:
+        LLMCallError: If a note could not be extracted. The notes before it are
+            recorded as extracted and the note itself as failed.
+    """
+    contents = {path: obsidian_interface.read_daily_note(path) for path in paths}
+    if ledger is not None and only_changed:
+        contents = {path: contents[path] for path in ledger.changed_notes(contents)}
+    extracted = {}
+    results = processor.iter_extract_entries(list(contents.values()))
+    # Notes are recorded as they complete, so a failing note keeps the ones before it
+    for path in contents:
+        try:
+            entries = next(results)
+        except Exception:
+            if ledger is not None:
+                ledger.record_note(path, contents[path], ProcessingStatus.FAILED)
+            raise
+        extracted[path] = entries
+        if ledger is not None:
+            ledger.record_entries(path, ledger.pending_entries(path, entries), ProcessingStatus.EXTRACTED)
+            ledger.record_note(path, contents[path], ProcessingStatus.EXTRACTED)
+    return extracted
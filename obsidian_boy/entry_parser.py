@@ -0,0 +1,74 @@
+import re
+from typing import List, Optional
+from .note_parser import NoteSection, inline_tags
+from .types import DailyNoteEntry
+
+# A Markdown link on its own line. Obsidian's web clipper sometimes drops the
+# closing parenthesis, so it is optional.
+_LINK_LINE_PATTERN = re.compile(r"^\[([^\]]*)\]\((\S+?)\)?$")
+_URL_LINE_PATTERN = re.compile(r"^https?://\S+$")
+_TODO_LINE_PATTERN = re.compile(r"^[-*] \[ \] (.+)$")
+_TAG_TOKEN_PATTERN = re.compile(r"^#[\w\-/]+$")
+# Lines starting with Markdown syntax or containing links are left to the LLM
+_STRUCTURED_LINE_PATTERN = re.compile(r"^([-*+>|!\[#]|\d+\.\s)|https?://|\]\(")
+
+
+def _is_tag_line(line: str) -> bool:
+    tokens = line.split()
+    return bool(tokens) and all(_TAG_TOKEN_PATTERN.match(token) for token in tokens)
+
+
+def parse_section(section: NoteSection) -> Optional[List[DailyNoteEntry]]:
+    """
+    Parse a daily note section without an LLM if it is well-formed.
+
+    A well-formed section has a heading (the title) followed by at most one
+    link line, at most one plain description line, any number of lines of
+    only ``#tags`` and at most one ``- [ ]`` todo without tags.
+    Sections without body lines hold no entry, even if they have a heading.
+
+    Args:
+        section (NoteSection): The section to parse.
+
+    Returns:
+        Optional[List[DailyNoteEntry]]: The entry of the section, an empty
+            list if the section holds no content, or None if the section is
+            ambiguous and needs the LLM.
+    """
+    lines = [line.strip() for line in section.text.split("\n")]
+    if section.heading is not None:
+        lines = lines[1:]
+    lines = [line for line in lines if line]
+    if not lines:
+        # Headings without a body, like a template's date heading or a
+        # grouping heading, are not entries
+        return []
+    if not section.heading:
+        return None
+
+    link = description = todo = None
+    tags: List[str] = []
+    for line in lines:
+        link_match = _LINK_LINE_PATTERN.match(line)
+        todo_match = _TODO_LINE_PATTERN.match(line)
+        if link_match or _URL_LINE_PATTERN.match(line):
+            if link is not None:
+                return None
+            link = link_match.group(2) if link_match else line
+        elif _is_tag_line(line):
+            tags.extend(inline_tags(line))
+        elif todo_match:
+            if todo is not None or "#" in todo_match.group(1):
+                return None
+            todo = todo_match.group(1).strip()
+        elif _STRUCTURED_LINE_PATTERN.search(line) or description is not None:
+            return None
+        else:
+            description = line
+    return [DailyNoteEntry(
+        title=section.heading,
+        link=link,
+        description=description,
+        tags=list(dict.fromkeys(tags)),
+        todo=todo,
+    )]
@@ -0,0 +1,143 @@
+import hashlib
+import itertools
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import List, Optional, Type
+from langchain.chat_models.base import BaseChatModel
+from pydantic import BaseModel
+from .cache_stats import CacheStats
+from .rate_limiter import provider_name
+from .types import DailyNoteEntry
+
+
+def model_identity(llm: BaseChatModel) -> str:
+    """
+    Describe a chat model by its provider and identifying parameters.
+
+    Args:
+        llm (BaseChatModel): The chat model.
+
+    Returns:
+        str: A stable description of the model, e.g. its provider, model name
+            and temperature.
+    """
+    params = getattr(llm, "_identifying_params", None)
+    if not isinstance(params, dict):
+        params = {}
+    return json.dumps({"provider": provider_name(llm), **params}, sort_keys=True, default=str)
+
+
+def extraction_cache_key(content: str, prompt_template: str, model: str, schema: Type[BaseModel]) -> str:
+    """
+    Compute the content address of an extraction.
+
+    Args:
+        content (str): The note content sent to the LLM.
+        prompt_template (str): The prompt template the content is embedded in.
+        model (str): The model identity, see ``model_identity``.
+        schema (Type[BaseModel]): The structured output schema.
+
+    Returns:
+        str: The hex SHA-256 digest over all inputs.
+    """
+    payload = json.dumps(
+        [content, prompt_template, model, schema.model_json_schema()],
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ExtractionCache:
+    """
+    Persistent LRU cache of extracted daily note entries.
+
+    Entries are stored in SQLite under a content address (see
+    ``extraction_cache_key``), so unchanged content is never sent to the LLM
+    twice. The least recently used results are evicted beyond ``max_entries``.
+    """
+
+    def __init__(self, path: Path, max_entries: int = 10_000):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS extractions ("
+            "key TEXT PRIMARY KEY, entries TEXT NOT NULL, last_used INTEGER NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS extractions_last_used ON extractions (last_used)")
+        self._db.commit()
+        # A logical clock orders uses exactly, even within the same instant
+        last_used = self._db.execute("SELECT MAX(last_used) FROM extractions").fetchone()[0]
+        self._ticks = itertools.count((last_used or 0) + 1)
+
+    def get(self, key: str) -> Optional[List[DailyNoteEntry]]:
+        """
+        Look up cached entries and mark them as recently used.
+
+        Args:
+            key (str): The content address of the extraction.
+
+        Returns:
+            Optional[List[DailyNoteEntry]]: The cached entries, or None on a miss.
+        """
+        with self._lock:
+            row = self._db.execute("SELECT entries FROM extractions WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.stats.misses += 1
+                return None
+            self._db.execute("UPDATE extractions SET last_used = ? WHERE key = ?", (next(self._ticks), key))
+            self._db.commit()
+            self.stats.hits += 1
+        return [DailyNoteEntry.model_validate(entry) for entry in json.loads(row[0])]
+
+    def put(self, key: str, entries: List[DailyNoteEntry]) -> None:
+        """
+        Store extracted entries, evicting the least recently used ones if full.
+
+        Args:
+            key (str): The content address of the extraction.
+            entries (List[DailyNoteEntry]): The extracted entries.
+        """
+        data = json.dumps([entry.model_dump() for entry in entries], ensure_ascii=False)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO extractions (key, entries, last_used) VALUES (?, ?, ?)",
+                (key, data, next(self._ticks)),
+            )
+            excess = self._count() - self.max_entries
+            if excess > 0:
+                self._db.execute(
+                    "DELETE FROM extractions WHERE key IN "
+                    "(SELECT key FROM extractions ORDER BY last_used LIMIT ?)",
+                    (excess,),
+                )
+                self.stats.evictions += excess
+            self._db.commit()
+
+    def clear(self) -> None:
+        """
+        Remove all cached entries.
+        """
+        with self._lock:
+            self._db.execute("DELETE FROM extractions")
+            self._db.commit()
+
+    def close(self) -> None:
+        """
+        Close the underlying database.
+        """
+        with self._lock:
+            self._db.close()
+
+    def _count(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM extractions").fetchone()[0]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._count()
@@ -0,0 +1,200 @@
+import itertools
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from .cache_stats import CacheStats
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str:
+    """
+    Normalize a URL so that equivalent spellings share a cache entry.
+
+    The scheme and host are lowercased, default ports and fragments are
+    dropped, query parameters are sorted and an empty path becomes ``/``.
+
+    Args:
+        url (str): The URL.
+
+    Returns:
+        str: The normalized URL.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, parts.path or "/", query, ""))
+
+
+@dataclass
+class CachedResponse:
+    """A cached response body with its validators."""
+    url: str
+    body: bytes
+    encoding: Optional[str]
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+
+    @property
+    def text(self) -> str:
+        """The body decoded with the stored encoding."""
+        return self.body.decode(self.encoding or "utf-8", errors="replace")
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """
+        Build the headers for revalidating this response.
+
+        Returns:
+            Dict[str, str]: ``If-None-Match`` and/or ``If-Modified-Since``.
+        """
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class HttpCache:
+    """
+    Persistent cache of scraped HTTP responses.
+
+    Responses are stored in SQLite under their normalized URL together with
+    their ETag and Last-Modified validators. A response younger than its TTL
+    is served without a request; an older one is revalidated with a
+    conditional request. The least recently used responses are evicted once
+    the stored bodies exceed ``max_bytes``.
+    """
+
+    def __init__(self, path: Path, ttl: float = 24 * 3600, host_ttls: Optional[Dict[str, float]] = None,
+                 max_bytes: int = 256 * 1024 * 1024, clock: Callable[[], float] = time.time):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.host_ttls = dict(host_ttls or {})
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "url TEXT PRIMARY KEY, body BLOB NOT NULL, encoding TEXT, etag TEXT, last_modified TEXT, "
+            "fetched_at REAL NOT NULL, size INTEGER NOT NULL, last_used INTEGER NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        self._db.commit()
+        # A logical clock orders uses exactly, even within the same instant
+        last_used = self._db.execute("SELECT MAX(last_used) FROM responses").fetchone()[0]
+        self._ticks = itertools.count((last_used or 0) + 1)
+
+    def ttl_for(self, url: str) -> float:
+        """
+        Get the time to live of responses from a URL's host.
+
+        Args:
+            url (str): The URL.
+
+        Returns:
+            float: The TTL in seconds.
+        """
+        return self.host_ttls.get((urlsplit(url).hostname or "").lower(), self.ttl)
+
+    def is_fresh(self, response: CachedResponse) -> bool:
+        """
+        Check whether a cached response may be used without revalidation.
+
+        Args:
+            response (CachedResponse): The cached response.
+
+        Returns:
+            bool: True if the response is younger than its TTL.
+        """
+        return self._clock() - response.fetched_at < self.ttl_for(response.url)
+
+    def get(self, url: str) -> Optional[CachedResponse]:
+        """
+        Look up the cached response of a URL and mark it as recently used.
+
+        Args:
+            url (str): The URL.
+
+        Returns:
+            Optional[CachedResponse]: The cached response, or None on a miss.
+        """
+        key = normalize_url(url)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT body, encoding, etag, last_modified, fetched_at FROM responses WHERE url = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.stats.misses += 1
+                return None
+            self._db.execute("UPDATE responses SET last_used = ? WHERE url = ?", (next(self._ticks), key))
+            self._db.commit()
+            self.stats.hits += 1
+        return CachedResponse(key, *row)
+
+    def put(self, url: str, body: bytes, encoding: Optional[str] = None,
+            etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        """
+        Store a response, evicting the least recently used ones if full.
+
+        Args:
+            url (str): The URL.
+            body (bytes): The response body.
+            encoding (Optional[str]): The character encoding of the body.
+            etag (Optional[str]): The ETag response header.
+            last_modified (Optional[str]): The Last-Modified response header.
+        """
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(url, body, encoding, etag, last_modified, fetched_at, size, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (normalize_url(url), body, encoding, etag, last_modified, self._clock(), len(body), next(self._ticks)),
+            )
+            self._evict()
+            self._db.commit()
+
+    def touch(self, url: str) -> None:
+        """
+        Mark a cached response as revalidated, e.g. after a 304 response.
+
+        Args:
+            url (str): The URL.
+        """
+        with self._lock:
+            self._db.execute(
+                "UPDATE responses SET fetched_at = ? WHERE url = ?", (self._clock(), normalize_url(url))
+            )
+            self._db.commit()
+
+    def _evict(self) -> None:
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._db.execute("SELECT url, size FROM responses ORDER BY last_used").fetchall()
+        for url, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM responses WHERE url = ?", (url,))
+            total -= size
+            self.stats.evictions += 1
+
+    def close(self) -> None:
+        """
+        Close the underlying database.
+        """
+        with self._lock:
+            self._db.close()
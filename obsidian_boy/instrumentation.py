@@ -0,0 +1,310 @@
+import functools
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+@dataclass
+class Histogram:
+    """
+    Distribution of observed values.
+
+    Count, sum, minimum and maximum are exact. Percentiles are computed
+    from a uniform reservoir sample of at most ``MAX_SAMPLES`` values.
+    """
+    MAX_SAMPLES = 2048
+
+    count: int = 0
+    total: float = 0.0
+    minimum: float = float("inf")
+    maximum: float = float("-inf")
+    samples: List[float] = field(default_factory=list)
+    _random: random.Random = field(default_factory=lambda: random.Random(0), repr=False)
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+        if len(self.samples) < self.MAX_SAMPLES:
+            self.samples.append(value)
+        else:
+            slot = self._random.randrange(self.count)
+            if slot < self.MAX_SAMPLES:
+                self.samples[slot] = value
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, p: float) -> float:
+        """
+        Estimate a percentile.
+
+        Args:
+            p (float): The percentile, between 0 and 100.
+
+        Returns:
+            float: The estimated value, or 0.0 without observations.
+        """
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+class _NoopSpan:
+    """Span returned while instrumentation is disabled."""
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        pass
+
+    def set(self, **attributes: Any) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    """A timed pipeline stage, recorded as a latency histogram and optionally as an OpenTelemetry span."""
+    __slots__ = ("recorder", "name", "attributes", "_start", "_otel", "_otel_span")
+
+    def __init__(self, recorder: "Recorder", name: str, attributes: Dict[str, Any]):
+        self.recorder = recorder
+        self.name = name
+        self.attributes = attributes
+        self._otel = None
+        self._otel_span = None
+
+    def __enter__(self) -> "Span":
+        if self.recorder.tracer is not None:
+            # A copy, as attributes set later are sent with set_attributes
+            self._otel = self.recorder.tracer.start_as_current_span(self.name, attributes=dict(self.attributes))
+            self._otel_span = self._otel.__enter__()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        elapsed = time.perf_counter() - self._start
+        self.recorder.observe(self.name, elapsed)
+        if exc_info[0] is not None:
+            self.recorder.count(f"{self.name}.errors")
+        if self._otel is not None:
+            self._otel.__exit__(*exc_info)
+
+    def set(self, **attributes: Any) -> None:
+        """
+        Add attributes to the span, e.g. sizes known only at the end.
+
+        Args:
+            **attributes: The attributes.
+        """
+        self.attributes.update(attributes)
+        if self._otel_span is not None:
+            self._otel_span.set_attributes(attributes)
+
+
+class Recorder:
+    """
+    Collects the spans, counters and histograms of one run.
+
+    If OpenTelemetry is installed and a tracer provider has been configured,
+    e.g. by Phoenix, spans and counters are exported to it as well.
+    """
+
+    def __init__(self, export: Optional[bool] = None):
+        self.counters: Dict[str, float] = {}
+        self.histograms: Dict[str, Histogram] = {}
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        self.tracer = None
+        self._meter = None
+        self._otel_counters: Dict[str, Any] = {}
+        # Imported here rather than at module level, so commands that don't
+        # record anything start without loading OpenTelemetry
+        try:
+            from opentelemetry import metrics, trace
+        except ImportError:  # OpenTelemetry is optional, the local summary always works
+            return
+        if export is None:
+            export = not isinstance(trace.get_tracer_provider(), trace.ProxyTracerProvider)
+        if export:
+            self.tracer = trace.get_tracer("obsidian_boy")
+            self._meter = metrics.get_meter("obsidian_boy")
+
+    @property
+    def exporting(self) -> bool:
+        """Whether spans are exported to OpenTelemetry."""
+        return self.tracer is not None
+
+    def count(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+            if self._meter is not None:
+                if name not in self._otel_counters:
+                    self._otel_counters[name] = self._meter.create_counter(name)
+                self._otel_counters[name].add(value)
+
+    def observe(self, name: str, value: float) -> None:
+        with self._lock:
+            if name not in self.histograms:
+                self.histograms[name] = Histogram()
+            self.histograms[name].add(value)
+
+    def format_summary(self) -> str:
+        """
+        Format the recorded timings and counters as a table.
+
+        Returns:
+            str: The per-run performance report.
+        """
+        with self._lock:
+            histograms = sorted(self.histograms.items())
+            counters = sorted(self.counters.items())
+        lines = [
+            f"Run time: {time.perf_counter() - self.started:.2f}s",
+            f"{'stage':<32} {'count':>7} {'total ms':>10} {'mean ms':>9} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}",
+        ]
+        for name, histogram in histograms:
+            lines.append(
+                f"{name:<32} {histogram.count:>7} {histogram.total * 1000:>10.1f} {histogram.mean * 1000:>9.2f} "
+                f"{histogram.percentile(50) * 1000:>8.2f} {histogram.percentile(95) * 1000:>8.2f} "
+                f"{histogram.maximum * 1000:>8.2f}"
+            )
+        if counters:
+            lines.append(f"{'counter':<32} {'value':>7}")
+            lines += [f"{name:<32} {value:>7g}" for name, value in counters]
+        return "\n".join(lines)
+
+
+_recorder: Optional[Recorder] = None
+
+
+def enable(export: Optional[bool] = None) -> Recorder:
+    """
+    Start recording with a fresh recorder.
+
+    Args:
+        export (Optional[bool]): Whether to export to OpenTelemetry. By default
+            spans are exported if a tracer provider has been configured.
+
+    Returns:
+        Recorder: The active recorder.
+    """
+    global _recorder
+    _recorder = Recorder(export)
+    return _recorder
+
+
+def disable() -> None:
+    """
+    Stop recording. Instrumented code then runs without overhead.
+    """
+    global _recorder
+    _recorder = None
+
+
+def get_recorder() -> Optional[Recorder]:
+    """
+    Get the active recorder.
+
+    Returns:
+        Optional[Recorder]: The recorder, or None if instrumentation is disabled.
+    """
+    return _recorder
+
+
+def span(name: str, **attributes: Any):
+    """
+    Time a pipeline stage.
+
+    Use as ``with span("scrape.fetch", url=url): ...``. While instrumentation
+    is disabled a shared no-op span is returned.
+
+    Args:
+        name (str): The stage name.
+        **attributes: Attributes of the span.
+
+    Returns:
+        The span context manager.
+    """
+    recorder = _recorder
+    if recorder is None:
+        return _NOOP_SPAN
+    return Span(recorder, name, attributes)
+
+
+def count(name: str, value: float = 1) -> None:
+    """
+    Increment a counter, e.g. of bytes, tokens, cache hits or retries.
+
+    Args:
+        name (str): The counter name.
+        value (float): The increment.
+    """
+    recorder = _recorder
+    if recorder is not None:
+        recorder.count(name, value)
+
+
+def observe(name: str, value: float) -> None:
+    """
+    Add a value to a histogram.
+
+    Args:
+        name (str): The histogram name.
+        value (float): The observed value.
+    """
+    recorder = _recorder
+    if recorder is not None:
+        recorder.observe(name, value)
+
+
+def timed(name: str) -> Callable[[F], F]:
+    """
+    Decorate a function to run in a span.
+
+    Args:
+        name (str): The stage name.
+
+    Returns:
+        Callable[[F], F]: The decorator.
+    """
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if _recorder is None:
+                return func(*args, **kwargs)
+            with Span(_recorder, name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def report(logger: Optional[logging.Logger] = None) -> None:
+    """
+    Print the summary of the active recorder.
+
+    The summary is printed even when spans are exported, since a registered
+    tracer provider does not mean a collector is receiving them.
+
+    Args:
+        logger (Optional[logging.Logger]): Log the summary instead of printing it.
+    """
+    recorder = _recorder
+    if recorder is None:
+        return
+    if logger is not None:
+        logger.info(recorder.format_summary())
+    else:
+        print(recorder.format_summary())
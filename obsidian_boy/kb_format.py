@@ -0,0 +1,105 @@
+import json
+import struct
+import zlib
+from typing import List, Optional
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional, zlib is always available
+    zstandard = None
+
+# Binary entry layout: magic, format version, codec id, then the payload
+MAGIC = b"OBKB"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct(">4sBB")
+
+CODECS = {"none": 0, "zlib": 1, "zstd": 2}
+_CODEC_NAMES = {codec_id: name for name, codec_id in CODECS.items()}
+
+
+def available_codecs() -> List[str]:
+    """
+    List the codecs usable in this environment.
+
+    Returns:
+        List[str]: The codec names; ``zstd`` only if zstandard is installed.
+    """
+    return [name for name in CODECS if name != "zstd" or zstandard is not None]
+
+
+def _require_codec(codec: str) -> None:
+    if codec not in CODECS:
+        raise ValueError(f"Unknown codec {codec!r}, expected one of {sorted(CODECS)}")
+    if codec == "zstd" and zstandard is None:
+        raise ValueError("The zstd codec needs the zstandard package")
+
+
+def encode_entry(content: str, codec: str = "zlib") -> bytes:
+    """
+    Serialize content into the binary entry format.
+
+    Args:
+        content (str): The content.
+        codec (str): The compression codec, one of ``none``, ``zlib`` or ``zstd``.
+
+    Returns:
+        bytes: The serialized entry.
+
+    Raises:
+        ValueError: If the codec is unknown or not installed.
+    """
+    _require_codec(codec)
+    payload = content.encode("utf-8")
+    if codec == "zlib":
+        payload = zlib.compress(payload, 6)
+    elif codec == "zstd":
+        payload = zstandard.ZstdCompressor(level=10).compress(payload)
+    return _HEADER.pack(MAGIC, FORMAT_VERSION, CODECS[codec]) + payload
+
+
+def codec_of(data: bytes) -> Optional[str]:
+    """
+    Get the codec of a serialized entry.
+
+    Args:
+        data (bytes): The serialized entry, or at least its header.
+
+    Returns:
+        Optional[str]: The codec name, or None for legacy JSON entries.
+    """
+    if not data.startswith(MAGIC):
+        return None
+    return _CODEC_NAMES.get(_HEADER.unpack_from(data)[2])
+
+
+def decode_entry(data: bytes) -> str:
+    """
+    Deserialize an entry in the binary format or the legacy JSON format.
+
+    Args:
+        data (bytes): The serialized entry.
+
+    Returns:
+        str: The content.
+
+    Raises:
+        ValueError: If the data is in an unknown format, version or codec.
+    """
+    if not data.startswith(MAGIC):
+        try:
+            return json.loads(data.decode("utf-8"))["content"]
+        except (UnicodeDecodeError, json.JSONDecodeError, KeyError, TypeError) as e:
+            raise ValueError(f"Unrecognized knowledge base entry: {e}") from e
+    _, version, codec_id = _HEADER.unpack_from(data)
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported knowledge base entry version {version}")
+    codec = _CODEC_NAMES.get(codec_id)
+    if codec is None:
+        raise ValueError(f"Unknown knowledge base entry codec id {codec_id}")
+    _require_codec(codec)
+    payload = data[_HEADER.size:]
+    if codec == "zlib":
+        payload = zlib.decompress(payload)
+    elif codec == "zstd":
+        payload = zstandard.ZstdDecompressor().decompress(payload)
+    return payload.decode("utf-8")
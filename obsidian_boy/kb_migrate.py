@@ -0,0 +1,31 @@
+"""
+Migrate a file system knowledge base to another entry format.
+
+Usage:
+    python -m obsidian_boy.kb_migrate PATH [--codec {json,none,zlib,zstd}]
+"""
+import argparse
+import sys
+from typing import List, Optional
+from .kb_format import CODECS
+from .knowledge_base import FileSystemKnowledgeBase
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Rewrite knowledge base entries in another format.")
+    parser.add_argument("path", help="The knowledge base directory")
+    parser.add_argument("--codec", default="zlib", choices=["json", *CODECS],
+                        help="The target codec, or json for the legacy format (default: zlib)")
+    args = parser.parse_args(argv)
+    try:
+        knowledge_base = FileSystemKnowledgeBase(args.path, codec=None if args.codec == "json" else args.codec)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    migrated = knowledge_base.migrate()
+    print(f"Migrated {migrated} entries in {args.path} to {args.codec}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
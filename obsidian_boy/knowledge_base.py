@@ -1,6 +1,26 @@
 from abc import ABC, abstractmethod
 from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import hashlib
 import json
+import os
+import sqlite3
+import threading
+import time
+from .instrumentation import timed
+from .kb_format import codec_of, decode_entry, encode_entry
+
+def content_version(content: str) -> str:
+    """
+    Get a version of content from its hash.
+
+    Args:
+        content (str): The content.
+
+    Returns:
+        str: A digest that changes whenever the content does.
+    """
+    return hashlib.blake2b(content.encode("utf-8"), digest_size=16).hexdigest()
 
 class KnowledgeBase(ABC):
     @abstractmethod
@@ -30,11 +50,91 @@ class KnowledgeBase(ABC):
         """
         pass
 
+    def keys(self) -> Iterator[str]:
+        """
+        Enumerate the keys stored in the knowledge base.
+
+        Returns:
+            Iterator[str]: The stored keys, in no particular order.
+
+        Raises:
+            NotImplementedError: If the knowledge base cannot enumerate its keys.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support enumerating its keys")
+
+    def store_many(self, items: Dict[str, str]) -> None:
+        """
+        Store several entries in the knowledge base.
+
+        Args:
+            items (Dict[str, str]): The content to be stored by key.
+        """
+        for key, content in items.items():
+            self.store(key, content)
+
+    def retrieve_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        """
+        Retrieve several entries from the knowledge base.
+
+        Args:
+            keys (Iterable[str]): The keys to look up.
+
+        Returns:
+            Dict[str, str]: The content of every key that was found. Missing
+                keys are left out.
+        """
+        found = {}
+        for key in keys:
+            try:
+                found[key] = self.retrieve(key)
+            except KeyError:
+                pass
+        return found
+
+    def versions(self, keys: Iterable[str]) -> Dict[str, str]:
+        """
+        Get a version of several entries that changes whenever their content does.
+
+        The default hashes the content. Knowledge bases that can tell cheaper
+        override it, so derived data like a search index can be checked for
+        staleness without reading every entry.
+
+        Args:
+            keys (Iterable[str]): The keys to look up.
+
+        Returns:
+            Dict[str, str]: The version of every key that was found.
+        """
+        return {key: content_version(content) for key, content in self.retrieve_many(keys).items()}
+
 class FileSystemKnowledgeBase(KnowledgeBase):
-    def __init__(self, base_path: str):
+    """
+    Knowledge base with one file per entry.
+
+    Entries are written as ``{key}.json`` by default, or as compressed
+    ``{key}.obkb`` files in the binary entry format when a ``codec`` is
+    given. Both formats are always readable, so a knowledge base can be
+    switched to a codec and migrated gradually or with ``migrate()``.
+    """
+
+    JSON_SUFFIX = ".json"
+    BINARY_SUFFIX = ".obkb"
+
+    def __init__(self, base_path: str, codec: Optional[str] = None):
         self.base_path = Path(base_path)
         self.base_path.mkdir(parents=True, exist_ok=True)
+        if codec is not None:
+            # Fail early on unknown or uninstalled codecs
+            encode_entry("", codec)
+        self.codec = codec
+
+    def _paths(self, key: str) -> Tuple[Path, Path]:
+        """The path entries are written to and the path of the other format."""
+        json_path = self.base_path / f"{key}{self.JSON_SUFFIX}"
+        binary_path = self.base_path / f"{key}{self.BINARY_SUFFIX}"
+        return (binary_path, json_path) if self.codec else (json_path, binary_path)
 
+    @timed("kb.filesystem.store")
     def store(self, key: str, content: str) -> None:
         """
         Store content in the file system.
@@ -43,11 +143,18 @@ class FileSystemKnowledgeBase(KnowledgeBase):
             key (str): The unique identifier for the content.
             content (str): The content to be stored.
         """
-        file_path = self.base_path / f"{key}.json"
-        data = {"key": key, "content": content}
-        with file_path.open("w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        file_path, other_path = self._paths(key)
+        if self.codec:
+            tmp_path = file_path.with_name(file_path.name + ".tmp")
+            tmp_path.write_bytes(encode_entry(content, self.codec))
+            os.replace(tmp_path, file_path)
+        else:
+            data = {"key": key, "content": content}
+            with file_path.open("w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+        other_path.unlink(missing_ok=True)
 
+    @timed("kb.filesystem.retrieve")
     def retrieve(self, key: str) -> str:
         """
         Retrieve content from the file system.
@@ -61,10 +168,234 @@ class FileSystemKnowledgeBase(KnowledgeBase):
         Raises:
             KeyError: If the key is not found in the knowledge base.
         """
-        file_path = self.base_path / f"{key}.json"
-        if not file_path.exists():
+        for file_path in self._paths(key):
+            try:
+                data = file_path.read_bytes()
+            except FileNotFoundError:
+                continue
+            return decode_entry(data)
+        raise KeyError(f"No content found for key: {key}")
+
+    def keys(self) -> Iterator[str]:
+        """
+        Enumerate the keys stored in the file system.
+
+        Returns:
+            Iterator[str]: The stored keys, in no particular order.
+        """
+        seen = set()
+        for path in self.base_path.iterdir():
+            if path.suffix in (self.JSON_SUFFIX, self.BINARY_SUFFIX) and path.stem not in seen:
+                seen.add(path.stem)
+                yield path.stem
+
+    def versions(self, keys: Iterable[str]) -> Dict[str, str]:
+        """
+        Get the versions of several entries from their files' modification times and sizes.
+
+        Args:
+            keys (Iterable[str]): The keys to look up.
+
+        Returns:
+            Dict[str, str]: The version of every key that was found.
+        """
+        found = {}
+        for key in keys:
+            for file_path in self._paths(key):
+                try:
+                    stat = file_path.stat()
+                except FileNotFoundError:
+                    continue
+                found[key] = f"{file_path.suffix}:{stat.st_mtime_ns}:{stat.st_size}"
+                break
+        return found
+
+    def migrate(self) -> int:
+        """
+        Rewrite every entry that is not stored in this knowledge base's
+        format and codec.
+
+        Returns:
+            int: The number of migrated entries.
+        """
+        migrated = 0
+        for key in list(self.keys()):
+            file_path, other_path = self._paths(key)
+            if file_path.exists() and (not self.codec or codec_of(file_path.read_bytes()) == self.codec):
+                continue
+            source = file_path if file_path.exists() else other_path
+            self.store(key, decode_entry(source.read_bytes()))
+            migrated += 1
+        return migrated
+
+class SQLiteKnowledgeBase(KnowledgeBase):
+    """
+    Knowledge base stored in hash-sharded SQLite databases.
+
+    Each key is assigned to one of ``shards`` database files by a hash of the
+    key, which keeps every B-tree small and lets shards be written
+    independently. Lookups are primary-key reads, and the batch operations
+    touch every shard once.
+    """
+
+    BATCH_SIZE = 500
+
+    def __init__(self, base_path: str, shards: int = 16):
+        self.base_path = Path(base_path)
+        self.base_path.mkdir(parents=True, exist_ok=True)
+        self.shards = self._check_layout(shards)
+        self._connections = [self._connect(self.base_path / f"shard-{i:03d}.sqlite") for i in range(shards)]
+        self._locks = [threading.Lock() for _ in range(shards)]
+
+    def _check_layout(self, shards: int) -> int:
+        layout_path = self.base_path / "layout.json"
+        if layout_path.exists():
+            stored = json.loads(layout_path.read_text(encoding="utf-8"))["shards"]
+            if stored != shards:
+                raise ValueError(f"{self.base_path} was created with {stored} shards, not {shards}")
+        else:
+            layout_path.write_text(json.dumps({"shards": shards}), encoding="utf-8")
+        return shards
+
+    @staticmethod
+    def _connect(path: Path) -> sqlite3.Connection:
+        connection = sqlite3.connect(path, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, content TEXT NOT NULL,"
+            " version INTEGER NOT NULL DEFAULT 0) WITHOUT ROWID"
+        )
+        columns = [row[1] for row in connection.execute("PRAGMA table_info(entries)")]
+        if "version" not in columns:
+            # Shards created before entries were versioned
+            connection.execute("ALTER TABLE entries ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        connection.commit()
+        return connection
+
+    def _shard(self, key: str) -> int:
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "big") % self.shards
+
+    def _group(self, keys: Iterable[str]) -> Dict[int, List[str]]:
+        groups: Dict[int, List[str]] = {}
+        for key in keys:
+            groups.setdefault(self._shard(key), []).append(key)
+        return groups
+
+    def store(self, key: str, content: str) -> None:
+        """
+        Store content in its shard.
+
+        Args:
+            key (str): The unique identifier for the content.
+            content (str): The content to be stored.
+        """
+        self.store_many({key: content})
+
+    @timed("kb.sqlite.store_many")
+    def store_many(self, items: Dict[str, str]) -> None:
+        """
+        Store several entries with one transaction per shard.
+
+        Args:
+            items (Dict[str, str]): The content to be stored by key.
+        """
+        version = time.time_ns()
+        for shard, keys in self._group(items).items():
+            with self._locks[shard]:
+                connection = self._connections[shard]
+                with connection:
+                    connection.executemany(
+                        "INSERT OR REPLACE INTO entries (key, content, version) VALUES (?, ?, ?)",
+                        [(key, items[key], version) for key in keys],
+                    )
+
+    def retrieve(self, key: str) -> str:
+        """
+        Retrieve content from its shard.
+
+        Args:
+            key (str): The unique identifier for the content.
+
+        Returns:
+            str: The retrieved content.
+
+        Raises:
+            KeyError: If the key is not found in the knowledge base.
+        """
+        found = self.retrieve_many([key])
+        if key not in found:
             raise KeyError(f"No content found for key: {key}")
-        
-        with file_path.open("r", encoding="utf-8") as f:
-            data = json.load(f)
-        return data["content"]
+        return found[key]
+
+    @timed("kb.sqlite.retrieve_many")
+    def retrieve_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        """
+        Retrieve several entries with batched reads per shard.
+
+        Args:
+            keys (Iterable[str]): The keys to look up.
+
+        Returns:
+            Dict[str, str]: The content of every key that was found. Missing
+                keys are left out.
+        """
+        found = {}
+        for shard, shard_keys in self._group(dict.fromkeys(keys)).items():
+            with self._locks[shard]:
+                for start in range(0, len(shard_keys), self.BATCH_SIZE):
+                    batch = shard_keys[start:start + self.BATCH_SIZE]
+                    placeholders = ",".join("?" * len(batch))
+                    found.update(self._connections[shard].execute(
+                        f"SELECT key, content FROM entries WHERE key IN ({placeholders})", batch
+                    ))
+        return found
+
+    def versions(self, keys: Iterable[str]) -> Dict[str, str]:
+        """
+        Get the versions of several entries without reading their content.
+
+        Args:
+            keys (Iterable[str]): The keys to look up.
+
+        Returns:
+            Dict[str, str]: The version of every key that was found.
+        """
+        found = {}
+        for shard, shard_keys in self._group(dict.fromkeys(keys)).items():
+            with self._locks[shard]:
+                for start in range(0, len(shard_keys), self.BATCH_SIZE):
+                    batch = shard_keys[start:start + self.BATCH_SIZE]
+                    placeholders = ",".join("?" * len(batch))
+                    found.update((key, str(version)) for key, version in self._connections[shard].execute(
+                        f"SELECT key, version FROM entries WHERE key IN ({placeholders})", batch
+                    ))
+        return found
+
+    def keys(self) -> Iterator[str]:
+        """
+        Enumerate the keys of all shards.
+
+        Returns:
+            Iterator[str]: The stored keys, in no particular order.
+        """
+        for shard, connection in enumerate(self._connections):
+            with self._locks[shard]:
+                keys = [row[0] for row in connection.execute("SELECT key FROM entries")]
+            yield from keys
+
+    def __len__(self) -> int:
+        total = 0
+        for shard, connection in enumerate(self._connections):
+            with self._locks[shard]:
+                total += connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return total
+
+    def close(self) -> None:
+        """
+        Close all shard databases.
+        """
+        for shard, connection in enumerate(self._connections):
+            with self._locks[shard]:
+                connection.close()
@@ -0,0 +1,383 @@
+import logging
+import random
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Type, TypeVar
+from pydantic import BaseModel
+from .instrumentation import Histogram, count, observe, span
+from .rate_limiter import RateLimiterRegistry, provider_name
+
+ResponseT = TypeVar("ResponseT", bound=BaseModel)
+
+# Status codes worth retrying: timeouts, conflicts, rate limits, server errors and overload
+RETRYABLE_STATUS_CODES = {408, 409, 425, 429, 500, 502, 503, 504, 529}
+# Exception names of the provider SDKs for failures without a status code,
+# e.g. openai.APITimeoutError, APIConnectionError and RateLimitError
+_RETRYABLE_ERROR_MARKERS = ("Timeout", "Connection", "RateLimit", "Overloaded")
+_DURATION_PATTERN = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+class LLMCallError(RuntimeError):
+    """Raised when a request failed at every provider of the fallback chain."""
+
+    def __init__(self, errors: Dict[str, Exception]):
+        self.errors = errors
+        details = "; ".join(f"{provider}: {error}" for provider, error in errors.items())
+        super().__init__(f"LLM request failed at all providers ({details})")
+
+
+def status_code(error: Exception) -> Optional[int]:
+    """
+    Get the HTTP status code of a provider error.
+
+    Args:
+        error (Exception): The error raised by the chat model.
+
+    Returns:
+        Optional[int]: The status code, or None if the error has none.
+    """
+    for candidate in (getattr(error, "status_code", None), getattr(getattr(error, "response", None), "status_code", None)):
+        if isinstance(candidate, int):
+            return candidate
+    return None
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Check whether a failed request may succeed when retried.
+
+    Args:
+        error (Exception): The error raised by the chat model.
+
+    Returns:
+        bool: True for timeouts, connection errors, rate limits and server errors.
+    """
+    status = status_code(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    return any(marker in type(error).__name__ for marker in _RETRYABLE_ERROR_MARKERS)
+
+
+def _parse_duration(value: str) -> Optional[float]:
+    """Parse durations like ``1s``, ``6m0s`` or ``20ms`` as used by OpenAI's rate limit headers."""
+    parts = _DURATION_PATTERN.findall(value)
+    if not parts or "".join(number + unit for number, unit in parts) != value.strip():
+        return None
+    return sum(float(number) * _DURATION_UNITS[unit] for number, unit in parts)
+
+
+def retry_after(error: Exception, now: Optional[datetime] = None) -> Optional[float]:
+    """
+    Read how long to wait before retrying from the rate limit headers of an error.
+
+    ``retry-after-ms``, ``retry-after`` (seconds or an HTTP date), OpenAI's
+    ``x-ratelimit-reset-*`` durations and Anthropic's
+    ``anthropic-ratelimit-*-reset`` timestamps are understood.
+
+    Args:
+        error (Exception): The error raised by the chat model.
+        now (Optional[datetime]): The current time, for dates in headers.
+
+    Returns:
+        Optional[float]: The seconds to wait, or None if the headers say nothing.
+    """
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    headers = {str(name).lower(): str(value) for name, value in dict(headers).items()}
+    now = now or datetime.now(timezone.utc)
+    if "retry-after-ms" in headers:
+        try:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+    if "retry-after" in headers:
+        try:
+            return float(headers["retry-after"])
+        except ValueError:
+            try:
+                return (parsedate_to_datetime(headers["retry-after"]) - now).total_seconds()
+            except (TypeError, ValueError):
+                pass
+    waits = []
+    for name in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens"):
+        if name in headers:
+            waits.append(_parse_duration(headers[name]))
+    for name in ("anthropic-ratelimit-requests-reset", "anthropic-ratelimit-tokens-reset"):
+        if name in headers:
+            try:
+                waits.append((datetime.fromisoformat(headers[name].replace("Z", "+00:00")) - now).total_seconds())
+            except ValueError:
+                pass
+    waits = [wait_time for wait_time in waits if wait_time is not None]
+    return max(waits) if waits else None
+
+
+@dataclass
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter.
+
+    A retry waits a random time between zero and ``base_delay * 2**attempt``,
+    capped at ``max_delay``, unless the provider said how long to wait. If it
+    asks for more than ``max_retry_after`` seconds the provider is given up
+    for this request and the next one in the fallback chain is tried.
+    """
+    max_attempts: int = 4
+    base_delay: float = 0.5
+    max_delay: float = 30.0
+    max_retry_after: float = 60.0
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None,
+              rng: Optional[random.Random] = None) -> float:
+        """
+        Compute the wait before a retry.
+
+        Args:
+            attempt (int): The zero-based number of the failed attempt.
+            retry_after (Optional[float]): The wait requested by the provider.
+            rng (Optional[random.Random]): The random number generator for the jitter.
+
+        Returns:
+            float: The seconds to wait.
+        """
+        if retry_after is not None:
+            return max(0.0, retry_after)
+        return (rng or random).uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+def chain_names(models: Sequence[Any]) -> List[str]:
+    """
+    Name the models of a fallback chain for their stats.
+
+    Models are named by their provider (see ``provider_name``). Where a
+    provider occurs more than once the model name is added, and a number
+    if that is not enough either, so every model gets its own stats and
+    cooldown.
+
+    Args:
+        models (Sequence[Any]): The chat models in chain order.
+
+    Returns:
+        List[str]: One unique name per model, e.g. ``openai-chat/gpt-4o``.
+    """
+    providers = [provider_name(model) for model in models]
+    names: List[str] = []
+    for model, provider in zip(models, providers):
+        name = provider
+        if providers.count(provider) > 1:
+            params = getattr(model, "_identifying_params", None)
+            model_name = (params.get("model_name") or params.get("model")) if isinstance(params, dict) else None
+            if model_name:
+                name = f"{provider}/{model_name}"
+        unique, number = name, 2
+        while unique in names:
+            unique = f"{name}#{number}"
+            number += 1
+        names.append(unique)
+    return names
+
+
+@dataclass
+class ProviderStats:
+    """Request outcomes and latencies of one provider."""
+    requests: int = 0
+    errors: int = 0
+    retries: int = 0
+    hedges: int = 0
+    fallbacks: int = 0
+    consecutive_failures: int = 0
+    unavailable_until: float = 0.0
+    latency: Histogram = field(default_factory=Histogram)
+
+
+class LLMCaller:
+    """
+    Sends structured output requests through a fallback chain of chat models.
+
+    Each request goes to the first available model and is retried there on
+    retryable errors (see ``is_retryable``) according to the retry policy,
+    honouring the provider's rate limit headers. If the model still fails,
+    the next model in the chain is tried. A provider that failed
+    ``failure_threshold`` requests in a row is skipped for ``cooldown``
+    seconds, so a provider outage does not cost every request its retries.
+    With ``hedge_after`` a duplicate request is sent when the first one has
+    not answered within that many seconds after its rate limiter let it
+    through, and the first answer wins. No duplicate is sent while the
+    provider's rate limiter has no free slot.
+
+    Per-model request, error, retry, hedge and fallback counts and the
+    latencies are kept in ``stats`` and reported to the instrumentation as
+    ``llm.<name>.*``, named by ``chain_names``. Models of the same provider
+    share its rate limiter but are counted and cooled down separately.
+    """
+
+    def __init__(self, models: Sequence[Any], rate_limiters: Optional[RateLimiterRegistry] = None,
+                 policy: Optional[RetryPolicy] = None, hedge_after: Optional[float] = None,
+                 failure_threshold: int = 5, cooldown: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep,
+                 rng: Optional[random.Random] = None):
+        if not models:
+            raise ValueError("At least one chat model is required.")
+        self.models = list(models)
+        self.rate_limiters = rate_limiters
+        self.policy = policy or RetryPolicy()
+        self.hedge_after = hedge_after
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.names = chain_names(self.models)
+        self.stats: Dict[str, ProviderStats] = {name: ProviderStats() for name in self.names}
+        self.logger = logging.getLogger(__name__)
+        self._clock = clock
+        self._sleep = sleep
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+        self._hedge_executor: Optional[ThreadPoolExecutor] = None
+
+    def invoke(self, prompt: str, schema: Type[ResponseT]) -> ResponseT:
+        """
+        Request structured output for a prompt.
+
+        Args:
+            prompt (str): The prompt.
+            schema (Type[ResponseT]): The structured output schema.
+
+        Returns:
+            ResponseT: The response of the first model that answered.
+
+        Raises:
+            LLMCallError: If every model of the chain failed.
+        """
+        return self.invoke_with_model(prompt, schema)[0]
+
+    def invoke_with_model(self, prompt: str, schema: Type[ResponseT]) -> Tuple[ResponseT, Any]:
+        """
+        Request structured output for a prompt and tell which model answered.
+
+        Args:
+            prompt (str): The prompt.
+            schema (Type[ResponseT]): The structured output schema.
+
+        Returns:
+            Tuple[ResponseT, Any]: The response and the model of the chain that gave it.
+
+        Raises:
+            LLMCallError: If every model of the chain failed.
+        """
+        errors: Dict[str, Exception] = {}
+        available = self._available_models()
+        for position, (provider, llm) in enumerate(available):
+            try:
+                return self._invoke_with_retries(llm, provider, prompt, schema), llm
+            except Exception as e:
+                errors[provider] = e
+                if position < len(available) - 1:
+                    self._count(provider, "fallbacks")
+                    self.logger.warning(f"LLM request failed at {provider}, trying the next provider: {e}")
+        raise LLMCallError(errors)
+
+    def _available_models(self) -> List[Tuple[str, Any]]:
+        """The named models in chain order, with those cooling down after repeated failures moved to the end."""
+        now = self._clock()
+        chain = list(zip(self.names, self.models))
+        with self._lock:
+            cooling = {name for name in self.names if self.stats[name].unavailable_until > now}
+        return [item for item in chain if item[0] not in cooling] + [item for item in chain if item[0] in cooling]
+
+    def _invoke_with_retries(self, llm: Any, provider: str, prompt: str, schema: Type[ResponseT]) -> ResponseT:
+        for attempt in range(self.policy.max_attempts):
+            try:
+                return self._invoke_hedged(llm, provider, prompt, schema)
+            except Exception as e:
+                requested = retry_after(e)
+                if (not is_retryable(e) or attempt + 1 >= self.policy.max_attempts
+                        or (requested is not None and requested > self.policy.max_retry_after)):
+                    raise
+                delay = self.policy.delay(attempt, requested, self._rng)
+                self._count(provider, "retries")
+                self.logger.info(f"Retrying LLM request at {provider} in {delay:.2f}s: {e}")
+                self._sleep(delay)
+        raise AssertionError("unreachable")
+
+    def _invoke_hedged(self, llm: Any, provider: str, prompt: str, schema: Type[ResponseT]) -> ResponseT:
+        limiter = self.rate_limiters.get(provider_name(llm)) if self.rate_limiters else None
+        if limiter is not None:
+            # Waiting for the limiter must not count towards hedge_after
+            with span("llm.rate_limit_wait"):
+                limiter.acquire()
+        if not self.hedge_after:
+            return self._invoke_once(llm, provider, prompt, schema)
+        with self._lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = ThreadPoolExecutor(thread_name_prefix="llm-hedge")
+        first = self._hedge_executor.submit(self._invoke_once, llm, provider, prompt, schema)
+        done, _ = wait([first], timeout=self.hedge_after)
+        if done:
+            return first.result()
+        if limiter is not None and not limiter.try_acquire():
+            # A saturated provider would only queue the duplicate behind other requests
+            return first.result()
+        self._count(provider, "hedges")
+        pending = {first, self._hedge_executor.submit(self._invoke_once, llm, provider, prompt, schema)}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def _invoke_once(self, llm: Any, provider: str, prompt: str, schema: Type[ResponseT]) -> ResponseT:
+        count("llm.requests")
+        self._count(provider, "requests")
+        # Create a structured LLM with the Pydantic model
+        structured_llm = llm.with_structured_output(schema)
+        start = time.perf_counter()
+        try:
+            with span("llm.invoke", schema=schema.__name__, provider=provider):
+                response = structured_llm.invoke(prompt)
+        except Exception:
+            self._record_failure(provider)
+            raise
+        self._record_success(provider, time.perf_counter() - start)
+        return response
+
+    def _count(self, provider: str, name: str) -> None:
+        with self._lock:
+            stats = self.stats[provider]
+            setattr(stats, name, getattr(stats, name) + 1)
+        count(f"llm.{provider}.{name}")
+
+    def _record_success(self, provider: str, elapsed: float) -> None:
+        with self._lock:
+            stats = self.stats[provider]
+            stats.consecutive_failures = 0
+            stats.unavailable_until = 0.0
+            stats.latency.add(elapsed)
+        observe(f"llm.{provider}.latency", elapsed)
+
+    def _record_failure(self, provider: str) -> None:
+        self._count(provider, "errors")
+        with self._lock:
+            stats = self.stats[provider]
+            stats.consecutive_failures += 1
+            if stats.consecutive_failures >= self.failure_threshold:
+                stats.unavailable_until = self._clock() + self.cooldown
+
+    def close(self) -> None:
+        """
+        Shut down the threads used for hedged requests.
+        """
+        with self._lock:
+            executor, self._hedge_executor = self._hedge_executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
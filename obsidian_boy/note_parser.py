@@ -0,0 +1,210 @@
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple, Union
+
+FRONTMATTER_DELIMITER = "---"
+
+# Obsidian tags start at the beginning of a line or after whitespace and may
+# contain letters, digits, underscores, hyphens and slashes for nesting.
+_TAG_PATTERN = re.compile(r"(?:^|(?<=\s))#([\w\-/]+)")
+_CODE_FENCE_PATTERN = re.compile(r"^(```|~~~).*?^\1", re.MULTILINE | re.DOTALL)
+_INLINE_CODE_PATTERN = re.compile(r"`[^`\n]*`")
+_FRONTMATTER_KEY_PATTERN = re.compile(r"^([A-Za-z0-9_\-]+):\s*(.*)$")
+_HEADING_PATTERN = re.compile(r"^#{1,6}\s+(.*?)\s*#*\s*$")
+
+FrontmatterValue = Union[str, List[str]]
+
+
+def split_frontmatter(content: str) -> Tuple[str, str]:
+    """
+    Split a note into its YAML frontmatter block and its body.
+
+    Args:
+        content (str): The raw content of the note.
+
+    Returns:
+        Tuple[str, str]: The frontmatter text (without delimiters) and the body.
+            The frontmatter is empty if the note has none.
+    """
+    if not content.startswith(FRONTMATTER_DELIMITER):
+        return "", content
+    lines = content.split("\n")
+    if lines[0].strip() != FRONTMATTER_DELIMITER:
+        return "", content
+    for i, line in enumerate(lines[1:], 1):
+        if line.strip() == FRONTMATTER_DELIMITER:
+            return "\n".join(lines[1:i]), "\n".join(lines[i + 1:])
+    return "", content
+
+
+def _parse_scalar(value: str) -> str:
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "'\"":
+        return value[1:-1]
+    return value
+
+
+def _parse_inline_list(value: str) -> List[str]:
+    return [item for item in (_parse_scalar(v) for v in value.strip()[1:-1].split(",")) if item]
+
+
+def parse_frontmatter(frontmatter: str) -> Dict[str, FrontmatterValue]:
+    """
+    Parse the top-level keys of a frontmatter block.
+
+    Only the subset of YAML used by Obsidian properties is supported: scalars,
+    inline lists (``[a, b]``) and block lists (``- a``).
+
+    Args:
+        frontmatter (str): The frontmatter text without delimiters.
+
+    Returns:
+        Dict[str, FrontmatterValue]: The parsed keys and their values.
+    """
+    data: Dict[str, FrontmatterValue] = {}
+    current_key = None
+    for line in frontmatter.split("\n"):
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        if stripped.startswith("- ") or stripped == "-":
+            if current_key is not None:
+                items = data.get(current_key)
+                if not isinstance(items, list):
+                    items = []
+                    data[current_key] = items
+                item = _parse_scalar(stripped[1:])
+                if item:
+                    items.append(item)
+            continue
+        match = _FRONTMATTER_KEY_PATTERN.match(line)
+        if not match:
+            continue
+        current_key, value = match.group(1), match.group(2).strip()
+        if value.startswith("[") and value.endswith("]"):
+            data[current_key] = _parse_inline_list(value)
+        else:
+            data[current_key] = _parse_scalar(value)
+    return data
+
+
+def _normalize_tag(tag: str) -> str:
+    return tag.strip().lstrip("#").strip("/")
+
+
+def frontmatter_tags(frontmatter: Dict[str, FrontmatterValue]) -> List[str]:
+    """
+    Extract the tags declared in parsed frontmatter.
+
+    Args:
+        frontmatter (Dict[str, FrontmatterValue]): The parsed frontmatter.
+
+    Returns:
+        List[str]: The tags from the ``tags`` (or legacy ``tag``) property.
+    """
+    value = frontmatter.get("tags", frontmatter.get("tag", []))
+    if isinstance(value, str):
+        value = re.split(r"[,\s]+", value)
+    return [tag for tag in (_normalize_tag(v) for v in value) if tag]
+
+
+def inline_tags(body: str) -> List[str]:
+    """
+    Extract inline ``#tags`` from a note body, ignoring code.
+
+    Args:
+        body (str): The note body without frontmatter.
+
+    Returns:
+        List[str]: The inline tags in order of appearance, including nested
+            tags such as ``a/b``. Purely numeric tags are skipped.
+    """
+    body = _CODE_FENCE_PATTERN.sub("", body)
+    body = _INLINE_CODE_PATTERN.sub("", body)
+    tags = []
+    for match in _TAG_PATTERN.finditer(body):
+        tag = _normalize_tag(match.group(1))
+        if tag and not tag.replace("/", "").isdigit():
+            tags.append(tag)
+    return tags
+
+
+def extract_tags(content: str) -> List[str]:
+    """
+    Extract all unique tags of a note from its frontmatter and body.
+
+    Args:
+        content (str): The raw content of the note.
+
+    Returns:
+        List[str]: The unique tags in order of first appearance.
+    """
+    frontmatter, body = split_frontmatter(content)
+    tags = frontmatter_tags(parse_frontmatter(frontmatter)) + inline_tags(body)
+    return list(dict.fromkeys(tags))
+
+
+_WIKILINK_PATTERN = re.compile(r"!?\[\[([^\]|#^]*)(?:[#^][^\]|]*)?(?:\|[^\]]*)?\]\]")
+_MARKDOWN_LINK_PATTERN = re.compile(r"!?\[[^\]]*\]\(<?([^)\s>]+)>?(?:\s+\"[^\"]*\")?\)")
+
+
+def extract_links(content: str) -> List[str]:
+    """
+    Extract the link targets of a note.
+
+    Wikilinks yield the linked note name (without heading or alias) and
+    Markdown links yield their URL or relative path.
+
+    Args:
+        content (str): The raw content of the note.
+
+    Returns:
+        List[str]: The unique link targets in order of first appearance.
+    """
+    _, body = split_frontmatter(content)
+    body = _CODE_FENCE_PATTERN.sub("", body)
+    links = [m.group(1).strip() for m in _WIKILINK_PATTERN.finditer(body)]
+    links += [m.group(1) for m in _MARKDOWN_LINK_PATTERN.finditer(body)]
+    return list(dict.fromkeys(link for link in links if link))
+
+
+@dataclass
+class NoteSection:
+    """A heading and the lines below it up to the next heading."""
+    heading: Optional[str]
+    text: str
+
+
+def split_sections(body: str) -> List[NoteSection]:
+    """
+    Split a note body into sections at its headings.
+
+    Text before the first heading becomes a section without a heading.
+    Headings inside fenced code blocks are ignored.
+
+    Args:
+        body (str): The note body without frontmatter.
+
+    Returns:
+        List[NoteSection]: The sections in document order. Sections that
+            contain only whitespace are dropped.
+    """
+    sections = []
+    heading = None
+    lines: List[str] = []
+    fence = None
+    for line in body.split("\n"):
+        stripped = line.lstrip()
+        if fence is None and stripped[:3] in ("```", "~~~"):
+            fence = stripped[:3]
+        elif fence is not None and stripped.startswith(fence):
+            fence = None
+        match = _HEADING_PATTERN.match(line) if fence is None else None
+        if match:
+            sections.append(NoteSection(heading=heading, text="\n".join(lines)))
+            heading = match.group(1)
+            lines = [line]
+        else:
+            lines.append(line)
+    sections.append(NoteSection(heading=heading, text="\n".join(lines)))
+    return [section for section in sections if section.text.strip()]
@@ -0,0 +1,213 @@
+import logging
+import os
+import stat
+import tempfile
+import threading
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+from .instrumentation import span
+from .types import Note, ProcessedNote
+
+
+def fsync_directory(directory: Path) -> None:
+    """
+    Flush a directory entry to disk so that renames within it are durable.
+
+    Platforms that cannot open directories, like Windows, are skipped.
+
+    Args:
+        directory (Path): The directory.
+    """
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+_UMASK_LOCK = threading.Lock()
+
+
+def _file_mode(path: Path) -> int:
+    """The permissions of path, or those a new file would get under the current umask."""
+    try:
+        return stat.S_IMODE(path.stat().st_mode)
+    except FileNotFoundError:
+        # The umask can only be read by setting it
+        with _UMASK_LOCK:
+            umask = os.umask(0)
+            os.umask(umask)
+        return 0o666 & ~umask
+
+
+def _write_temp(path: Path, content: str, fsync: bool) -> Path:
+    """Write content to a hidden temp file next to path and return its path."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        # mkstemp creates the file private to the owner, the replaced note keeps its permissions
+        os.chmod(tmp_name, _file_mode(path))
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(content)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+    return Path(tmp_name)
+
+
+def atomic_write_text(path: Path, content: str, fsync: bool = True) -> None:
+    """
+    Replace a file's content atomically.
+
+    The content is written to a temp file in the same directory, flushed to
+    disk and renamed over the file, so readers and sync tools see either the
+    old or the new content but never a partial write.
+
+    Args:
+        path (Path): The file to write.
+        content (str): The new content.
+        fsync (bool): Whether to flush the file and its directory to disk.
+    """
+    path = Path(path)
+    tmp_path = _write_temp(path, content, fsync)
+    try:
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    if fsync:
+        fsync_directory(path.parent)
+
+
+class NoteBatch:
+    """
+    Stages note writes and moves and applies them together.
+
+    Staged content is written to hidden temp files right away. ``commit()``
+    renames them into place and performs the staged moves in order, then
+    flushes each affected directory once. Until the commit nothing is
+    visible in the vault, and ``rollback()`` or an exception inside a
+    ``with`` block discards all staged changes. Each note is replaced
+    atomically, but a crash during the commit itself can leave only some of
+    the notes updated.
+    """
+
+    def __init__(self, new_note_dir: Path, fsync: bool = True):
+        self.new_note_dir = Path(new_note_dir)
+        self.fsync = fsync
+        self.logger = logging.getLogger(__name__)
+        # Staged operations: (source, target, callback run after the commit)
+        self._operations: List[Tuple[Path, Path, Optional[Callable[[], None]]]] = []
+        self._temp_files: List[Path] = []
+
+    def write_text(self, path: Path, content: str, on_commit: Optional[Callable[[], None]] = None) -> None:
+        """
+        Stage writing content to a file.
+
+        Args:
+            path (Path): The file to write.
+            content (str): The content.
+            on_commit (Optional[Callable[[], None]]): Called once the write is committed.
+        """
+        tmp_path = _write_temp(Path(path), content, self.fsync)
+        self._temp_files.append(tmp_path)
+        self._operations.append((tmp_path, Path(path), on_commit))
+
+    def create_note(self, processed_note: ProcessedNote) -> Path:
+        """
+        Stage creating a processed note in the new note directory.
+
+        Args:
+            processed_note (ProcessedNote): The processed note. Its location is
+                updated when the batch is committed.
+
+        Returns:
+            Path: The path the note will be created at.
+        """
+        note_path = self.new_note_dir / f"{processed_note.note.location.stem}.md"
+
+        def relocate() -> None:
+            processed_note.note.location = note_path
+
+        self.write_text(note_path, processed_note.content, relocate)
+        return note_path
+
+    def update_note(self, note: Note, content: str) -> None:
+        """
+        Stage replacing the content of an existing note.
+
+        Args:
+            note (Note): The note to update.
+            content (str): The new content.
+        """
+        self.write_text(note.location, content)
+
+    def move_note(self, note: Note, dir: Path) -> None:
+        """
+        Stage moving a note to another directory.
+
+        Args:
+            note (Note): The note to move. Its location is updated when the
+                batch is committed.
+            dir (Path): The directory to move the note to.
+        """
+        source = note.location
+        new_location = Path(dir) / source.name
+
+        def relocate() -> None:
+            note.location = new_location
+
+        self._operations.append((source, new_location, relocate))
+
+    def commit(self) -> None:
+        """
+        Apply all staged writes and moves.
+        """
+        with span("vault.batch_commit", operations=len(self._operations)):
+            self._commit()
+
+    def _commit(self) -> None:
+        directories = []
+        try:
+            for source, target, on_commit in self._operations:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(source, target)
+                for directory in (source.parent, target.parent):
+                    if directory not in directories:
+                        directories.append(directory)
+                if on_commit is not None:
+                    on_commit()
+        finally:
+            self.rollback()
+        if self.fsync:
+            for directory in directories:
+                fsync_directory(directory)
+
+    def rollback(self) -> None:
+        """
+        Discard all staged changes that were not committed.
+        """
+        for tmp_path in self._temp_files:
+            tmp_path.unlink(missing_ok=True)
+        self._temp_files = []
+        self._operations = []
+
+    def __len__(self) -> int:
+        return len(self._operations)
+
+    def __enter__(self) -> "NoteBatch":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
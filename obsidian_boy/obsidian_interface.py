@@ -1,24 +1,39 @@
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 from .types import Note
+from .daily_note_catalog import DailyNoteCatalog
+from .instrumentation import count, span
+from .note_writer import NoteBatch, atomic_write_text, fsync_directory
+from .tag_index import TagIndex
+from .vault_scanner import VaultScanner
 
 class ObsidianInterface:
-    def __init__(self, vault_path: Path):
+    def __init__(self, vault_path: Path, *, scan_workers: Optional[int] = None):
         self.VAULT_PATH = vault_path
         self.NEW_NOTE_DIR = self.VAULT_PATH / "ObsidianBoy/New"
         self.REVISION_DIR = self.VAULT_PATH / "ObsidianBoy/Revision"
         self.NOTE_DIR = self.VAULT_PATH / "ObsidianBoy/Notes"
         self.DAILY_NOTE_DIR = self.VAULT_PATH / "Daily"
+        self.STATE_DIR = self.VAULT_PATH / ".obsidian-boy"
+        self.daily_notes = DailyNoteCatalog(self.DAILY_NOTE_DIR)
+        self.tag_index = TagIndex(
+            self.VAULT_PATH,
+            self.STATE_DIR / "tag_index.json",
+            scanner=VaultScanner(max_workers=scan_workers),
+        )
 
     def list_daily_notes(self) -> List[Path]:
         """
         List daily notes sorted by date.
 
+        The listing is cached by the daily note catalog until the daily note
+        directory changes. Use ``daily_notes`` for date range queries.
+
         Returns:
             List[Path]: A list of paths to daily notes, sorted by date (newest first).
         """
-        daily_notes = list(self.DAILY_NOTE_DIR.glob("*.md"))
-        return sorted(daily_notes, key=lambda x: x.stem, reverse=True)
+        with span("vault.list_daily_notes"):
+            return self.daily_notes.paths()
 
     def read_daily_note(self, dailynote: Path) -> str:
         """
@@ -30,28 +45,40 @@ class ObsidianInterface:
         Returns:
             str: The contents of the daily note.
         """
-        return dailynote.read_text(encoding="utf-8")
+        with span("vault.read"):
+            content = dailynote.read_text(encoding="utf-8")
+        count("vault.bytes_read", len(content))
+        return content
 
-    def create_note(self, note: Note) -> None:
+    def create_note(self, note: Note, content: str) -> None:
         """
         Create a new note in the NEW_NOTE_DIR.
 
+        The note is written atomically, so a crash never leaves a partial note.
+
         Args:
             note (Note): The Note object containing the note's information.
+            content (str): The content of the note.
         """
         note_path = self.NEW_NOTE_DIR / f"{note.location.stem}.md"
-        note_path.write_text(note.content, encoding="utf-8")
+        with span("vault.write"):
+            atomic_write_text(note_path, content)
+        count("vault.bytes_written", len(content))
         note.location = note_path
 
     def update_note(self, note: Note, content: str) -> None:
         """
         Update an existing note with new content.
 
+        The content is replaced atomically.
+
         Args:
             note (Note): The Note object to be updated.
             content (str): The new content for the note.
         """
-        note.location.write_text(content, encoding="utf-8")
+        with span("vault.write"):
+            atomic_write_text(note.location, content)
+        count("vault.bytes_written", len(content))
 
     def move_note(self, note: Note, dir: Path) -> None:
         """
@@ -63,17 +90,31 @@ class ObsidianInterface:
         """
         new_location = dir / note.location.name
         note.location.rename(new_location)
+        fsync_directory(note.location.parent)
+        fsync_directory(dir)
         note.location = new_location
 
+    def batch(self) -> NoteBatch:
+        """
+        Start a batch of note writes and moves that are committed together.
+
+        Use it as a context manager to commit on success and discard the
+        staged changes on an exception.
+
+        Returns:
+            NoteBatch: The batch, creating new notes in the NEW_NOTE_DIR.
+        """
+        return NoteBatch(self.NEW_NOTE_DIR)
+
     def get_existing_tags(self) -> List[str]:
         """
         Retrieve existing tags from all notes in the vault.
 
+        The tags are served from a persistent index that only re-reads notes
+        which changed since the last call.
+
         Returns:
-            List[str]: A list of unique tags found in the vault.
+            List[str]: A sorted list of unique tags found in the vault.
         """
-        tags = set()
-        for note in self.VAULT_PATH.glob("**/*.md"):
-            content = note.read_text(encoding="utf-8")
-            tags.update(tag.strip("#") for tag in content.split() if tag.startswith("#"))
-        return sorted(tags)
+        with span("vault.tags"):
+            return self.tag_index.tags()
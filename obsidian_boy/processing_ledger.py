@@ -0,0 +1,198 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+from .types import DailyNoteEntry, ProcessedNote, ProcessingStatus
+
+
+def content_hash(text: str) -> str:
+    """
+    Hash the content of a daily note.
+
+    Args:
+        text (str): The note content.
+
+    Returns:
+        str: The hex SHA-256 digest of the content.
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def entry_hash(entry: DailyNoteEntry) -> str:
+    """
+    Hash a daily note entry by its fields.
+
+    Args:
+        entry (DailyNoteEntry): The entry.
+
+    Returns:
+        str: The hex SHA-256 digest of the entry's canonical JSON form.
+    """
+    return content_hash(json.dumps(entry.model_dump(), sort_keys=True, ensure_ascii=False))
+
+
+class ProcessingLedger:
+    """
+    Durable record of which daily notes and entries have been processed.
+
+    Notes are recorded with the hash of the content they were processed
+    from, so a note is only picked up again once it changes. Entries are
+    recorded per note with their own hash, status and the path of the note
+    produced from them, so a changed note only reprocesses its new entries.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS notes ("
+            "path TEXT PRIMARY KEY, content_hash TEXT NOT NULL, status TEXT NOT NULL, updated_at REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "note_path TEXT NOT NULL, entry_hash TEXT NOT NULL, status TEXT NOT NULL, output_path TEXT, "
+            "updated_at REAL NOT NULL, PRIMARY KEY (note_path, entry_hash)) WITHOUT ROWID;"
+        )
+        self._db.commit()
+
+    def note_status(self, note_path: Path, content: str) -> Optional[ProcessingStatus]:
+        """
+        Get the status of a note if it was recorded with this content.
+
+        Args:
+            note_path (Path): The path of the daily note.
+            content (str): The current content of the note.
+
+        Returns:
+            Optional[ProcessingStatus]: The recorded status, or None if the
+                note is new or changed since it was recorded.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT content_hash, status FROM notes WHERE path = ?", (str(note_path),)
+            ).fetchone()
+        if row is None or row[0] != content_hash(content):
+            return None
+        return ProcessingStatus(row[1])
+
+    def is_current(self, note_path: Path, content: str) -> bool:
+        """
+        Check whether a note was already handled in its current version.
+
+        Args:
+            note_path (Path): The path of the daily note.
+            content (str): The current content of the note.
+
+        Returns:
+            bool: True if the note was recorded with this content and did not fail.
+        """
+        return self.note_status(note_path, content) in (ProcessingStatus.EXTRACTED, ProcessingStatus.PROCESSED)
+
+    def changed_notes(self, notes: Dict[Path, str]) -> List[Path]:
+        """
+        Select the notes that are new or changed since they were recorded.
+
+        Args:
+            notes (Dict[Path, str]): The content of each note by path.
+
+        Returns:
+            List[Path]: The paths of the new, changed or failed notes, in input order.
+        """
+        return [note_path for note_path, content in notes.items() if not self.is_current(note_path, content)]
+
+    def record_note(self, note_path: Path, content: str, status: ProcessingStatus) -> None:
+        """
+        Record the status of a note for its current content.
+
+        Args:
+            note_path (Path): The path of the daily note.
+            content (str): The content the note was processed from.
+            status (ProcessingStatus): The processing status.
+        """
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO notes (path, content_hash, status, updated_at) VALUES (?, ?, ?, ?)",
+                (str(note_path), content_hash(content), status.value, time.time()),
+            )
+
+    def record_entries(self, note_path: Path, entries: Sequence[DailyNoteEntry], status: ProcessingStatus,
+                       output_path: Optional[Path] = None) -> None:
+        """
+        Record the status of entries of a note.
+
+        Args:
+            note_path (Path): The path of the daily note.
+            entries (Sequence[DailyNoteEntry]): The entries.
+            status (ProcessingStatus): The processing status.
+            output_path (Optional[Path]): The note produced from the entries.
+        """
+        now = time.time()
+        rows = [
+            (str(note_path), entry_hash(entry), status.value, str(output_path) if output_path else None, now)
+            for entry in entries
+        ]
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO entries (note_path, entry_hash, status, output_path, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def record_processed(self, note_path: Path, processed_note: ProcessedNote) -> None:
+        """
+        Record that an entry was turned into a note.
+
+        Args:
+            note_path (Path): The path of the daily note the entry came from.
+            processed_note (ProcessedNote): The processed note.
+        """
+        self.record_entries(
+            note_path, [processed_note.original_entry], ProcessingStatus.PROCESSED, processed_note.note.location
+        )
+
+    def pending_entries(self, note_path: Path, entries: Sequence[DailyNoteEntry]) -> List[DailyNoteEntry]:
+        """
+        Select the entries of a note that were not processed yet.
+
+        Args:
+            note_path (Path): The path of the daily note.
+            entries (Sequence[DailyNoteEntry]): The entries of the note.
+
+        Returns:
+            List[DailyNoteEntry]: The entries that are not recorded as processed, in order.
+        """
+        with self._lock:
+            processed = {
+                row[0] for row in self._db.execute(
+                    "SELECT entry_hash FROM entries WHERE note_path = ? AND status = ?",
+                    (str(note_path), ProcessingStatus.PROCESSED.value),
+                )
+            }
+        return [entry for entry in entries if entry_hash(entry) not in processed]
+
+    def outputs(self, note_path: Path) -> List[Path]:
+        """
+        List the notes produced from the entries of a daily note.
+
+        Args:
+            note_path (Path): The path of the daily note.
+
+        Returns:
+            List[Path]: The paths of the produced notes.
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT output_path FROM entries WHERE note_path = ? AND output_path IS NOT NULL ORDER BY updated_at",
+                (str(note_path),),
+            ).fetchall()
+        return [Path(row[0]) for row in rows]
+
+    def close(self) -> None:
+        """
+        Close the underlying database.
+        """
+        with self._lock:
+            self._db.close()
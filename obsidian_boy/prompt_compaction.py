@@ -0,0 +1,204 @@
+import itertools
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Sequence
+from urllib.parse import urlparse
+from .note_parser import split_frontmatter
+from .types import DailyNoteEntry
+
+# URLs longer than this are replaced with a placeholder
+MAX_URL_LENGTH = 40
+
+_URL_PATTERN = re.compile(r"https?://[^\s<>()\[\]\"'`]+")
+_TRAILING_PUNCTUATION = ".,;:!?"
+# Embedded images as data URIs, e.g. pasted screenshots, carry no entries
+_DATA_IMAGE_PATTERN = re.compile(r"!\[[^\]]*\]\(data:[^)]*\)")
+_HTML_COMMENT_PATTERN = re.compile(r"<!--.*?-->", re.DOTALL)
+_OBSIDIAN_COMMENT_PATTERN = re.compile(r"%%.*?%%", re.DOTALL)
+# markdownify escapes characters like _ and = in bare URLs
+_ESCAPE_PATTERN = re.compile(r"\\([^\w\s])|\\(_)")
+_INNER_SPACES_PATTERN = re.compile(r"(?<=\S)[ \t]{2,}")
+_BLANK_LINES_PATTERN = re.compile(r"\n{3,}")
+# Words with their preceding whitespace; URLs contain none, so they stay whole
+_WORD_PATTERN = re.compile(r"\s*\S+")
+# Text that restoring would take for a placeholder
+_PLACEHOLDER_PATTERN = re.compile(r"https?://[^/\s]+/~\d+")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens of a text without a tokenizer.
+
+    Args:
+        text (str): The text.
+
+    Returns:
+        int: The approximate token count, assuming about four characters per token.
+    """
+    return len(text) // 4 + 1
+
+
+@dataclass
+class CompactedText:
+    """Compacted prompt content and the URLs its placeholders stand for."""
+    text: str
+    urls: Dict[str, str] = field(default_factory=dict)
+
+    def restore(self, text: str) -> str:
+        """
+        Replace the placeholders in a text with their URLs.
+
+        Args:
+            text (str): A text produced from the compacted content, e.g. an entry's link.
+
+        Returns:
+            str: The text with the original URLs.
+        """
+        if not self.urls:
+            return text
+        pattern = re.compile("|".join(re.escape(placeholder) + r"(?!\d)" for placeholder in self.urls))
+        return pattern.sub(lambda match: self.urls[match.group(0)], text)
+
+    def restore_entries(self, entries: Sequence[DailyNoteEntry]) -> List[DailyNoteEntry]:
+        """
+        Replace the placeholders in extracted entries with their URLs.
+
+        Args:
+            entries (Sequence[DailyNoteEntry]): The entries extracted from the compacted content.
+
+        Returns:
+            List[DailyNoteEntry]: The entries with the original URLs.
+        """
+        if not self.urls:
+            return list(entries)
+        restored = []
+        for entry in entries:
+            fields = {}
+            for name in ("title", "link", "description", "todo"):
+                value = getattr(entry, name)
+                if value is not None:
+                    fields[name] = self.restore(value)
+            restored.append(entry.model_copy(update=fields))
+        return restored
+
+
+def compact(text: str, strip_frontmatter: bool = True, max_url_length: int = MAX_URL_LENGTH) -> CompactedText:
+    """
+    Shrink note content before it is sent to an LLM.
+
+    Frontmatter, comments and embedded data images are removed, URLs longer
+    than ``max_url_length`` are replaced with short placeholders that keep
+    the host, e.g. ``https://github.com/~1``, and runs of spaces and blank
+    lines are collapsed. Placeholders never occur in the text already, so
+    restoring cannot rewrite a URL the note contains literally. Markdown
+    escapes in URLs are removed, so restored links are usable as they are.
+    Leading indentation is kept, as it nests list items.
+
+    Args:
+        text (str): The content.
+        strip_frontmatter (bool): Whether to remove a leading YAML frontmatter block.
+        max_url_length (int): The length above which URLs are replaced.
+
+    Returns:
+        CompactedText: The compacted content and the URL of each placeholder.
+    """
+    if strip_frontmatter:
+        _, text = split_frontmatter(text)
+    text = _HTML_COMMENT_PATTERN.sub("", text)
+    text = _OBSIDIAN_COMMENT_PATTERN.sub("", text)
+    text = _DATA_IMAGE_PATTERN.sub("", text)
+
+    placeholders: Dict[str, str] = {}
+    numbers = itertools.count(1)
+    taken = set(_PLACEHOLDER_PATTERN.findall(text))
+
+    def shorten(match: re.Match) -> str:
+        url = match.group(0).rstrip(_TRAILING_PUNCTUATION)
+        suffix = match.group(0)[len(url):]
+        url = _ESCAPE_PATTERN.sub(lambda escape: escape.group(1) or escape.group(2), url)
+        if len(url) <= max_url_length:
+            return url + suffix
+        if url not in placeholders:
+            parsed = urlparse(url)
+            placeholder = f"{parsed.scheme}://{parsed.netloc}/~{next(numbers)}"
+            while placeholder in taken:
+                placeholder = f"{parsed.scheme}://{parsed.netloc}/~{next(numbers)}"
+            placeholders[url] = placeholder
+        return placeholders[url] + suffix
+
+    text = _URL_PATTERN.sub(shorten, text)
+    lines = [_INNER_SPACES_PATTERN.sub(" ", line.replace("\t", "    ")).rstrip() for line in text.split("\n")]
+    text = _BLANK_LINES_PATTERN.sub("\n\n", "\n".join(lines)).strip("\n")
+    return CompactedText(text, {placeholder: url for url, placeholder in placeholders.items()})
+
+
+def _cut_line(line: str, max_tokens: int, measure: Callable[[str], int]) -> List[str]:
+    """Cut a line at whitespace into the longest pieces within the budget."""
+    words = _WORD_PATTERN.findall(line)
+
+    def fits(start: int, end: int) -> bool:
+        return measure("".join(words[start:end]).strip()) <= max_tokens
+
+    pieces = []
+    start = 0
+    while start < len(words):
+        if not fits(start, start + 1) and not _URL_PATTERN.search(words[start]):
+            # Roughly max_tokens worth of characters per piece of an oversized word
+            word = words[start].strip()
+            width = max(1, len(word) * max_tokens // measure(word))
+            words[start:start + 1] = [word[offset:offset + width] for offset in range(0, len(word), width)]
+        # Grow the piece exponentially, then bisect between the last fitting and the first oversized end
+        low, step = start + 1, 1
+        while low + step <= len(words) and fits(start, low + step):
+            low += step
+            step *= 2
+        high = min(low + step, len(words) + 1)
+        while high - low > 1:
+            middle = (low + high) // 2
+            if fits(start, middle):
+                low = middle
+            else:
+                high = middle
+        pieces.append("".join(words[start:low]).strip())
+        start = low
+    return pieces
+
+
+def split_to_budget(text: str, max_tokens: int, measure: Callable[[str], int] = estimate_tokens) -> List[str]:
+    """
+    Split content into parts that each fit a token budget.
+
+    Parts are cut at line boundaries, so list items stay whole. Lines that
+    alone exceed the budget are cut at whitespace. Words larger than the
+    budget are cut into pieces of about the budget, except URLs, which are
+    never cut and become a part of their own.
+
+    Args:
+        text (str): The content.
+        max_tokens (int): The token budget per part.
+        measure (Callable[[str], int]): Estimates the tokens of a text.
+
+    Returns:
+        List[str]: The parts, in order. Content within the budget is returned as one part.
+    """
+    if measure(text) <= max_tokens:
+        return [text]
+    parts: List[str] = []
+    current: List[str] = []
+    used = 0
+    for line in text.split("\n"):
+        tokens = measure(line)
+        if tokens > max_tokens:
+            if current:
+                parts.append("\n".join(current))
+                current, used = [], 0
+            parts += _cut_line(line, max_tokens, measure)
+            continue
+        if current and used + tokens > max_tokens:
+            parts.append("\n".join(current))
+            current, used = [], 0
+        current.append(line)
+        used += tokens
+    if current:
+        parts.append("\n".join(current))
+    return [part for part in parts if part.strip()]
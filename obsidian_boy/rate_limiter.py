@@ -0,0 +1,112 @@
+import threading
+import time
+from typing import Callable, Dict, Optional
+from urllib.parse import urlparse
+from langchain.chat_models.base import BaseChatModel
+
+
+def provider_name(llm: BaseChatModel) -> str:
+    """
+    Derive a stable provider name for a chat model.
+
+    OpenAI-compatible models pointed at another endpoint (e.g. DeepSeek) are
+    distinguished by the host of their base URL.
+
+    Args:
+        llm (BaseChatModel): The chat model.
+
+    Returns:
+        str: The provider name, e.g. ``openai-chat`` or ``openai-chat@api.deepseek.com``.
+    """
+    llm_type = getattr(llm, "_llm_type", None)
+    if not isinstance(llm_type, str):
+        llm_type = type(llm).__name__
+    base_url = getattr(llm, "openai_api_base", None) or getattr(llm, "anthropic_api_url", None)
+    host = urlparse(base_url).hostname if isinstance(base_url, str) else None
+    return f"{llm_type}@{host}" if host else llm_type
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket limiting how often requests may start.
+    """
+
+    def __init__(self, requests_per_second: float, burst: int = 1,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        if requests_per_second <= 0:
+            raise ValueError("requests_per_second must be positive")
+        self.requests_per_second = requests_per_second
+        self.burst = max(1, burst)
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(self.burst)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.requests_per_second)
+        self._updated = now
+
+    def _reserve(self) -> float:
+        with self._lock:
+            self._refill()
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.requests_per_second
+
+    def acquire(self) -> None:
+        """
+        Block until a request may be sent.
+        """
+        delay = self._reserve()
+        if delay > 0:
+            self._sleep(delay)
+
+    def try_acquire(self) -> bool:
+        """
+        Take a request slot only if one is free right now.
+
+        Returns:
+            bool: True if a request may be sent, False if it would have to wait.
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class RateLimiterRegistry:
+    """
+    Hands out one shared rate limiter per provider.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, float]] = None,
+                 default_requests_per_second: Optional[float] = None, burst: int = 1):
+        self.limits = dict(limits or {})
+        self.default_requests_per_second = default_requests_per_second
+        self.burst = burst
+        self._limiters: Dict[str, RateLimiter] = {}
+        self._lock = threading.Lock()
+
+    def get(self, provider: str) -> Optional[RateLimiter]:
+        """
+        Get the rate limiter of a provider.
+
+        Args:
+            provider (str): The provider name, see ``provider_name``.
+
+        Returns:
+            Optional[RateLimiter]: The shared limiter, or None if the provider
+                is not limited.
+        """
+        rate = self.limits.get(provider, self.default_requests_per_second)
+        if rate is None:
+            return None
+        with self._lock:
+            if provider not in self._limiters:
+                self._limiters[provider] = RateLimiter(rate, burst=self.burst)
+            return self._limiters[provider]
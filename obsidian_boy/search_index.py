@@ -0,0 +1,475 @@
+import heapq
+import math
+import re
+import sqlite3
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from .knowledge_base import KnowledgeBase
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has in is it its of on or that the this to was were will with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase search terms.
+
+    Args:
+        text (str): The text to tokenize.
+
+    Returns:
+        List[str]: The terms in order, without stopwords and single characters.
+    """
+    return [
+        token for token in _TOKEN_PATTERN.findall(text.lower())
+        if len(token) > 1 and token not in STOPWORDS
+    ]
+
+
+def _bm25_scores(postings: Dict[str, List[Tuple[str, int, int]]], count: int, total_length: int,
+                 k1: float, b: float) -> Dict[str, float]:
+    """Score documents from the (doc_id, frequency, length) postings of each query term."""
+    scores: Dict[str, float] = {}
+    if not count:
+        return scores
+    average_length = total_length / count
+    for term_postings in postings.values():
+        if not term_postings:
+            continue
+        idf = math.log(1 + (count - len(term_postings) + 0.5) / (len(term_postings) + 0.5))
+        for doc_id, frequency, length in term_postings:
+            norm = k1 * (1 - b + b * length / average_length)
+            scores[doc_id] = scores.get(doc_id, 0.0) + idf * frequency * (k1 + 1) / (frequency + norm)
+    return scores
+
+
+class BM25Index:
+    """
+    In-memory inverted index with Okapi BM25 ranking.
+
+    Documents can be added, replaced and removed one at a time, and a search
+    only visits the postings of the query terms. Each document can carry the
+    version of its source, see ``versions()``.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._doc_terms: Dict[str, Counter] = {}
+        self._doc_lengths: Dict[str, int] = {}
+        self._doc_versions: Dict[str, Optional[str]] = {}
+        self._total_length = 0
+        self._lock = threading.RLock()
+
+    def add(self, doc_id: str, text: str, version: Optional[str] = None) -> None:
+        """
+        Index a document, replacing any earlier version of it.
+
+        Args:
+            doc_id (str): The document identifier.
+            text (str): The document text.
+            version (Optional[str]): The version of the document's source.
+        """
+        terms = Counter(tokenize(text))
+        with self._lock:
+            self.remove(doc_id)
+            self._doc_terms[doc_id] = terms
+            self._doc_lengths[doc_id] = sum(terms.values())
+            self._doc_versions[doc_id] = version
+            self._total_length += self._doc_lengths[doc_id]
+            for term, frequency in terms.items():
+                self._postings.setdefault(term, {})[doc_id] = frequency
+
+    def add_many(self, documents: Dict[str, str], versions: Optional[Dict[str, str]] = None) -> None:
+        """
+        Index several documents, replacing any earlier versions of them.
+
+        Args:
+            documents (Dict[str, str]): The document texts by identifier.
+            versions (Optional[Dict[str, str]]): The versions of the documents' sources.
+        """
+        versions = versions or {}
+        for doc_id, text in documents.items():
+            self.add(doc_id, text, versions.get(doc_id))
+
+    def remove(self, doc_id: str) -> None:
+        """
+        Remove a document from the index if present.
+
+        Args:
+            doc_id (str): The document identifier.
+        """
+        with self._lock:
+            terms = self._doc_terms.pop(doc_id, None)
+            if terms is None:
+                return
+            self._doc_versions.pop(doc_id)
+            self._total_length -= self._doc_lengths.pop(doc_id)
+            for term in terms:
+                postings = self._postings[term]
+                del postings[doc_id]
+                if not postings:
+                    del self._postings[term]
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[str, float]]:
+        """
+        Rank documents against a query.
+
+        Args:
+            query (str): The free-text query.
+            k (int): The maximum number of results.
+
+        Returns:
+            List[Tuple[str, float]]: The ids and BM25 scores of the best
+                matching documents, best first.
+        """
+        with self._lock:
+            postings = {
+                term: [(doc_id, frequency, self._doc_lengths[doc_id])
+                       for doc_id, frequency in self._postings.get(term, {}).items()]
+                for term in set(tokenize(query))
+            }
+            scores = _bm25_scores(postings, len(self._doc_terms), self._total_length, self.k1, self.b)
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+    def versions(self) -> Dict[str, Optional[str]]:
+        """
+        Get the source versions of the indexed documents.
+
+        Returns:
+            Dict[str, Optional[str]]: The version of every document, None if it was added without one.
+        """
+        with self._lock:
+            return dict(self._doc_versions)
+
+    def close(self) -> None:
+        """
+        Release the index. The in-memory index holds no resources.
+        """
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._doc_terms
+
+
+class SQLiteBM25Index:
+    """
+    Inverted index with Okapi BM25 ranking, persisted in a SQLite database.
+
+    Postings and document lengths are stored on disk and updated
+    incrementally, so a new process searches an existing index without
+    rebuilding it, and a search only reads the postings of the query terms.
+    It has the same interface as ``BM25Index``.
+    """
+
+    def __init__(self, path: Union[str, Path], k1: float = 1.5, b: float = 0.75):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS docs (doc_id TEXT PRIMARY KEY, length INTEGER NOT NULL, version TEXT)"
+                " WITHOUT ROWID"
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS postings (term TEXT NOT NULL, doc_id TEXT NOT NULL,"
+                " frequency INTEGER NOT NULL, PRIMARY KEY (term, doc_id)) WITHOUT ROWID"
+            )
+            self._connection.execute("CREATE INDEX IF NOT EXISTS postings_by_doc ON postings (doc_id)")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS stats (id INTEGER PRIMARY KEY CHECK (id = 0),"
+                " count INTEGER NOT NULL, total_length INTEGER NOT NULL)"
+            )
+            self._connection.execute("INSERT OR IGNORE INTO stats (id, count, total_length) VALUES (0, 0, 0)")
+
+    def _remove(self, doc_id: str) -> None:
+        row = self._connection.execute("SELECT length FROM docs WHERE doc_id = ?", (doc_id,)).fetchone()
+        if row is None:
+            return
+        self._connection.execute("DELETE FROM postings WHERE doc_id = ?", (doc_id,))
+        self._connection.execute("DELETE FROM docs WHERE doc_id = ?", (doc_id,))
+        self._connection.execute(
+            "UPDATE stats SET count = count - 1, total_length = total_length - ? WHERE id = 0", (row[0],)
+        )
+
+    def add(self, doc_id: str, text: str, version: Optional[str] = None) -> None:
+        """
+        Index a document, replacing any earlier version of it.
+
+        Args:
+            doc_id (str): The document identifier.
+            text (str): The document text.
+            version (Optional[str]): The version of the document's source.
+        """
+        self.add_many({doc_id: text}, {doc_id: version} if version is not None else None)
+
+    def add_many(self, documents: Dict[str, str], versions: Optional[Dict[str, str]] = None) -> None:
+        """
+        Index several documents in one transaction, replacing any earlier versions of them.
+
+        Args:
+            documents (Dict[str, str]): The document texts by identifier.
+            versions (Optional[Dict[str, str]]): The versions of the documents' sources.
+        """
+        versions = versions or {}
+        tokenized = {doc_id: Counter(tokenize(text)) for doc_id, text in documents.items()}
+        with self._lock, self._connection:
+            for doc_id, terms in tokenized.items():
+                self._remove(doc_id)
+                length = sum(terms.values())
+                self._connection.execute(
+                    "INSERT INTO docs (doc_id, length, version) VALUES (?, ?, ?)",
+                    (doc_id, length, versions.get(doc_id)),
+                )
+                self._connection.executemany(
+                    "INSERT INTO postings (term, doc_id, frequency) VALUES (?, ?, ?)",
+                    [(term, doc_id, frequency) for term, frequency in terms.items()],
+                )
+                self._connection.execute(
+                    "UPDATE stats SET count = count + 1, total_length = total_length + ? WHERE id = 0", (length,)
+                )
+
+    def remove(self, doc_id: str) -> None:
+        """
+        Remove a document from the index if present.
+
+        Args:
+            doc_id (str): The document identifier.
+        """
+        with self._lock, self._connection:
+            self._remove(doc_id)
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[str, float]]:
+        """
+        Rank documents against a query.
+
+        Args:
+            query (str): The free-text query.
+            k (int): The maximum number of results.
+
+        Returns:
+            List[Tuple[str, float]]: The ids and BM25 scores of the best
+                matching documents, best first.
+        """
+        with self._lock:
+            count, total_length = self._connection.execute(
+                "SELECT count, total_length FROM stats WHERE id = 0"
+            ).fetchone()
+            postings = {
+                term: self._connection.execute(
+                    "SELECT postings.doc_id, frequency, length FROM postings"
+                    " JOIN docs ON docs.doc_id = postings.doc_id WHERE term = ?", (term,)
+                ).fetchall()
+                for term in set(tokenize(query))
+            }
+        scores = _bm25_scores(postings, count, total_length, self.k1, self.b)
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+    def versions(self) -> Dict[str, Optional[str]]:
+        """
+        Get the source versions of the indexed documents.
+
+        Returns:
+            Dict[str, Optional[str]]: The version of every document, None if it was added without one.
+        """
+        with self._lock:
+            return dict(self._connection.execute("SELECT doc_id, version FROM docs"))
+
+    def close(self) -> None:
+        """
+        Close the database.
+        """
+        with self._lock:
+            self._connection.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT count FROM stats WHERE id = 0").fetchone()[0]
+
+    def __contains__(self, doc_id: str) -> bool:
+        with self._lock:
+            return self._connection.execute("SELECT 1 FROM docs WHERE doc_id = ?", (doc_id,)).fetchone() is not None
+
+
+@dataclass
+class SearchResult:
+    """A ranked knowledge base entry with a snippet around the match."""
+    key: str
+    score: float
+    snippet: str
+
+
+def make_snippet(content: str, query: str, width: int = 160) -> str:
+    """
+    Cut a snippet of the content around the first query term.
+
+    Args:
+        content (str): The full content.
+        query (str): The query whose terms are looked for.
+        width (int): The maximum length of the snippet.
+
+    Returns:
+        str: The snippet, with ``...`` marking cut-off text.
+    """
+    lowered = content.lower()
+    positions = [lowered.find(term) for term in tokenize(query)]
+    position = min((p for p in positions if p >= 0), default=0)
+    start = max(0, position - width // 4)
+    end = min(len(content), start + width)
+    snippet = " ".join(content[start:end].split())
+    return f"{'...' if start > 0 else ''}{snippet}{'...' if end < len(content) else ''}"
+
+
+class SearchableKnowledgeBase(KnowledgeBase):
+    """
+    Adds full-text search to any knowledge base.
+
+    On the first search the index is synchronized with the wrapped knowledge
+    base: entries whose version (see ``KnowledgeBase.versions``) differs from
+    the indexed one, including entries written without this wrapper, are
+    re-indexed and deleted entries are dropped. Afterwards the index is kept
+    up to date as entries are stored through this wrapper. With an
+    ``index_path`` the index is persisted, so later processes only index
+    what changed in between.
+    """
+
+    BUILD_BATCH_SIZE = 1000
+
+    def __init__(self, knowledge_base: KnowledgeBase, index: Optional[BM25Index] = None,
+                 index_path: Optional[Union[str, Path]] = None):
+        self.knowledge_base = knowledge_base
+        if index is None:
+            index = SQLiteBM25Index(index_path) if index_path is not None else BM25Index()
+        self.index = index
+        self._built = False
+        self._build_lock = threading.Lock()
+
+    def _ensure_index(self) -> None:
+        with self._build_lock:
+            if self._built:
+                return
+            indexed = self.index.versions()
+            batch: List[str] = []
+            for key in self.knowledge_base.keys():
+                batch.append(key)
+                if len(batch) == self.BUILD_BATCH_SIZE:
+                    self._sync_keys(batch, indexed)
+                    batch = []
+            self._sync_keys(batch, indexed)
+            # What is left was deleted from the knowledge base
+            for key in indexed:
+                self.index.remove(key)
+            self._built = True
+
+    def _sync_keys(self, keys: List[str], indexed: Dict[str, Optional[str]]) -> None:
+        versions = self.knowledge_base.versions(keys)
+        stale = []
+        for key in keys:
+            version = indexed.pop(key, None)
+            if version is None or version != versions.get(key):
+                stale.append(key)
+        self._index_keys(stale, versions)
+
+    def _index_keys(self, keys: List[str], versions: Optional[Dict[str, str]] = None) -> None:
+        if not keys:
+            return
+        if versions is None:
+            versions = self.knowledge_base.versions(keys)
+        self.index.add_many(self.knowledge_base.retrieve_many(keys), versions)
+
+    def store(self, key: str, content: str) -> None:
+        """
+        Store content and index it if the index is built.
+
+        Args:
+            key (str): The unique identifier for the content.
+            content (str): The content to be stored.
+        """
+        self.store_many({key: content})
+
+    def store_many(self, items: Dict[str, str]) -> None:
+        """
+        Store several entries and index them if the index is built.
+
+        Args:
+            items (Dict[str, str]): The content to be stored by key.
+        """
+        self.knowledge_base.store_many(items)
+        with self._build_lock:
+            if self._built:
+                self.index.add_many(items, self.knowledge_base.versions(items))
+
+    def retrieve(self, key: str) -> str:
+        """
+        Retrieve content from the wrapped knowledge base.
+
+        Args:
+            key (str): The unique identifier for the content.
+
+        Returns:
+            str: The retrieved content.
+
+        Raises:
+            KeyError: If the key is not found in the knowledge base.
+        """
+        return self.knowledge_base.retrieve(key)
+
+    def retrieve_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        """
+        Retrieve several entries from the wrapped knowledge base.
+
+        Args:
+            keys (Iterable[str]): The keys to look up.
+
+        Returns:
+            Dict[str, str]: The content of every key that was found.
+        """
+        return self.knowledge_base.retrieve_many(keys)
+
+    def keys(self) -> Iterator[str]:
+        """
+        Enumerate the keys of the wrapped knowledge base.
+
+        Returns:
+            Iterator[str]: The stored keys, in no particular order.
+        """
+        return self.knowledge_base.keys()
+
+    def search(self, query: str, k: int = 10) -> List[SearchResult]:
+        """
+        Find the entries that best match a free-text query.
+
+        Args:
+            query (str): The free-text query.
+            k (int): The maximum number of results.
+
+        Returns:
+            List[SearchResult]: The best matching entries, best first.
+        """
+        self._ensure_index()
+        ranked = self.index.search(query, k)
+        contents = self.knowledge_base.retrieve_many(key for key, _ in ranked)
+        return [
+            SearchResult(key=key, score=score, snippet=make_snippet(contents[key], query))
+            for key, score in ranked
+            if key in contents
+        ]
+
+    def close(self) -> None:
+        """
+        Close the search index. The wrapped knowledge base is left open.
+        """
+        self.index.close()
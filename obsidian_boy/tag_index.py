@@ -0,0 +1,120 @@
+import json
+import logging
+import os
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from .vault_scanner import FileSignature, VaultScanner, walk_markdown_files
+
+
+class TagIndex:
+    """
+    Persistent, incremental index of the tags used in a vault.
+
+    Each Markdown file is recorded with its mtime and size. A refresh only
+    re-reads files whose signature changed and drops files that were deleted,
+    so repeated lookups cost a directory walk instead of a full read. Changed
+    files are read through a ``VaultScanner``, which parallelizes cold builds.
+    """
+
+    VERSION = 1
+
+    def __init__(self, vault_path: Path, index_path: Path, scanner: Optional[VaultScanner] = None):
+        self.vault_path = Path(vault_path)
+        self.index_path = Path(index_path)
+        self.scanner = scanner or VaultScanner()
+        self.logger = logging.getLogger(__name__)
+        self._files: Dict[str, Tuple[FileSignature, List[str]]] = {}
+        self._tag_counts: Counter = Counter()
+        self._loaded = False
+
+    def _load(self) -> None:
+        self._loaded = True
+        if not self.index_path.exists():
+            return
+        try:
+            with self.index_path.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable tag index {self.index_path}: {e}")
+            return
+        if data.get("version") != self.VERSION:
+            return
+        for path, (mtime_ns, size, tags) in data["files"].items():
+            self._files[path] = ((mtime_ns, size), tags)
+            self._tag_counts.update(tags)
+
+    def _save(self) -> None:
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": self.VERSION,
+            "files": {path: [*signature, tags] for path, (signature, tags) in self._files.items()},
+        }
+        tmp_path = self.index_path.with_suffix(".tmp")
+        with tmp_path.open("w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, self.index_path)
+
+    def _set(self, path: str, signature: FileSignature, tags: List[str]) -> None:
+        self._discard(path)
+        self._files[path] = (signature, tags)
+        self._tag_counts.update(tags)
+
+    def _discard(self, path: str) -> None:
+        previous = self._files.pop(path, None)
+        if previous is not None:
+            self._tag_counts.subtract(previous[1])
+
+    def refresh(self) -> int:
+        """
+        Bring the index up to date with the vault and persist it if needed.
+
+        Returns:
+            int: The number of files that were added, changed or removed.
+        """
+        if not self._loaded:
+            self._load()
+        seen = set()
+        changed = []
+        for path, signature in walk_markdown_files(self.vault_path):
+            seen.add(path)
+            indexed = self._files.get(path)
+            if indexed is None or indexed[0] != signature:
+                changed.append((path, signature))
+        for scan in self.scanner.scan(self.vault_path, changed):
+            if scan.error is not None:
+                # Not indexed, so the next refresh tries the file again
+                self.logger.warning(f"Cannot read {scan.path}: {scan.error}")
+                continue
+            self._set(scan.path, scan.signature, scan.tags)
+        deleted = set(self._files) - seen
+        for path in deleted:
+            self._discard(path)
+        changes = len(changed) + len(deleted)
+        if changes:
+            self._tag_counts = +self._tag_counts
+            self._save()
+        return changes
+
+    def tags(self) -> List[str]:
+        """
+        Get the unique tags of the vault, refreshing the index first.
+
+        Returns:
+            List[str]: The sorted list of unique tags.
+        """
+        self.refresh()
+        return sorted(self._tag_counts)
+
+    def tags_for(self, relative_path: str) -> List[str]:
+        """
+        Get the indexed tags of a single note.
+
+        Args:
+            relative_path (str): The POSIX path of the note relative to the vault.
+
+        Returns:
+            List[str]: The tags of the note, or an empty list if it is not indexed.
+        """
+        indexed = self._files.get(relative_path)
+        return list(indexed[1]) if indexed else []
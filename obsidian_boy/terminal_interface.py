@@ -1,11 +1,14 @@
 from typing import List, Optional
 from pathlib import Path
 from .obsidian_interface import ObsidianInterface
+from .processing_ledger import ProcessingLedger
 from .types import Note, NoteReview, NoteStatus
 
 class TerminalInterface:
-    def __init__(self, obsidian_interface: ObsidianInterface):
+    def __init__(self, obsidian_interface: ObsidianInterface, ledger: Optional[ProcessingLedger] = None):
         self.obsidian_interface = obsidian_interface
+        # With a ledger, only new or changed notes are processed
+        self.ledger = ledger
 
     def run(self) -> None:
         """
@@ -48,11 +51,15 @@ class TerminalInterface:
         """
         return input(prompt)
 
-    def list_daily_notes(self) -> None:
+    def list_daily_notes(self, notes: Optional[List[Path]] = None) -> None:
         """
         Display a list of daily notes.
+
+        Args:
+            notes (Optional[List[Path]]): The notes to display. Defaults to all daily notes.
         """
-        notes = self.obsidian_interface.list_daily_notes()
+        if notes is None:
+            notes = self.obsidian_interface.list_daily_notes()
         print("\nDaily Notes:")
         for i, note in enumerate(notes, 1):
             print(f"{i}. {note.stem}")
@@ -66,6 +73,16 @@ class TerminalInterface:
             print("No notes selected. Returning to main menu.")
             return
 
+        if self.ledger is not None:
+            changed = self.ledger.changed_notes(
+                {note: self.obsidian_interface.read_daily_note(note) for note in selected_notes}
+            )
+            if len(changed) < len(selected_notes):
+                print(f"Skipping {len(selected_notes) - len(changed)} notes that were already processed.")
+            selected_notes = changed
+            if not selected_notes:
+                return
+
         print(f"Processing {len(selected_notes)} selected notes...")
         # Here you would call the actual processing logic
         # For now, we'll just print a placeholder message
@@ -82,7 +99,7 @@ class TerminalInterface:
             List[Path]: A list of selected note paths.
         """
         notes = self.obsidian_interface.list_daily_notes()
-        self.list_daily_notes()
+        self.list_daily_notes(notes)
         selected_indices = self.get_user_input("Enter the numbers of the notes you want to select (comma-separated): ")
         selected_indices = [int(idx.strip()) for idx in selected_indices.split(',') if idx.strip().isdigit()]
         
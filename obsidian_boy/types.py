@@ -12,6 +12,11 @@ class NoteStatus(str, Enum):
     REJECTED = "REJECTED"
     REVISION_NEEDED = "REVISION_NEEDED"
 
+class ProcessingStatus(str, Enum):
+    EXTRACTED = "EXTRACTED"
+    PROCESSED = "PROCESSED"
+    FAILED = "FAILED"
+
 class DailyNoteEntry(BaseModel):
     title: Optional[str] = Field(None, description="The title of the daily note entry")
     link: Optional[str] = Field(None, description="URL link related to the entry")
@@ -0,0 +1,241 @@
+import logging
+import multiprocessing
+import os
+from collections import Counter
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+    wait,
+)
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from .note_parser import (
+    FrontmatterValue,
+    extract_links,
+    frontmatter_tags,
+    inline_tags,
+    parse_frontmatter,
+    split_frontmatter,
+)
+
+# (mtime_ns, size) of a file, used to detect changes without reading it
+FileSignature = Tuple[int, int]
+# Forking a process that runs other threads (LLM requests, the watcher) can
+# copy a held lock into the child and deadlock it, so workers are started fresh
+_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+def walk_markdown_files(vault_path: Path) -> Iterator[Tuple[str, FileSignature]]:
+    """
+    Walk a vault and yield every Markdown file with its signature.
+
+    Hidden directories such as ``.obsidian`` and ``.trash`` are skipped.
+
+    Args:
+        vault_path (Path): The root of the vault.
+
+    Yields:
+        Tuple[str, FileSignature]: The POSIX path relative to the vault and the
+            file's ``(mtime_ns, size)``.
+    """
+    stack = [vault_path]
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except OSError as e:
+            logging.getLogger(__name__).warning(f"Cannot list {directory}: {e}")
+            continue
+        for entry in entries:
+            if entry.name.startswith("."):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                stack.append(Path(entry.path))
+            elif entry.name.endswith(".md") and entry.is_file():
+                stat = entry.stat()
+                relative = Path(entry.path).relative_to(vault_path).as_posix()
+                yield relative, (stat.st_mtime_ns, stat.st_size)
+
+
+@dataclass
+class NoteScan:
+    """The tags, links and frontmatter extracted from a single note."""
+    path: str
+    signature: FileSignature
+    tags: List[str] = field(default_factory=list)
+    links: List[str] = field(default_factory=list)
+    frontmatter: Dict[str, FrontmatterValue] = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+@dataclass
+class VaultAggregate:
+    """Vault-wide totals built up from streamed note scans."""
+    tag_counts: Counter = field(default_factory=Counter)
+    links: Dict[str, List[str]] = field(default_factory=dict)
+    notes: int = 0
+    errors: Dict[str, str] = field(default_factory=dict)
+
+    def add(self, scan: NoteScan) -> None:
+        """
+        Merge a note scan into the aggregate.
+
+        Args:
+            scan (NoteScan): The scan result of a single note.
+        """
+        self.notes += 1
+        if scan.error is not None:
+            self.errors[scan.path] = scan.error
+            return
+        self.tag_counts.update(scan.tags)
+        if scan.links:
+            self.links[scan.path] = scan.links
+
+    @property
+    def tags(self) -> List[str]:
+        """The sorted unique tags seen so far."""
+        return sorted(self.tag_counts)
+
+
+def scan_note(vault_path: str, relative_path: str, signature: FileSignature) -> NoteScan:
+    """
+    Read a note and extract its tags, links and frontmatter.
+
+    Args:
+        vault_path (str): The root of the vault.
+        relative_path (str): The POSIX path of the note relative to the vault.
+        signature (FileSignature): The ``(mtime_ns, size)`` of the note.
+
+    Returns:
+        NoteScan: The extracted data, or a scan with ``error`` set if the note
+            could not be read.
+    """
+    try:
+        content = (Path(vault_path) / relative_path).read_text(encoding="utf-8")
+    except (OSError, UnicodeDecodeError) as e:
+        return NoteScan(path=relative_path, signature=signature, error=str(e))
+    raw_frontmatter, body = split_frontmatter(content)
+    frontmatter = parse_frontmatter(raw_frontmatter)
+    tags = list(dict.fromkeys(frontmatter_tags(frontmatter) + inline_tags(body)))
+    return NoteScan(
+        path=relative_path,
+        signature=signature,
+        tags=tags,
+        links=extract_links(content),
+        frontmatter=frontmatter,
+    )
+
+
+def _scan_chunk(vault_path: str, items: List[Tuple[str, FileSignature]]) -> List[NoteScan]:
+    return [scan_note(vault_path, path, signature) for path, signature in items]
+
+
+def _chunks(items: Iterable[Tuple[str, FileSignature]], size: int) -> Iterator[List[Tuple[str, FileSignature]]]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class VaultScanner:
+    """
+    Scan notes in parallel on a thread or process pool.
+
+    Worker processes are started with ``forkserver`` (or ``spawn``) rather
+    than ``fork``, so scanning is safe while other threads are running.
+
+    Files are dispatched in chunks to keep per-task overhead low, and only a
+    bounded number of chunks is in flight so results stream back while the
+    rest of the vault is still being read. Small inputs are scanned inline
+    since starting a pool would cost more than it saves, and so are the
+    remaining notes if a worker process dies.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, use_processes: bool = True,
+                 chunk_size: int = 64, inline_threshold: int = 256):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.use_processes = use_processes
+        self.chunk_size = chunk_size
+        self.inline_threshold = inline_threshold
+        self.logger = logging.getLogger(__name__)
+
+    def _executor(self) -> Executor:
+        if self.use_processes:
+            return ProcessPoolExecutor(max_workers=self.max_workers,
+                                       mp_context=multiprocessing.get_context(_START_METHOD))
+        return ThreadPoolExecutor(max_workers=self.max_workers)
+
+    def scan(self, vault_path: Path, items: Iterable[Tuple[str, FileSignature]]) -> Iterator[NoteScan]:
+        """
+        Scan notes and stream the results as they complete.
+
+        Args:
+            vault_path (Path): The root of the vault.
+            items (Iterable[Tuple[str, FileSignature]]): Relative note paths and
+                their signatures, e.g. from ``walk_markdown_files``.
+
+        Yields:
+            NoteScan: One result per note, in completion order.
+        """
+        items = list(items)
+        root = str(vault_path)
+        if self.max_workers == 1 or len(items) <= self.inline_threshold:
+            yield from _scan_chunk(root, items)
+            return
+
+        max_in_flight = self.max_workers * 2
+        chunks = list(_chunks(items, self.chunk_size))
+        finished: Set[int] = set()
+        try:
+            with self._executor() as executor:
+                pending: Dict[Future, int] = {}
+                for index, chunk in enumerate(chunks):
+                    if len(pending) >= max_in_flight:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            scans = future.result()
+                            finished.add(pending.pop(future))
+                            yield from scans
+                    pending[executor.submit(_scan_chunk, root, chunk)] = index
+                for future in as_completed(list(pending)):
+                    scans = future.result()
+                    finished.add(pending.pop(future))
+                    yield from scans
+        except BrokenProcessPool as e:
+            # E.g. the main module cannot be imported by forkserver workers
+            self.logger.warning(f"Scan workers failed, scanning the remaining notes inline: {e}")
+            for index, chunk in enumerate(chunks):
+                if index not in finished:
+                    yield from _scan_chunk(root, chunk)
+
+    def scan_into(self, vault_path: Path, items: Iterable[Tuple[str, FileSignature]],
+                  aggregate: Optional[VaultAggregate] = None) -> VaultAggregate:
+        """
+        Scan notes and merge every result into an aggregate.
+
+        Args:
+            vault_path (Path): The root of the vault.
+            items (Iterable[Tuple[str, FileSignature]]): Relative note paths and
+                their signatures.
+            aggregate (Optional[VaultAggregate]): An aggregate to add to. A new
+                one is created if not provided.
+
+        Returns:
+            VaultAggregate: The aggregate including the new results.
+        """
+        aggregate = aggregate if aggregate is not None else VaultAggregate()
+        for scan in self.scan(vault_path, items):
+            aggregate.add(scan)
+        if aggregate.errors:
+            self.logger.warning(f"{len(aggregate.errors)} notes could not be scanned")
+        return aggregate
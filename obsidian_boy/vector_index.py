@@ -0,0 +1,239 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+# Maps a batch of texts to a (len(texts), dim) array of embeddings
+EmbeddingFunction = Callable[[Sequence[str]], np.ndarray]
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+class HashingEmbedder:
+    """
+    Offline embedding function based on feature hashing.
+
+    Words and word bigrams are hashed into a fixed number of signed buckets.
+    It needs no model download and is a reasonable default for finding
+    notes with overlapping vocabulary; any other ``EmbeddingFunction`` such
+    as a local sentence-transformer can be used instead.
+    """
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+
+    def _bucket(self, feature: str) -> Tuple[int, float]:
+        digest = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+        return digest % self.dim, 1.0 if digest >> 63 else -1.0
+
+    def __call__(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = _TOKEN_PATTERN.findall(text.lower())
+            for feature in tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]:
+                bucket, sign = self._bucket(feature)
+                vectors[row, bucket] += sign
+        return vectors
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+class VectorIndex:
+    """
+    Persistent cosine-similarity index over a memory-mapped vector array.
+
+    Vectors are L2-normalized on insert and stored as float32, or as int8
+    when ``quantize`` is set, in a file that is memory-mapped so only the
+    pages touched by a search are loaded. Items are keyed by an id such as a
+    note path or knowledge base key; inserting an existing id replaces its
+    vector and deleted rows are reused by later inserts.
+    """
+
+    SEARCH_CHUNK_ROWS = 65536
+
+    def __init__(self, path: Path, embed: EmbeddingFunction, dim: int, quantize: bool = False):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.embed = embed
+        self.dim = dim
+        self.quantize = quantize
+        self._dtype = np.int8 if quantize else np.float32
+        self._vectors_path = self.path / "vectors.bin"
+        self._meta_path = self.path / "index.json"
+        self._lock = threading.RLock()
+        self._ids: List[Optional[str]] = []
+        self._load_meta()
+        self._rows: Dict[str, int] = {item_id: row for row, item_id in enumerate(self._ids) if item_id is not None}
+        self._free = [row for row, item_id in enumerate(self._ids) if item_id is None]
+        self._capacity = 0
+        self._vectors: Optional[np.memmap] = None
+        self._map(max(len(self._ids), 1024))
+
+    def _load_meta(self) -> None:
+        if not self._meta_path.exists():
+            return
+        meta = json.loads(self._meta_path.read_text(encoding="utf-8"))
+        if meta["dim"] != self.dim or meta["quantize"] != self.quantize:
+            raise ValueError(f"{self.path} holds {meta['dim']}-dim vectors with quantize={meta['quantize']}")
+        self._ids = meta["ids"]
+
+    def _map(self, capacity: int) -> None:
+        row_bytes = self.dim * np.dtype(self._dtype).itemsize
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._vectors = None
+        with open(self._vectors_path, "ab") as f:
+            if f.tell() < capacity * row_bytes:
+                f.truncate(capacity * row_bytes)
+        self._capacity = os.path.getsize(self._vectors_path) // row_bytes
+        self._vectors = np.memmap(self._vectors_path, dtype=self._dtype, mode="r+", shape=(self._capacity, self.dim))
+
+    def _encode(self, vectors: np.ndarray) -> np.ndarray:
+        if self.quantize:
+            return np.clip(np.rint(vectors * 127), -127, 127).astype(np.int8)
+        return vectors
+
+    def _row_for(self, item_id: str) -> int:
+        if item_id in self._rows:
+            return self._rows[item_id]
+        if self._free:
+            row = self._free.pop()
+            self._ids[row] = item_id
+        else:
+            row = len(self._ids)
+            self._ids.append(item_id)
+            if row >= self._capacity:
+                self._map(self._capacity * 2)
+        self._rows[item_id] = row
+        return row
+
+    def add(self, ids: Sequence[str], texts: Sequence[str]) -> None:
+        """
+        Embed texts and insert or replace them under their ids.
+
+        Args:
+            ids (Sequence[str]): The item ids, e.g. note paths or KB keys.
+            texts (Sequence[str]): The texts to embed, one per id.
+        """
+        self.add_vectors(ids, self.embed(texts))
+
+    def add_vectors(self, ids: Sequence[str], vectors: np.ndarray) -> None:
+        """
+        Insert or replace precomputed vectors under their ids.
+
+        Args:
+            ids (Sequence[str]): The item ids.
+            vectors (np.ndarray): A ``(len(ids), dim)`` array of vectors.
+        """
+        vectors = self._encode(_normalize(vectors))
+        if vectors.shape != (len(ids), self.dim):
+            raise ValueError(f"Expected vectors of shape {(len(ids), self.dim)}, got {vectors.shape}")
+        with self._lock:
+            for item_id, vector in zip(ids, vectors):
+                row = self._row_for(item_id)
+                self._vectors[row] = vector
+
+    def delete(self, ids: Sequence[str]) -> None:
+        """
+        Remove items from the index. Unknown ids are ignored.
+
+        Args:
+            ids (Sequence[str]): The item ids.
+        """
+        with self._lock:
+            for item_id in ids:
+                row = self._rows.pop(item_id, None)
+                if row is None:
+                    continue
+                self._ids[row] = None
+                self._vectors[row] = 0
+                self._free.append(row)
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[str, float]]:
+        """
+        Find the items most similar to a text.
+
+        Args:
+            query (str): The query text.
+            k (int): The maximum number of results.
+
+        Returns:
+            List[Tuple[str, float]]: Item ids and cosine similarities, best first.
+        """
+        return self.search_vectors(self.embed([query]), k)[0]
+
+    def search_vectors(self, queries: np.ndarray, k: int = 10) -> List[List[Tuple[str, float]]]:
+        """
+        Find the items most similar to each of a batch of query vectors.
+
+        The stored vectors are scanned in chunks with one matrix product per
+        chunk, keeping the running top-k per query.
+
+        Args:
+            queries (np.ndarray): A ``(n, dim)`` array of query vectors.
+            k (int): The maximum number of results per query.
+
+        Returns:
+            List[List[Tuple[str, float]]]: The results of each query, best first.
+        """
+        queries = _normalize(queries)
+        with self._lock:
+            count = len(self._ids)
+            live = np.array([item_id is not None for item_id in self._ids], dtype=bool)
+            best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+            best_rows = np.zeros((len(queries), 0), dtype=np.int64)
+            for start in range(0, count, self.SEARCH_CHUNK_ROWS):
+                end = min(count, start + self.SEARCH_CHUNK_ROWS)
+                chunk = np.asarray(self._vectors[start:end], dtype=np.float32)
+                if self.quantize:
+                    chunk /= 127
+                scores = queries @ chunk.T
+                scores[:, ~live[start:end]] = -np.inf
+                best_scores = np.concatenate([best_scores, scores], axis=1)
+                best_rows = np.concatenate([best_rows, np.broadcast_to(np.arange(start, end), scores.shape)], axis=1)
+                if best_scores.shape[1] > k:
+                    top = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+                    best_scores = np.take_along_axis(best_scores, top, axis=1)
+                    best_rows = np.take_along_axis(best_rows, top, axis=1)
+            ids = list(self._ids)
+
+        results = []
+        for scores, rows in zip(best_scores, best_rows):
+            order = np.argsort(-scores)
+            results.append([
+                (ids[rows[i]], float(scores[i])) for i in order if np.isfinite(scores[i])
+            ])
+        return results
+
+    def flush(self) -> None:
+        """
+        Write the vectors and the id table to disk.
+        """
+        with self._lock:
+            self._vectors.flush()
+            meta = {"dim": self.dim, "quantize": self.quantize, "ids": self._ids}
+            tmp_path = self._meta_path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp_path, self._meta_path)
+
+    def close(self) -> None:
+        """
+        Flush the index and release the memory map.
+        """
+        self.flush()
+        with self._lock:
+            self._vectors = None
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self._rows
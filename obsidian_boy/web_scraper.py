@@ -1,16 +1,95 @@
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
+import codecs
 import logging
-from typing import Dict, Optional
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
 import markdownify
+from .http_cache import HttpCache
+from .instrumentation import count, span
+
+# Elements that never carry a page's main content
+BOILERPLATE_TAGS = ["script", "style", "noscript", "template", "iframe", "svg", "nav", "aside"]
+# Page chrome only outside the content, where they hold e.g. an article's title
+PAGE_CHROME_TAGS = ["header", "footer"]
+
+_HEADER_CHARSET_PATTERN = re.compile(r"charset=[\"']?([\w.:-]+)", re.IGNORECASE)
+_META_CHARSET_PATTERN = re.compile(rb"<meta[^>]+charset=[\"']?([\w.:-]+)", re.IGNORECASE)
+_BOMS = [(codecs.BOM_UTF8, "utf-8-sig"), (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16")]
+
+
+def detect_charset(content_type: Optional[str], head: bytes) -> str:
+    """
+    Detect the character encoding of an HTML document cheaply.
+
+    The byte order mark wins, then the charset of the Content-Type header,
+    then a ``<meta>`` charset declaration in the first kilobytes. Unknown
+    or missing encodings fall back to UTF-8.
+
+    Args:
+        content_type (Optional[str]): The Content-Type response header.
+        head (bytes): The beginning of the document.
+
+    Returns:
+        str: The name of a known Python codec.
+    """
+    for bom, encoding in _BOMS:
+        if head.startswith(bom):
+            return encoding
+    candidates = []
+    if content_type:
+        candidates += _HEADER_CHARSET_PATTERN.findall(content_type)
+    candidates += [match.decode("ascii", errors="ignore") for match in _META_CHARSET_PATTERN.findall(head[:4096])]
+    for candidate in candidates:
+        try:
+            return codecs.lookup(candidate).name
+        except LookupError:
+            continue
+    return "utf-8"
+
+
+def html_to_markdown(soup: BeautifulSoup) -> str:
+    """
+    Convert the main content of a parsed page to Markdown.
+
+    Boilerplate such as scripts, styles and navigation is removed in place,
+    as are headers and footers outside ``<main>`` and ``<article>``. If the
+    page marks up its ``<main>`` content or a single ``<article>`` only that
+    part is converted.
+
+    Args:
+        soup (BeautifulSoup): The parsed page. It is modified in place.
+
+    Returns:
+        str: The Markdown content.
+    """
+    for tag in soup.find_all(BOILERPLATE_TAGS):
+        tag.decompose()
+    for tag in soup.find_all(PAGE_CHROME_TAGS):
+        if tag.find_parent(["main", "article"]) is None:
+            tag.decompose()
+    articles = soup.find_all("article")
+    content = soup.find("main") or (articles[0] if len(articles) == 1 else None) or soup.body or soup
+    return markdownify.MarkdownConverter().convert_soup(content)
+
 
 class WebScraper:
     name: str = "Read website content"
     description: str = "A tool that can be used to read a website content."
 
-    def __init__(self, website_url: Optional[str] = None, cookies: Optional[dict] = None):
+    def __init__(self, website_url: Optional[str] = None, cookies: Optional[dict] = None,
+                 max_workers: int = 8, per_host_limit: int = 4, cache: Optional[HttpCache] = None,
+                 max_bytes: int = 5 * 1024 * 1024):
         self.website_url = website_url
         self.cookies = cookies
+        self.cache = cache
+        self.max_bytes = max_bytes
+        self.max_workers = max_workers
+        self.per_host_limit = per_host_limit
         self.soup: Optional[BeautifulSoup] = None
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
@@ -21,6 +100,14 @@ class WebScraper:
             'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1'
         }
+        # One session keeps connections alive per host across all scrapes
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max(max_workers, per_host_limit))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._host_slots_lock = threading.Lock()
         if website_url:
             self.description = f"A tool that can be used to read {website_url}'s content."
 
@@ -38,24 +125,123 @@ class WebScraper:
         if not website_url:
             raise ValueError("No URL provided for scraping.")
 
-        try:
-            page = requests.get(
+        markdown_content, soup = self._scrape(website_url)
+        if soup is not None:
+            self.soup = soup
+        return markdown_content
+
+    def scrape_many(self, urls: Sequence[str], max_workers: Optional[int] = None) -> List[str]:
+        """
+        Scrape several URLs concurrently over the shared session.
+
+        At most ``max_workers`` requests are in flight overall and at most
+        ``per_host_limit`` against any single host.
+
+        Args:
+            urls (Sequence[str]): The URLs to scrape.
+            max_workers (Optional[int]): The global concurrency limit. Defaults
+                to the scraper's ``max_workers``.
+
+        Returns:
+            List[str]: The Markdown content (or error message) of each URL, in
+                the order of the input URLs.
+        """
+        if not urls:
+            return []
+        workers = max(1, min(max_workers or self.max_workers, len(urls)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scrape") as executor:
+            return list(executor.map(lambda url: self._scrape(url)[0], urls))
+
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        host = urlparse(url).netloc.lower()
+        with self._host_slots_lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return self._host_slots[host]
+
+    def _fetch(self, website_url: str) -> str:
+        """
+        Fetch the HTML of a URL, using the response cache if configured.
+
+        Fresh cached responses are returned without a request. Stale ones are
+        revalidated with a conditional request and reused on a 304. The body
+        is streamed and cut off after ``max_bytes``.
+
+        Args:
+            website_url (str): The URL to fetch.
+
+        Returns:
+            str: The decoded HTML.
+
+        Raises:
+            requests.RequestException: If the request fails.
+        """
+        cached = self.cache.get(website_url) if self.cache is not None else None
+        if cached is not None and self.cache.is_fresh(cached):
+            count("scrape.cache_hits")
+            return cached.text
+
+        with self._host_slot(website_url), span("scrape.fetch"):
+            page = self.session.get(
                 website_url,
                 timeout=15,
-                headers=self.headers,
-                cookies=self.cookies or {}
+                headers=cached.conditional_headers() if cached is not None else None,
+                cookies=self.cookies or {},
+                stream=True
             )
-            page.raise_for_status()
-            page.encoding = page.apparent_encoding
-            self.soup = BeautifulSoup(page.text, "html.parser")
-            
-            # Convert the scraped HTML content to Markdown
-            markdown_content = markdownify.markdownify(str(self.soup))
-            
-            return markdown_content
+            try:
+                if cached is not None and page.status_code == 304:
+                    count("scrape.revalidated")
+                    self.cache.touch(website_url)
+                    return cached.text
+                page.raise_for_status()
+                body = self._read_body(page, website_url)
+            finally:
+                page.close()
+        count("scrape.bytes", len(body))
+
+        encoding = detect_charset(page.headers.get("Content-Type"), body[:4096])
+        if self.cache is not None:
+            self.cache.put(
+                website_url,
+                body,
+                encoding=encoding,
+                etag=page.headers.get("ETag"),
+                last_modified=page.headers.get("Last-Modified"),
+            )
+        return body.decode(encoding, errors="replace")
+
+    def _read_body(self, page: requests.Response, website_url: str) -> bytes:
+        chunks = []
+        size = 0
+        for chunk in page.iter_content(chunk_size=64 * 1024):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= self.max_bytes:
+                logging.warning(f"Truncated {website_url} after {self.max_bytes} bytes")
+                break
+        return b"".join(chunks)[:self.max_bytes]
+
+    def _scrape(self, website_url: str) -> Tuple[str, Optional[BeautifulSoup]]:
+        try:
+            html = self._fetch(website_url)
+            with span("scrape.convert"):
+                soup = BeautifulSoup(html, "html.parser")
+
+                # Convert the scraped HTML content to Markdown
+                markdown_content = html_to_markdown(soup)
+
+            return markdown_content, soup
         except requests.RequestException as e:
+            count("scrape.errors")
             logging.error(f"Error scraping {website_url}: {str(e)}")
-            return f"Error scraping {website_url}: {str(e)}"
+            return f"Error scraping {website_url}: {str(e)}", None
+
+    def close(self) -> None:
+        """
+        Close the pooled connections of the scraper's session.
+        """
+        self.session.close()
 
     def _extract_title(self, soup: BeautifulSoup) -> str:
         """Extract the title of the page."""
@@ -0,0 +1,213 @@
+import io
+import json
+import pytest
+from datetime import date
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+from obsidian_boy import cli
+from obsidian_boy.batch import (EXIT_ERROR, EXIT_FAILED, EXIT_OK, EXIT_USAGE, BatchRunner, ProgressReporter,
+                                entry_urls, select_notes)
+from obsidian_boy.daily_note_catalog import DailyNoteCatalog
+from obsidian_boy.knowledge_base import SQLiteKnowledgeBase
+from obsidian_boy.obsidian_interface import ObsidianInterface
+from obsidian_boy.processing_ledger import ProcessingLedger
+from obsidian_boy.types import DailyNoteEntry, ProcessingStatus
+
+NOTES = ["2024-04-29", "2024-04-30", "2024-05-01", "2024-05-02", "2024-05-03"]
+
+@pytest.fixture
+def vault(tmp_path):
+    daily = tmp_path / "Daily"
+    daily.mkdir()
+    for name in NOTES:
+        (daily / f"{name}.md").write_text(f"- [{name}](https://example.com/{name})", encoding="utf-8")
+    (daily / "Ideas.md").write_text("- not a dated note", encoding="utf-8")
+    return tmp_path
+
+@pytest.fixture
+def obsidian_interface(vault):
+    return ObsidianInterface(vault_path=vault)
+
+@pytest.fixture
+def ledger(tmp_path):
+    ledger = ProcessingLedger(tmp_path / "ledger.sqlite")
+    yield ledger
+    ledger.close()
+
+class FakeProcessor:
+    """Returns one entry per note linking to the note's URL and fails on notes containing 'boom'."""
+
+    def __init__(self):
+        self.calls = []
+        self.closed = False
+
+    def _entries(self, content):
+        if "boom" in content:
+            raise RuntimeError("extraction failed")
+        link = content[content.index("(") + 1:content.index(")")] if "(" in content else None
+        return [DailyNoteEntry(title="Entry", link=link)]
+
+    def iter_extract_entries(self, contents):
+        self.calls.append(list(contents))
+        for content in contents:
+            yield self._entries(content)
+
+    def extract_entries(self, content):
+        self.calls.append([content])
+        return self._entries(content)
+
+    def close(self):
+        self.closed = True
+
+def events(stream):
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+def note_events(stream):
+    return [(Path(event["path"]).stem, event["status"]) for event in events(stream) if event["event"] == "note"]
+
+def test_select_notes_by_date_range_oldest_first(vault):
+    catalog = DailyNoteCatalog(vault / "Daily")
+    selected = select_notes(catalog, since=date(2024, 4, 30), until=date(2024, 5, 2))
+    assert [path.stem for path in selected] == ["2024-04-30", "2024-05-01", "2024-05-02"]
+    assert [path.stem for path in select_notes(catalog, since=date(2024, 5, 2))] == ["2024-05-02", "2024-05-03"]
+
+def test_select_notes_by_glob_and_latest(vault):
+    catalog = DailyNoteCatalog(vault / "Daily")
+    assert [path.stem for path in select_notes(catalog, pattern="2024-04-*")] == ["2024-04-29", "2024-04-30"]
+    assert [path.stem for path in select_notes(catalog, latest=2)] == ["2024-05-02", "2024-05-03"]
+    # Without a date range undated notes are included too
+    assert "Ideas" in [path.stem for path in select_notes(catalog)]
+
+def test_entry_urls():
+    entries = [
+        DailyNoteEntry(link="[Docs](https://example.com/docs)"),
+        DailyNoteEntry(link="https://example.com/docs"),
+        DailyNoteEntry(link="see http://example.org/a, then"),
+        DailyNoteEntry(link=None),
+    ]
+    assert entry_urls(entries) == ["https://example.com/docs", "http://example.org/a"]
+
+def test_progress_reporter_writes_json_lines():
+    stream = io.StringIO()
+    ProgressReporter(stream).emit("note", path=Path("a.md"), status="extracted")
+    event = json.loads(stream.getvalue())
+    assert event["event"] == "note" and event["path"] == "a.md" and "time" in event
+
+def test_dry_run_reports_pending_notes_without_processing(obsidian_interface, ledger):
+    stream = io.StringIO()
+    paths = select_notes(obsidian_interface.daily_notes, pattern="2024-*")
+    summary = BatchRunner(obsidian_interface, ledger=ledger, reporter=ProgressReporter(stream), dry_run=True).run(paths)
+    assert summary.pending == len(NOTES) and summary.extracted == 0
+    assert all(status == "pending" for _, status in note_events(stream))
+    assert ledger.changed_notes({path: path.read_text() for path in paths}) == paths
+
+def test_runner_requires_a_processor_unless_dry_run(obsidian_interface):
+    with pytest.raises(ValueError):
+        BatchRunner(obsidian_interface)
+
+def test_run_records_notes_and_skips_them_next_time(obsidian_interface, ledger):
+    paths = select_notes(obsidian_interface.daily_notes, pattern="2024-*")
+    stream = io.StringIO()
+    processor = FakeProcessor()
+    summary = BatchRunner(obsidian_interface, processor, ledger=ledger, reporter=ProgressReporter(stream),
+                          chunk_size=2).run(paths)
+
+    assert summary.extracted == len(NOTES) and summary.entries == len(NOTES)
+    assert summary.exit_code == EXIT_OK
+    assert [len(call) for call in processor.calls] == [2, 2, 1]
+    assert note_events(stream) == [(name, "extracted") for name in NOTES]
+    assert events(stream)[0]["event"] == "start" and events(stream)[-1]["event"] == "done"
+    assert all(ledger.is_current(path, path.read_text()) for path in paths)
+
+    stream = io.StringIO()
+    summary = BatchRunner(obsidian_interface, processor, ledger=ledger, reporter=ProgressReporter(stream)).run(paths)
+    assert summary.skipped == len(NOTES) and summary.extracted == 0
+    assert len(processor.calls) == 3
+
+def test_failing_notes_are_isolated_and_retried(obsidian_interface, ledger, vault):
+    bad = vault / "Daily" / "2024-05-01.md"
+    bad.write_text("- boom", encoding="utf-8")
+    paths = select_notes(obsidian_interface.daily_notes, pattern="2024-*")
+    stream = io.StringIO()
+    summary = BatchRunner(obsidian_interface, FakeProcessor(), ledger=ledger, reporter=ProgressReporter(stream)).run(paths)
+
+    assert summary.failed == 1 and summary.extracted == len(NOTES) - 1
+    assert summary.exit_code == EXIT_FAILED
+    assert ("2024-05-01", "failed") in note_events(stream)
+    assert ledger.note_status(bad, bad.read_text()) == ProcessingStatus.FAILED
+    # Failed notes are picked up again on the next run
+    assert ledger.changed_notes({path: path.read_text() for path in paths}) == [bad]
+
+def test_links_are_scraped_into_the_knowledge_base(obsidian_interface, ledger, tmp_path):
+    paths = select_notes(obsidian_interface.daily_notes, pattern="2024-05-0[12]")
+    scraper = MagicMock()
+    scraper.scrape_many.side_effect = lambda urls: [
+        f"Error scraping {url}: 404" if url.endswith("05-02") else f"# {url}" for url in urls
+    ]
+    knowledge_base = SQLiteKnowledgeBase(tmp_path / "kb")
+    stream = io.StringIO()
+    summary = BatchRunner(obsidian_interface, FakeProcessor(), ledger=ledger, scraper=scraper,
+                          knowledge_base=knowledge_base, reporter=ProgressReporter(stream)).run(paths)
+
+    assert summary.scraped == 1 and summary.scrape_failed == 1
+    assert summary.exit_code == EXIT_OK
+    assert knowledge_base.retrieve("https://example.com/2024-05-01") == "# https://example.com/2024-05-01"
+    scrapes = [(event["url"], event["status"]) for event in events(stream) if event["event"] == "scrape"]
+    assert scrapes == [("https://example.com/2024-05-01", "stored"), ("https://example.com/2024-05-02", "failed")]
+
+    # Stored pages are not fetched again
+    BatchRunner(obsidian_interface, FakeProcessor(), scraper=scraper, knowledge_base=knowledge_base,
+                reporter=ProgressReporter(io.StringIO())).run(paths)
+    assert scraper.scrape_many.call_args.args[0] == ["https://example.com/2024-05-02"]
+    knowledge_base.close()
+
+def test_cli_batch_dry_run(vault, capsys):
+    code = cli.main(["--vault", str(vault), "batch", "--dry-run", "--since", "2024-05-01", "--until", "2024-05-02"])
+    assert code == EXIT_OK
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [Path(line["path"]).stem for line in lines if line["event"] == "note"] == ["2024-05-01", "2024-05-02"]
+    assert lines[-1]["event"] == "done" and lines[-1]["pending"] == 2
+
+def test_cli_batch_exit_codes(vault, tmp_path, capsys):
+    assert cli.main(["--vault", str(tmp_path / "missing"), "batch", "--dry-run"]) == EXIT_ERROR
+    assert json.loads(capsys.readouterr().out)["event"] == "error"
+    with pytest.raises(SystemExit) as exc_info:
+        cli.main(["--vault", str(vault), "batch", "--since", "May 1st"])
+    assert exc_info.value.code == EXIT_USAGE
+
+    (vault / "Daily" / "2024-05-03.md").write_text("- boom", encoding="utf-8")
+    processor = FakeProcessor()
+    with patch.object(cli, "_make_processor", return_value=(processor, None)):
+        assert cli.main(["--vault", str(vault), "batch", "--glob", "2024-05-*"]) == EXIT_FAILED
+    assert processor.closed
+    with patch.object(cli, "_make_processor", return_value=(FakeProcessor(), None)):
+        # Only the failed note is retried
+        assert cli.main(["--vault", str(vault), "batch", "--glob", "2024-05-*"]) == EXIT_FAILED
+    done = [json.loads(line) for line in capsys.readouterr().out.splitlines()][-1]
+    assert done["skipped"] == 2 and done["failed"] == 1
+
+def test_cli_batch_fails_when_the_llm_fails(vault, capsys):
+    from obsidian_boy.daily_note_processor import DailyNoteProcessor
+    from obsidian_boy.llm_caller import RetryPolicy
+
+    llm = MagicMock()
+    llm._llm_type = "fake"
+    llm.with_structured_output.return_value.invoke.side_effect = ValueError("invalid output")
+    processor = DailyNoteProcessor(llm, retry_policy=RetryPolicy(max_attempts=1))
+    with patch.object(cli, "_make_processor", return_value=(processor, None)):
+        assert cli.main(["--vault", str(vault), "batch", "--glob", "2024-05-0[12]"]) == EXIT_FAILED
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [(Path(line["path"]).stem, line["status"]) for line in lines if line["event"] == "note"] == [
+        ("2024-05-01", "failed"), ("2024-05-02", "failed")
+    ]
+
+    ledger = ProcessingLedger(vault / ".obsidian-boy" / "ledger.sqlite")
+    for name in ["2024-05-01", "2024-05-02"]:
+        note = vault / "Daily" / f"{name}.md"
+        assert ledger.note_status(note, note.read_text(encoding="utf-8")) == ProcessingStatus.FAILED
+    ledger.close()
+
+def test_cli_batch_setup_failure(vault, capsys):
+    with patch.object(cli, "_make_processor", side_effect=RuntimeError("no API key")):
+        assert cli.main(["--vault", str(vault), "batch"]) == EXIT_ERROR
+    assert "no API key" in json.loads(capsys.readouterr().out)["message"]
@@ -0,0 +1,63 @@
+import hashlib
+import pytest
+from benchmarks.fakes import FakeChatModel, LocalHttpServer
+from benchmarks.run import format_report, main, measure
+from benchmarks.synthetic_vault import VaultSpec, generate_vault
+from obsidian_boy.daily_note_processor import DailyNoteProcessor
+from obsidian_boy.web_scraper import WebScraper
+
+SPEC = VaultSpec(notes=20, daily_notes=5, folders=3)
+
+def vault_digest(path):
+    digest = hashlib.sha256()
+    for note in sorted(path.rglob("*.md")):
+        digest.update(str(note.relative_to(path)).encode())
+        digest.update(note.read_bytes())
+    return digest.hexdigest()
+
+def test_generated_vault_is_deterministic(tmp_path):
+    first = generate_vault(tmp_path / "a", SPEC)
+    second = generate_vault(tmp_path / "b", SPEC)
+    assert vault_digest(first) == vault_digest(second)
+    assert len(list((first / "Daily").glob("*.md"))) == 5
+    assert len(list(first.glob("Folder */*.md"))) == 20
+    assert vault_digest(generate_vault(tmp_path / "c", VaultSpec(notes=20, daily_notes=5, folders=3, seed=1))) != vault_digest(first)
+
+def test_fake_chat_model_extracts_free_form_and_batched_sections():
+    llm = FakeChatModel(latency=0.0)
+    processor = DailyNoteProcessor(llm, batch_token_budget=2000)
+    notes = ["Read about agents at https://example.com/a today.\n\nAnother idea about vectors."] * 2
+    entries = processor.extract_entries_many(notes)
+    assert [entry.link for entry in entries[0]] == ["https://example.com/a", None]
+    assert entries[0] == entries[1]
+    assert llm.calls == 1
+
+def test_fake_chat_model_counts_concurrent_calls():
+    llm = FakeChatModel(latency=0.0)
+    processor = DailyNoteProcessor(llm, max_concurrency=8, fast_path=False)
+    processor.extract_entries_many([f"Idea number {i} about agents." for i in range(200)])
+    assert llm.calls == 200
+
+def test_local_http_server_serves_pages_and_revalidates():
+    with LocalHttpServer() as server:
+        scraper = WebScraper()
+        markdown = scraper.scrape(server.url(7))
+        response = scraper.session.get(server.url(7), headers={"If-None-Match": '"page-7"'})
+    assert "Paragraph 0 of page 7" in markdown
+    assert "tracking" not in markdown
+    assert response.status_code == 304
+    assert server.requests == 2
+
+def test_measure_reports_runs_and_memory():
+    result = measure("alloc", lambda size: bytearray(size), 1, 3, setup=lambda: 1 << 20)
+    assert len(result.runs) == 3
+    assert result.peak_bytes >= 1 << 20
+    assert "alloc" in format_report([result])
+
+def test_main_runs_selected_suites(tmp_path, capsys):
+    report_path = tmp_path / "report.json"
+    assert main(["--notes", "10", "--daily-notes", "5", "--repeat", "1", "--llm-latency", "0",
+                 "--only", "vault", "daily_notes", "--json", str(report_path)]) == 0
+    output = capsys.readouterr().out
+    assert "vault.tag_index.cold" in output and "daily_notes.extract.batch_2000" in output
+    assert report_path.exists()
@@ -0,0 +1,145 @@
+import pytest
+import threading
+from unittest.mock import Mock
+from obsidian_boy.cached_knowledge_base import CachedKnowledgeBase
+from obsidian_boy.knowledge_base import FileSystemKnowledgeBase
+
+@pytest.fixture
+def inner(tmp_path):
+    inner = FileSystemKnowledgeBase(tmp_path / "kb")
+    inner.store("a", "alpha")
+    inner.store("b", "beta")
+    return Mock(wraps=inner)
+
+def test_repeated_reads_hit_the_cache(inner):
+    kb = CachedKnowledgeBase(inner)
+    assert [kb.retrieve("a") for _ in range(3)] == ["alpha"] * 3
+    assert inner.retrieve.call_count == 1
+    assert (kb.stats.hits, kb.stats.misses) == (2, 1)
+
+def test_missing_keys_are_not_cached(inner):
+    kb = CachedKnowledgeBase(inner)
+    for _ in range(2):
+        with pytest.raises(KeyError):
+            kb.retrieve("missing")
+    assert inner.retrieve.call_count == 2
+
+def test_lru_evicts_by_entries(inner):
+    kb = CachedKnowledgeBase(inner, max_entries=1)
+    kb.retrieve("a")
+    kb.retrieve("b")
+    kb.retrieve("a")
+    assert inner.retrieve.call_count == 3
+    assert kb.stats.evictions == 2
+    assert len(kb) == 1
+
+def test_lru_evicts_by_bytes(inner):
+    kb = CachedKnowledgeBase(inner, max_bytes=CachedKnowledgeBase._size("alpha") + 10)
+    kb.retrieve("a")
+    kb.retrieve("b")
+    assert len(kb) == 1
+    kb.retrieve("b")
+    assert inner.retrieve.call_count == 2
+
+def test_retrieve_many_reads_only_uncached_keys(inner):
+    kb = CachedKnowledgeBase(inner)
+    kb.retrieve("a")
+    assert kb.retrieve_many(["a", "b", "missing"]) == {"a": "alpha", "b": "beta"}
+    inner.retrieve_many.assert_called_once_with(["b", "missing"])
+
+def test_write_through_stores_immediately(inner):
+    kb = CachedKnowledgeBase(inner)
+    kb.store("c", "gamma")
+    inner.store_many.assert_called_once_with({"c": "gamma"})
+    assert kb.retrieve("c") == "gamma"
+    assert inner.retrieve.call_count == 0
+
+def test_write_behind_buffers_until_flush(inner):
+    kb = CachedKnowledgeBase(inner, max_entries=1, write_behind=True)
+    kb.store("c", "gamma")
+    kb.store("d", "delta")
+    inner.store_many.assert_not_called()
+    assert kb.retrieve("c") == "gamma"
+    assert set(kb.keys()) == {"a", "b", "c", "d"}
+
+    kb.flush()
+    inner.store_many.assert_called_once_with({"c": "gamma", "d": "delta"})
+    assert kb.flush_stats.flushes == 1
+    assert kb.flush_stats.entries == 2
+    kb.flush()
+    assert kb.flush_stats.flushes == 1
+
+def test_write_behind_flushes_when_buffer_is_full(inner):
+    kb = CachedKnowledgeBase(inner, write_behind=True, max_pending=2)
+    kb.store("c", "gamma")
+    kb.store("d", "delta")
+    inner.store_many.assert_called_once_with({"c": "gamma", "d": "delta"})
+
+def test_failed_flush_keeps_entries_buffered(inner):
+    kb = CachedKnowledgeBase(inner, write_behind=True)
+    kb.store("c", "gamma")
+    inner.store_many.side_effect = OSError("disk full")
+    with pytest.raises(OSError):
+        kb.flush()
+    inner.store_many.side_effect = None
+    kb.close()
+    assert inner.retrieve("c") == "gamma"
+
+def test_entries_stay_visible_while_flushing(inner):
+    # A single cache slot, so the buffered entries are evicted from the LRU
+    kb = CachedKnowledgeBase(inner, max_entries=1, write_behind=True)
+    kb.store_many({"c": "gamma", "d": "delta"})
+    kb.retrieve("a")
+    writing, release = threading.Event(), threading.Event()
+
+    def slow_store_many(items):
+        writing.set()
+        release.wait(5)
+        return inner._mock_wraps.store_many(items)
+
+    inner.store_many.side_effect = slow_store_many
+    flusher = threading.Thread(target=kb.flush)
+    flusher.start()
+    try:
+        assert writing.wait(5)
+        assert kb.retrieve("c") == "gamma"
+        assert kb.retrieve_many(["c", "d"]) == {"c": "gamma", "d": "delta"}
+        assert {"c", "d"} <= set(kb.keys())
+    finally:
+        release.set()
+        flusher.join()
+    assert inner.retrieve("d") == "delta"
+
+@pytest.mark.parametrize("read", [
+    lambda kb: kb.retrieve("a"),
+    lambda kb: kb.retrieve_many(["a"]),
+])
+def test_reads_racing_a_store_do_not_cache_stale_content(inner, read):
+    kb = CachedKnowledgeBase(inner)
+    reading, release = threading.Event(), threading.Event()
+
+    def slow(method):
+        def call(*args):
+            result = method(*args)
+            reading.set()
+            release.wait(5)
+            return result
+        return call
+
+    inner.retrieve.side_effect = slow(inner._mock_wraps.retrieve)
+    inner.retrieve_many.side_effect = slow(inner._mock_wraps.retrieve_many)
+    reader = threading.Thread(target=read, args=(kb,))
+    reader.start()
+    try:
+        assert reading.wait(5)
+        kb.store("a", "new")
+    finally:
+        release.set()
+        reader.join()
+    assert inner.retrieve("a") == "new"
+    assert kb.retrieve("a") == "new"
+
+def test_context_manager_flushes_on_exit(inner):
+    with CachedKnowledgeBase(inner, write_behind=True) as kb:
+        kb.store("c", "gamma")
+    assert inner.retrieve("c") == "gamma"
@@ -0,0 +1,127 @@
+import json
+import subprocess
+import sys
+import pytest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+from obsidian_boy import cli
+from obsidian_boy.types import DailyNoteEntry
+
+# Modules that must not be imported before a command needs them
+HEAVY_MODULES = ["langchain", "langchain_core", "langchain_openai", "langchain_anthropic", "phoenix",
+                 "openinference", "opentelemetry", "requests", "bs4", "markdownify", "numpy"]
+# Listing takes about 0.2s; importing LangChain alone would take about a second
+STARTUP_SECONDS = 0.5
+
+@pytest.fixture
+def vault(tmp_path):
+    daily = tmp_path / "Daily"
+    daily.mkdir()
+    for name in ["2024-04-30", "2024-05-01", "2024-05-02"]:
+        (daily / f"{name}.md").write_text(f"- [Link](https://example.com/{name})", encoding="utf-8")
+    return tmp_path
+
+def run_cli(code: str):
+    return subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                          cwd=Path(__file__).parent.parent)
+
+def test_listing_notes_does_not_import_providers_tracing_or_scraping(vault):
+    code = (
+        "import sys, json\n"
+        "from obsidian_boy.cli import main\n"
+        f"main(['--vault', {str(vault)!r}, 'list'])\n"
+        f"print(json.dumps(sorted(m for m in {HEAVY_MODULES!r} if m in sys.modules)))\n"
+    )
+    result = run_cli(code)
+    *listing, imported = result.stdout.strip().splitlines()
+    assert json.loads(imported) == []
+    assert "1. 2024-05-02" in listing
+
+def test_startup_time(vault):
+    code = (
+        "import time\n"
+        "start = time.perf_counter()\n"
+        "from obsidian_boy.cli import main\n"
+        f"main(['--vault', {str(vault)!r}, 'list'])\n"
+        "print(time.perf_counter() - start)\n"
+    )
+    # The best of a few runs, to be robust against a busy machine
+    elapsed = min(float(run_cli(code).stdout.strip().splitlines()[-1]) for _ in range(3))
+    assert elapsed < STARTUP_SECONDS
+
+def test_list_month(vault, capsys):
+    assert cli.main(["--vault", str(vault), "list", "--month", "2024-05"]) == 0
+    output = capsys.readouterr().out
+    assert "2024-05-02" in output and "2024-05-01" in output
+    assert "2024-04-30" not in output
+
+@pytest.mark.parametrize("month", ["2024-13", "2024"])
+def test_list_rejects_invalid_month(vault, month, capsys):
+    with pytest.raises(SystemExit) as exc_info:
+        cli.main(["--vault", str(vault), "list", "--month", month])
+    assert exc_info.value.code == 2
+    assert "expected YYYY-MM" in capsys.readouterr().err
+
+def test_list_latest(vault, capsys):
+    assert cli.main(["--vault", str(vault), "list", "--latest", "1"]) == 0
+    output = capsys.readouterr().out
+    assert "1. 2024-05-02" in output
+    assert "2024-05-01" not in output
+
+def test_process_records_failed_notes(vault, capsys):
+    from obsidian_boy.llm_caller import LLMCallError
+    from obsidian_boy.processing_ledger import ProcessingLedger
+    from obsidian_boy.types import ProcessingStatus
+
+    def fail(contents):
+        raise LLMCallError({"fake": RuntimeError("down")})
+        yield
+
+    processor = MagicMock()
+    processor.iter_extract_entries.side_effect = fail
+    with patch.object(cli, "_make_processor", return_value=(processor, None)), \
+            patch("builtins.input", return_value="1"):
+        assert cli.main(["--vault", str(vault), "process"]) == 1
+    assert "Processing stopped" in capsys.readouterr().out
+    processor.close.assert_called_once()
+
+    note = vault / "Daily" / "2024-05-02.md"
+    ledger = ProcessingLedger(vault / ".obsidian-boy" / "ledger.sqlite")
+    assert ledger.note_status(note, note.read_text(encoding="utf-8")) == ProcessingStatus.FAILED
+    assert not ledger.is_current(note, note.read_text(encoding="utf-8"))
+    ledger.close()
+
+def test_watch_closes_the_processor_and_cache_when_interrupted(vault):
+    processor, cache = MagicMock(), MagicMock()
+    with patch.object(cli, "_make_processor", return_value=(processor, cache)), \
+            patch("obsidian_boy.daily_note_watcher.DailyNoteWatcher.run_forever", side_effect=RuntimeError("stopped")):
+        with pytest.raises(RuntimeError):
+            cli.main(["--vault", str(vault), "watch"])
+    processor.close.assert_called_once()
+    cache.close.assert_called_once()
+
+def test_unknown_provider_is_rejected(vault):
+    with pytest.raises(SystemExit):
+        cli.main(["--vault", str(vault), "process", "--provider", "nope"])
+
+def test_process_extracts_selected_notes(vault, capsys):
+    entry = DailyNoteEntry(title="Link", link="https://example.com/2024-05-02", description="A link",
+                           tags=[], todo=None)
+    processor = MagicMock()
+    processor.iter_extract_entries.side_effect = lambda contents: iter([[entry] for _ in contents])
+    cache = MagicMock()
+    cache.stats.hits, cache.stats.misses = 0, 1
+
+    with patch.object(cli, "_make_processor", return_value=(processor, cache)), \
+            patch("builtins.input", return_value="1"):
+        assert cli.main(["--vault", str(vault), "process"]) == 0
+    output = capsys.readouterr().out
+    assert "Entries extracted from 2024-05-02.md" in output
+    assert "Link: https://example.com/2024-05-02" in output
+
+    # The note is unchanged, so it is skipped on the next run
+    with patch.object(cli, "_make_processor", return_value=(processor, cache)), \
+            patch("builtins.input", return_value="1"):
+        cli.main(["--vault", str(vault), "process"])
+    assert "Skipping 1 unchanged notes" in capsys.readouterr().out
+    assert processor.iter_extract_entries.call_args.args[0] == []
@@ -0,0 +1,65 @@
+import os
+import pytest
+from datetime import date
+from unittest.mock import patch
+from obsidian_boy.daily_note_catalog import DailyNoteCatalog, parse_note_date
+
+DATES = ["2023-12-30", "2024-01-01", "2024-01-15", "2024-01-31", "2024-02-01", "2024-03-10"]
+
+@pytest.fixture
+def daily_dir(tmp_path):
+    for stem in DATES + ["Weekly review"]:
+        (tmp_path / f"{stem}.md").write_text("note", encoding="utf-8")
+    (tmp_path / "attachment.png").write_bytes(b"")
+    old = 1_600_000_000
+    os.utime(tmp_path, (old, old))
+    return tmp_path
+
+@pytest.fixture
+def catalog(daily_dir):
+    return DailyNoteCatalog(daily_dir)
+
+def stems(notes):
+    return [note.path.stem for note in notes]
+
+@pytest.mark.parametrize("stem, expected", [
+    ("2024-05-01", date(2024, 5, 1)),
+    ("2024-05-01 Wednesday", date(2024, 5, 1)),
+    ("2024-02-30", None),
+    ("Inbox", None),
+])
+def test_parse_note_date(stem, expected):
+    assert parse_note_date(stem) == expected
+
+def test_paths_include_undated_notes(catalog):
+    assert [path.stem for path in catalog.paths()] == ["Weekly review"] + DATES[::-1]
+    assert len(catalog) == len(DATES)
+
+def test_latest_and_pages(catalog):
+    assert stems(catalog.latest(2)) == ["2024-03-10", "2024-02-01"]
+    assert stems(catalog.page(1, 4)) == ["2024-01-01", "2023-12-30"]
+    assert catalog.page(2, 4) == []
+
+def test_range_queries(catalog):
+    assert stems(catalog.month(2024, 1)) == ["2024-01-31", "2024-01-15", "2024-01-01"]
+    assert stems(catalog.month(2023, 12)) == ["2023-12-30"]
+    assert stems(catalog.between(date(2024, 1, 15), date(2024, 2, 1))) == ["2024-02-01", "2024-01-31", "2024-01-15"]
+    assert stems(catalog.since(date(2024, 1, 31))) == ["2024-03-10", "2024-02-01"]
+
+def test_listing_is_cached_until_directory_changes(catalog, daily_dir):
+    with patch("obsidian_boy.daily_note_catalog.os.scandir", wraps=os.scandir) as scandir:
+        catalog.notes()
+        catalog.latest(3)
+        catalog.month(2024, 1)
+        assert scandir.call_count == 1
+
+        (daily_dir / "2024-04-01.md").write_text("note", encoding="utf-8")
+        assert catalog.latest(1)[0].date == date(2024, 4, 1)
+        assert scandir.call_count == 2
+
+def test_missing_directory(tmp_path):
+    catalog = DailyNoteCatalog(tmp_path / "Daily")
+    assert catalog.paths() == []
+    (tmp_path / "Daily").mkdir()
+    (tmp_path / "Daily" / "2024-01-01.md").write_text("note", encoding="utf-8")
+    assert len(catalog) == 1
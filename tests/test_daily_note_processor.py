@@ -0,0 +1,293 @@
+import re
+import threading
+import time
+import pytest
+from unittest.mock import MagicMock
+from obsidian_boy.daily_note_processor import (
+    BATCH_PROMPT_OVERHEAD_TOKENS,
+    PROMPT_OVERHEAD_TOKENS,
+    SECTION_OVERHEAD_TOKENS,
+    BatchedDailyNoteResponse,
+    DailyNoteProcessor,
+    DailyNoteResponse,
+    SectionEntries,
+)
+from obsidian_boy.extraction_cache import ExtractionCache
+from obsidian_boy.llm_caller import LLMCallError
+from obsidian_boy.prompt_compaction import estimate_tokens
+from obsidian_boy.rate_limiter import RateLimiterRegistry
+from obsidian_boy.types import DailyNoteEntry
+
+def make_llm(respond):
+    """Build a mock chat model whose structured output calls respond(prompt)."""
+    llm = MagicMock()
+    llm._llm_type = "fake-chat"
+    llm.openai_api_base = None
+    llm.anthropic_api_url = None
+    llm.with_structured_output.return_value.invoke.side_effect = respond
+    return llm
+
+def entries_for(prompt):
+    title = prompt.split("Daily note content:")[1].strip()
+    return DailyNoteResponse(entries=[DailyNoteEntry(title=title)])
+
+@pytest.fixture
+def llm():
+    return make_llm(entries_for)
+
+def test_extract_entries(llm):
+    processor = DailyNoteProcessor(llm)
+    entries = processor.extract_entries("Some test content")
+    assert entries == [DailyNoteEntry(title="Some test content")]
+    llm.with_structured_output.assert_called_with(DailyNoteResponse)
+
+def test_extract_entries_exception():
+    def fail(prompt):
+        raise RuntimeError("boom")
+
+    processor = DailyNoteProcessor(make_llm(fail))
+    # Failures are raised instead of dropping the note's entries
+    with pytest.raises(LLMCallError):
+        processor.extract_entries("Some content")
+
+def test_extract_entries_many_keeps_order_and_overlaps_calls():
+    in_flight = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def slow(prompt):
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        # Later notes finish first to check ordered delivery
+        time.sleep(0.05 if "note0" in prompt else 0.01)
+        with lock:
+            in_flight -= 1
+        return entries_for(prompt)
+
+    processor = DailyNoteProcessor(make_llm(slow), max_concurrency=3)
+    notes = [f"note{i}" for i in range(6)]
+    results = processor.extract_entries_many(notes)
+
+    assert [entries[0].title for entries in results] == notes
+    assert 1 < peak <= 3
+
+def test_extract_entries_many_empty(llm):
+    assert DailyNoteProcessor(llm).extract_entries_many([]) == []
+
+def test_extract_entries_uses_provider_rate_limiter(llm):
+    registry = RateLimiterRegistry({"fake-chat": 1000.0})
+    processor = DailyNoteProcessor(llm, rate_limiters=registry)
+    limiter = registry.get("fake-chat")
+    limiter.acquire = MagicMock()
+
+    processor.extract_entries_many(["a", "b"])
+
+    assert limiter.acquire.call_count == 2
+
+def test_extract_entries_served_from_cache(llm, tmp_path):
+    cache = ExtractionCache(tmp_path / "cache.sqlite")
+    processor = DailyNoteProcessor(llm, cache=cache)
+
+    first = processor.extract_entries("Cached note")
+    second = processor.extract_entries("Cached note")
+
+    assert first == second == [DailyNoteEntry(title="Cached note")]
+    assert llm.with_structured_output.return_value.invoke.call_count == 1
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+def test_failed_extraction_is_not_cached(tmp_path):
+    def fail(prompt):
+        raise RuntimeError("boom")
+
+    cache = ExtractionCache(tmp_path / "cache.sqlite")
+    with pytest.raises(LLMCallError):
+        DailyNoteProcessor(make_llm(fail), cache=cache).extract_entries("note")
+    assert len(cache) == 0
+
+def test_fast_path_skips_llm_for_well_formed_note(llm):
+    note = "---\ntype: daily\n---\n## Test\n[Test](https://test.com)\nA test\n#test\n"
+    entries = DailyNoteProcessor(llm).extract_entries(note)
+    assert entries == [DailyNoteEntry(title="Test", link="https://test.com", description="A test", tags=["test"])]
+    llm.with_structured_output.return_value.invoke.assert_not_called()
+
+def test_fast_path_sends_only_ambiguous_sections(llm):
+    note = "## First\nA test\n## Messy\nline one\nline two\n## Last\nhttps://last.com\n"
+    entries = DailyNoteProcessor(llm).extract_entries(note)
+
+    prompt = llm.with_structured_output.return_value.invoke.call_args[0][0]
+    assert "Messy" in prompt
+    assert "First" not in prompt and "Last" not in prompt
+    assert [entry.title for entry in entries][0] == "First"
+    assert entries[-1].title == "Last"
+    assert len(entries) == 3
+
+def test_fast_path_disabled(llm):
+    DailyNoteProcessor(llm, fast_path=False).extract_entries("## Test\nA test\n")
+    llm.with_structured_output.return_value.invoke.assert_called_once()
+
+def test_sections_are_extracted_separately_and_in_order(llm):
+    note = "## One\nline\nline\n## Two\nline\nline\n"
+    entries = DailyNoteProcessor(llm, fast_path=False).extract_entries(note)
+    assert llm.with_structured_output.return_value.invoke.call_count == 2
+    assert "One" in entries[0].title and "Two" in entries[1].title
+
+def test_only_changed_sections_are_re_extracted(llm, tmp_path):
+    processor = DailyNoteProcessor(llm, cache=ExtractionCache(tmp_path / "cache.sqlite"))
+    invoke = llm.with_structured_output.return_value.invoke
+
+    processor.extract_entries("## One\nline\nline\n## Two\nline\nline\n")
+    assert invoke.call_count == 2
+
+    entries = processor.extract_entries("## One\nline\nline\n## Two\nedited\nline\n")
+    assert invoke.call_count == 3
+    assert "edited" in invoke.call_args[0][0]
+    assert len(entries) == 2
+
+def test_identical_sections_are_extracted_once(llm):
+    note = "## Same\nline\nline\n"
+    results = DailyNoteProcessor(llm).extract_entries_many([note, note])
+    assert results[0] == results[1]
+    assert llm.with_structured_output.return_value.invoke.call_count == 1
+
+SECTION_PATTERN = re.compile(r'<section id="(\d+)">\n(.*?)\n</section>', re.DOTALL)
+
+def make_batch_llm(respond_batch):
+    """Build a mock chat model that answers batched prompts with respond_batch(sections)."""
+    llm = make_llm(entries_for)
+    single = llm.with_structured_output.return_value
+    batched = MagicMock()
+    batched.invoke.side_effect = lambda prompt: respond_batch(SECTION_PATTERN.findall(prompt))
+    llm.with_structured_output.side_effect = (
+        lambda schema: batched if schema is BatchedDailyNoteResponse else single
+    )
+    return llm, single, batched
+
+def answer_all(sections):
+    return BatchedDailyNoteResponse(sections=[
+        SectionEntries(section_id=int(i), entries=[DailyNoteEntry(title=text.strip())]) for i, text in sections
+    ])
+
+SMALL_NOTES = [f"tiny note {i}" for i in range(5)]
+
+def test_batching_packs_small_sections_into_one_request():
+    llm, single, batched = make_batch_llm(answer_all)
+    processor = DailyNoteProcessor(llm, batch_token_budget=1000)
+
+    results = processor.extract_entries_many(SMALL_NOTES)
+
+    assert [entries[0].title for entries in results] == SMALL_NOTES
+    assert batched.invoke.call_count == 1
+    single.invoke.assert_not_called()
+
+def test_batching_respects_token_budget():
+    llm, single, batched = make_batch_llm(answer_all)
+    budget = BATCH_PROMPT_OVERHEAD_TOKENS + 2 * (estimate_tokens(SMALL_NOTES[0]) + SECTION_OVERHEAD_TOKENS)
+    DailyNoteProcessor(llm, batch_token_budget=budget).extract_entries_many(SMALL_NOTES + ["x" * 100])
+    # Two tiny notes fit per request, the large one is sent alone
+    assert batched.invoke.call_count == 2
+    assert single.invoke.call_count == 2
+
+def test_batches_respect_the_prompt_limit():
+    llm, single, batched = make_batch_llm(answer_all)
+    limit = BATCH_PROMPT_OVERHEAD_TOKENS + 2 * (estimate_tokens(SMALL_NOTES[0]) + SECTION_OVERHEAD_TOKENS)
+    processor = DailyNoteProcessor(llm, batch_token_budget=2000, max_prompt_tokens=limit)
+    results = processor.extract_entries_many(SMALL_NOTES)
+    assert [entries[0].title for entries in results] == SMALL_NOTES
+    prompts = [call.args[0] for call in batched.invoke.call_args_list + single.invoke.call_args_list]
+    assert all(estimate_tokens(prompt) <= limit for prompt in prompts)
+    assert batched.invoke.call_count == 2 and single.invoke.call_count == 1
+
+def test_batching_falls_back_for_unattributable_sections():
+    def skip_and_repeat(sections):
+        response = answer_all(sections)
+        response.sections[1].section_id = 1
+        response.sections.pop()
+        return response
+
+    llm, single, batched = make_batch_llm(skip_and_repeat)
+    results = DailyNoteProcessor(llm, batch_token_budget=1000).extract_entries_many(SMALL_NOTES)
+
+    assert [entries[0].title for entries in results] == SMALL_NOTES
+    # Sections 1 and 2 were ambiguous and section 5 missing
+    assert single.invoke.call_count == 3
+
+def test_batching_falls_back_when_batch_fails():
+    def fail(sections):
+        raise RuntimeError("bad output")
+
+    llm, single, batched = make_batch_llm(fail)
+    results = DailyNoteProcessor(llm, batch_token_budget=1000).extract_entries_many(SMALL_NOTES[:2])
+    assert [entries[0].title for entries in results] == SMALL_NOTES[:2]
+    assert single.invoke.call_count == 2
+
+def test_prompt_is_compacted_and_urls_are_restored():
+    url = "https://example.com/a/very/long/path/to/an/article?utm_source=newsletter&utm_medium=email"
+    prompts = []
+
+    def respond(prompt):
+        prompts.append(prompt)
+        placeholder = re.search(r"https://example\.com/~\d+", prompt).group(0)
+        return DailyNoteResponse(entries=[DailyNoteEntry(title="Article", link=placeholder)])
+
+    processor = DailyNoteProcessor(make_llm(respond))
+    entries = processor.extract_entries(f"- Read   this:  {url}\n\n\n\n- and more")
+    assert entries == [DailyNoteEntry(title="Article", link=url)]
+    assert url not in prompts[0]
+    assert "Read this:" in prompts[0] and "\n\n\n" not in prompts[0]
+
+def test_compaction_can_be_disabled():
+    url = "https://example.com/a/very/long/path/to/an/article/about/things"
+    prompts = []
+
+    def respond(prompt):
+        prompts.append(prompt)
+        return DailyNoteResponse(entries=[])
+
+    DailyNoteProcessor(make_llm(respond), compact_prompts=False).extract_entries(f"- {url}")
+    assert url in prompts[0]
+
+def test_oversized_sections_are_split_to_the_prompt_budget(llm):
+    content = "\n".join(f"- item {i} with some words to make it longer" for i in range(20))
+    processor = DailyNoteProcessor(llm, max_prompt_tokens=PROMPT_OVERHEAD_TOKENS + 40)
+    entries = processor.extract_entries(content)
+    invoke = llm.with_structured_output.return_value.invoke
+    assert invoke.call_count == len(entries) > 1
+    assert all(estimate_tokens(call.args[0]) <= PROMPT_OVERHEAD_TOKENS + 40 for call in invoke.call_args_list)
+    assert "item 0" in entries[0].title and "item 19" in entries[-1].title
+
+def test_failed_requests_fall_back_to_the_next_provider():
+    def rejected(prompt):
+        error = RuntimeError("bad request")
+        error.status_code = 400
+        raise error
+
+    primary = make_llm(rejected)
+    fallback = make_llm(entries_for)
+    fallback._llm_type = "other-chat"
+    processor = DailyNoteProcessor(primary, fallbacks=[fallback])
+    assert processor.extract_entries("Some content") == [DailyNoteEntry(title="Some content")]
+    assert processor.caller.stats["other-chat"].requests == 1
+
+def test_fallback_answers_are_not_cached_as_the_primary_models(tmp_path):
+    calls = []
+
+    def rejected_once(prompt):
+        calls.append(prompt)
+        if len(calls) == 1:
+            error = RuntimeError("bad request")
+            error.status_code = 400
+            raise error
+        return entries_for(prompt)
+
+    fallback = make_llm(entries_for)
+    fallback._llm_type = "other-chat"
+    cache = ExtractionCache(tmp_path / "cache.sqlite")
+    processor = DailyNoteProcessor(make_llm(rejected_once), fallbacks=[fallback], cache=cache)
+    processor.extract_entries("Some content")
+    # The fallback's answer is kept under its own key, so the primary is asked again
+    processor.extract_entries("Some content")
+    assert len(calls) == 2
+    assert len(cache) == 2
+    cache.close()
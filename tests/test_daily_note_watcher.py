@@ -0,0 +1,120 @@
+import threading
+import pytest
+from pathlib import Path
+from unittest.mock import MagicMock
+from obsidian_boy.daily_note_watcher import DailyNoteWatcher, process_changed_notes
+from obsidian_boy.processing_ledger import ProcessingLedger
+from obsidian_boy.types import DailyNoteEntry, ProcessingStatus
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_rapid_saves_are_debounced_and_coalesced(tmp_path):
+    note = tmp_path / "2024-05-01.md"
+    other = tmp_path / "2024-05-02.md"
+    note.write_text("a", encoding="utf-8")
+    other.write_text("b", encoding="utf-8")
+    clock = FakeClock()
+    watcher = DailyNoteWatcher(tmp_path, lambda paths: None, debounce=1.0, clock=clock)
+
+    watcher.notify(note)
+    clock.now = 0.8
+    watcher.notify(note)
+    watcher.notify(other)
+    clock.now = 1.5
+    assert watcher.take_due() == []
+    clock.now = 1.8
+    assert watcher.take_due() == [note, other]
+    assert watcher.take_due() == []
+
+def test_deleted_notes_are_not_reported(tmp_path):
+    clock = FakeClock()
+    watcher = DailyNoteWatcher(tmp_path, lambda paths: None, debounce=1.0, clock=clock)
+    watcher.notify(tmp_path / "gone.md")
+    clock.now = 2.0
+    assert watcher.take_due() == []
+
+def test_polling_watcher_reports_changed_notes(tmp_path):
+    unchanged = tmp_path / "2024-05-01.md"
+    unchanged.write_text("old", encoding="utf-8")
+    reported = []
+    done = threading.Event()
+
+    def on_change(paths):
+        reported.append(paths)
+        done.set()
+
+    with DailyNoteWatcher(tmp_path, on_change, debounce=0.05, use_polling=True, poll_interval=0.02):
+        (tmp_path / "2024-05-02.md").write_text("first save", encoding="utf-8")
+        (tmp_path / "2024-05-02.md").write_text("second save", encoding="utf-8")
+        (tmp_path / "attachment.png").write_bytes(b"png")
+        assert done.wait(5)
+    assert reported == [[tmp_path / "2024-05-02.md"]]
+
+def test_errors_in_the_handler_do_not_stop_the_watcher(tmp_path):
+    calls = []
+    done = threading.Event()
+
+    def on_change(paths):
+        calls.append(paths)
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+        done.set()
+
+    note = tmp_path / "2024-05-01.md"
+    note.write_text("note", encoding="utf-8")
+    with DailyNoteWatcher(tmp_path, on_change, debounce=0.01, use_polling=True) as watcher:
+        watcher.notify(note)
+        while not calls:
+            threading.Event().wait(0.01)
+        watcher.notify(note)
+        assert done.wait(5)
+
+def test_process_changed_notes_skips_notes_in_the_ledger(tmp_path):
+    notes = {Path("Daily/2024-05-01.md"): "old", Path("Daily/2024-05-02.md"): "new"}
+    obsidian_interface = MagicMock()
+    obsidian_interface.read_daily_note.side_effect = notes.get
+    processor = MagicMock()
+    processor.iter_extract_entries.side_effect = lambda contents: iter(
+        [[DailyNoteEntry(title=content)] for content in contents]
+    )
+    ledger = ProcessingLedger(tmp_path / "ledger.sqlite")
+    ledger.record_note(Path("Daily/2024-05-01.md"), "old", ProcessingStatus.EXTRACTED)
+
+    extracted = process_changed_notes(list(notes), obsidian_interface, processor, ledger)
+
+    assert extracted == {Path("Daily/2024-05-02.md"): [DailyNoteEntry(title="new")]}
+    assert ledger.is_current(Path("Daily/2024-05-02.md"), "new")
+    assert len(process_changed_notes(list(notes), obsidian_interface, processor, ledger)) == 0
+    assert len(process_changed_notes(list(notes), obsidian_interface, processor, ledger, only_changed=False)) == 2
+    ledger.close()
+
+def test_process_changed_notes_records_failures(tmp_path):
+    notes = {Path("Daily/2024-05-01.md"): "good", Path("Daily/2024-05-02.md"): "bad",
+             Path("Daily/2024-05-03.md"): "later"}
+    obsidian_interface = MagicMock()
+    obsidian_interface.read_daily_note.side_effect = notes.get
+
+    def extract(contents):
+        for content in contents:
+            if content == "bad":
+                raise RuntimeError("extraction failed")
+            yield [DailyNoteEntry(title=content)]
+
+    processor = MagicMock()
+    processor.iter_extract_entries.side_effect = extract
+    ledger = ProcessingLedger(tmp_path / "ledger.sqlite")
+
+    with pytest.raises(RuntimeError):
+        process_changed_notes(list(notes), obsidian_interface, processor, ledger)
+
+    assert ledger.note_status(Path("Daily/2024-05-01.md"), "good") == ProcessingStatus.EXTRACTED
+    assert ledger.note_status(Path("Daily/2024-05-02.md"), "bad") == ProcessingStatus.FAILED
+    assert ledger.note_status(Path("Daily/2024-05-03.md"), "later") is None
+    # The failed note and the one after it are processed on the next change
+    assert ledger.changed_notes(notes) == [Path("Daily/2024-05-02.md"), Path("Daily/2024-05-03.md")]
+    ledger.close()
@@ -0,0 +1,60 @@
+import pytest
+from pathlib import Path
+from obsidian_boy.entry_parser import parse_section
+from obsidian_boy.note_parser import NoteSection, split_frontmatter, split_sections
+from obsidian_boy.types import DailyNoteEntry
+
+def section(text):
+    return split_sections(text)[0]
+
+def test_parse_full_entry():
+    text = "## Test 1\n[Test 1](https://www.test1.com)\nA full entry\n#test #ai/dev\n- [ ] Test it harder\n"
+    assert parse_section(section(text)) == [DailyNoteEntry(
+        title="Test 1",
+        link="https://www.test1.com",
+        description="A full entry",
+        tags=["test", "ai/dev"],
+        todo="Test it harder",
+    )]
+
+@pytest.mark.parametrize("text, expected", [
+    ("## Bare url\nhttps://example.com\n", DailyNoteEntry(title="Bare url", link="https://example.com")),
+    ("## Unclosed\n[x](https://example.com\n", DailyNoteEntry(title="Unclosed", link="https://example.com")),
+])
+def test_parse_partial_entries(text, expected):
+    assert parse_section(section(text)) == [expected]
+
+@pytest.mark.parametrize("text", [
+    "## Two descriptions\nFirst line\nSecond line\n",
+    "## Two links\nhttps://a.com\nhttps://b.com\n",
+    "## Tagged todo\n- [ ] Do it #ai/agents\n",
+    "## Inline link\nSee [this](https://a.com) for details\n",
+    "## List\n- item one\n",
+    "No heading, just text\n",
+])
+def test_ambiguous_sections(text):
+    assert parse_section(section(text)) is None
+
+def test_empty_preamble():
+    assert parse_section(NoteSection(heading=None, text="\n\n")) == []
+
+@pytest.mark.parametrize("text", ["## Title only\n", "# Monday 2024-01-01\n", "## Links\n\n"])
+def test_heading_without_body_is_not_an_entry(text):
+    assert parse_section(section(text)) == []
+
+def test_date_heading_above_entries():
+    sections = split_sections("# Monday 2024-01-01\n\n## Test 1\nhttps://example.com\n\n## Test 2\nA description\n")
+    assert [parse_section(s) for s in sections] == [
+        [],
+        [DailyNoteEntry(title="Test 1", link="https://example.com")],
+        [DailyNoteEntry(title="Test 2", description="A description")],
+    ]
+
+def test_parse_sample_daily_note():
+    content = (Path(__file__).parent.parent / "vault" / "Daily" / "2024-01-01.md").read_text(encoding="utf-8")
+    _, body = split_frontmatter(content)
+    entries = [entry for s in split_sections(body) for entry in parse_section(s)]
+    assert [entry.title for entry in entries] == ["Test 1", "Test 2", "Test 3"]
+    assert entries[0].todo == "Test it harder"
+    assert entries[1].link is None
+    assert entries[2].tags == []
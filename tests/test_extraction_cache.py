@@ -0,0 +1,48 @@
+import pytest
+from obsidian_boy.daily_note_processor import DailyNoteResponse
+from obsidian_boy.extraction_cache import ExtractionCache, extraction_cache_key
+from obsidian_boy.types import DailyNoteEntry
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ExtractionCache(tmp_path / "cache.sqlite", max_entries=2)
+    yield cache
+    cache.close()
+
+def test_put_and_get(cache):
+    entries = [DailyNoteEntry(title="Test", tags=["a"])]
+    cache.put("key", entries)
+    assert cache.get("key") == entries
+    assert cache.get("missing") is None
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+    assert cache.stats.hit_rate == 0.5
+
+def test_lru_eviction(cache):
+    cache.put("a", [DailyNoteEntry(title="a")])
+    cache.put("b", [DailyNoteEntry(title="b")])
+    cache.get("a")
+    cache.put("c", [DailyNoteEntry(title="c")])
+
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.stats.evictions == 1
+
+def test_cache_is_persistent(tmp_path):
+    cache = ExtractionCache(tmp_path / "cache.sqlite")
+    cache.put("key", [DailyNoteEntry(title="Test")])
+    cache.close()
+
+    reopened = ExtractionCache(tmp_path / "cache.sqlite")
+    assert reopened.get("key") == [DailyNoteEntry(title="Test")]
+    reopened.close()
+
+@pytest.mark.parametrize("changed", [
+    ("other content", "template", "model"),
+    ("content", "other template", "model"),
+    ("content", "template", "other model"),
+])
+def test_cache_key_covers_all_inputs(changed):
+    base = extraction_cache_key("content", "template", "model", DailyNoteResponse)
+    assert extraction_cache_key(*changed, DailyNoteResponse) != base
+    assert extraction_cache_key("content", "template", "model", DailyNoteResponse) == base
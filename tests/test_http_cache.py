@@ -0,0 +1,63 @@
+import pytest
+from obsidian_boy.http_cache import HttpCache, normalize_url
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    cache = HttpCache(tmp_path / "http.sqlite", ttl=60, host_ttls={"docs.example.com": 600},
+                      max_bytes=10, clock=clock)
+    yield cache
+    cache.close()
+
+@pytest.mark.parametrize("url, expected", [
+    ("HTTPS://Example.COM", "https://example.com/"),
+    ("https://example.com:443/a?b=2&a=1#frag", "https://example.com/a?a=1&b=2"),
+    ("http://example.com:8080/a", "http://example.com:8080/a"),
+])
+def test_normalize_url(url, expected):
+    assert normalize_url(url) == expected
+
+def test_put_and_get(cache):
+    cache.put("https://example.com/a", b"body", encoding="utf-8", etag='"v1"', last_modified="Mon")
+    cached = cache.get("https://EXAMPLE.com/a#top")
+    assert cached.text == "body"
+    assert cached.conditional_headers() == {"If-None-Match": '"v1"', "If-Modified-Since": "Mon"}
+    assert cache.get("https://example.com/b") is None
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+def test_freshness_uses_host_ttl(cache, clock):
+    cache.put("https://example.com/a", b"a")
+    cache.put("https://docs.example.com/a", b"b")
+    clock.now += 120
+    assert not cache.is_fresh(cache.get("https://example.com/a"))
+    assert cache.is_fresh(cache.get("https://docs.example.com/a"))
+
+def test_touch_refreshes_response(cache, clock):
+    cache.put("https://example.com/a", b"a")
+    clock.now += 120
+    cache.touch("https://example.com/a")
+    assert cache.is_fresh(cache.get("https://example.com/a"))
+
+def test_eviction_by_size(cache):
+    cache.put("https://example.com/a", b"aaaa")
+    cache.put("https://example.com/b", b"bbbb")
+    cache.get("https://example.com/a")
+    cache.put("https://example.com/c", b"cccc")
+
+    assert cache.get("https://example.com/b") is None
+    assert cache.get("https://example.com/a") is not None
+    assert cache.stats.evictions == 1
+
+def test_oversized_body_is_not_cached(cache):
+    cache.put("https://example.com/big", b"x" * 11)
+    assert cache.get("https://example.com/big") is None
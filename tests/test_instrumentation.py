@@ -0,0 +1,86 @@
+import pytest
+from unittest.mock import MagicMock, patch
+from obsidian_boy import instrumentation
+from obsidian_boy.instrumentation import Histogram, count, observe, span, timed
+from obsidian_boy.knowledge_base import FileSystemKnowledgeBase
+from obsidian_boy.web_scraper import WebScraper
+
+@pytest.fixture
+def recorder():
+    recorder = instrumentation.enable(export=False)
+    yield recorder
+    instrumentation.disable()
+
+def test_disabled_instrumentation_records_nothing():
+    instrumentation.disable()
+    with span("stage") as disabled_span:
+        disabled_span.set(size=1)
+    count("counter")
+    observe("histogram", 1.0)
+    assert span("stage") is span("other")
+    assert instrumentation.get_recorder() is None
+
+def test_spans_counters_and_histograms(recorder):
+    with span("stage"):
+        pass
+    with pytest.raises(ValueError):
+        with span("stage"):
+            raise ValueError("boom")
+    count("bytes", 10)
+    count("bytes", 5)
+    observe("tokens", 3)
+    assert recorder.histograms["stage"].count == 2
+    assert recorder.counters == {"stage.errors": 1, "bytes": 15}
+    assert recorder.histograms["tokens"].total == 3
+
+def test_timed_decorator(recorder):
+    @timed("work")
+    def work(x):
+        return x * 2
+
+    assert work(2) == 4
+    assert recorder.histograms["work"].count == 1
+
+def test_histogram_percentiles_use_a_bounded_sample():
+    histogram = Histogram()
+    for value in range(10_000):
+        histogram.add(float(value))
+    assert len(histogram.samples) == Histogram.MAX_SAMPLES
+    assert (histogram.count, histogram.minimum, histogram.maximum) == (10_000, 0.0, 9999.0)
+    assert 4000 < histogram.percentile(50) < 6000
+
+def test_summary_is_printed_without_exporter(recorder, capsys):
+    with span("scrape.fetch"):
+        pass
+    count("scrape.bytes", 2048)
+    instrumentation.report()
+    output = capsys.readouterr().out
+    assert "scrape.fetch" in output
+    assert "scrape.bytes" in output and "2048" in output
+
+def test_spans_are_exported_to_a_tracer(capsys):
+    recorder = instrumentation.enable(export=False)
+    recorder.tracer = MagicMock()
+    try:
+        with span("kb.store", key="a") as stage:
+            stage.set(size=3)
+        instrumentation.report()
+    finally:
+        instrumentation.disable()
+    recorder.tracer.start_as_current_span.assert_called_once_with("kb.store", attributes={"key": "a"})
+    otel_span = recorder.tracer.start_as_current_span.return_value.__enter__.return_value
+    otel_span.set_attributes.assert_called_once_with({"size": 3})
+    # A configured tracer provider does not guarantee a collector, so the summary is still printed
+    assert "kb.store" in capsys.readouterr().out
+
+def test_pipeline_stages_are_instrumented(recorder, tmp_path):
+    kb = FileSystemKnowledgeBase(tmp_path)
+    kb.store("a", "content")
+    kb.retrieve("a")
+    page = MagicMock(status_code=200, headers={})
+    page.iter_content.return_value = [b"<main><p>hello</p></main>"]
+    scraper = WebScraper()
+    with patch.object(scraper.session, "get", return_value=page):
+        scraper.scrape("https://example.com")
+    assert {"kb.filesystem.store", "kb.filesystem.retrieve", "scrape.fetch", "scrape.convert"} <= set(recorder.histograms)
+    assert recorder.counters["scrape.bytes"] == len(b"<main><p>hello</p></main>")
@@ -0,0 +1,31 @@
+import json
+import pytest
+from obsidian_boy import kb_format
+from obsidian_boy.kb_format import available_codecs, codec_of, decode_entry, encode_entry
+
+@pytest.mark.parametrize("codec", available_codecs())
+def test_round_trip(codec):
+    content = "Ünïcode *markdown*\n" * 50
+    data = encode_entry(content, codec)
+    assert data.startswith(kb_format.MAGIC)
+    assert codec_of(data) == codec
+    assert decode_entry(data) == content
+
+def test_decodes_legacy_json():
+    data = json.dumps({"key": "k", "content": "Legacy"}, indent=2).encode("utf-8")
+    assert codec_of(data) is None
+    assert decode_entry(data) == "Legacy"
+
+def test_rejects_unknown_versions_and_garbage():
+    data = bytearray(encode_entry("x", "none"))
+    data[4] = 99
+    with pytest.raises(ValueError):
+        decode_entry(bytes(data))
+    with pytest.raises(ValueError):
+        decode_entry(b"\x00\x01garbage")
+
+def test_zstd_needs_zstandard(monkeypatch):
+    monkeypatch.setattr(kb_format, "zstandard", None)
+    assert "zstd" not in available_codecs()
+    with pytest.raises(ValueError):
+        encode_entry("x", "zstd")
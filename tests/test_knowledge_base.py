@@ -1,7 +1,9 @@
 import pytest
+import sqlite3
 import tempfile
 from pathlib import Path
-from obsidian_boy.knowledge_base import FileSystemKnowledgeBase
+from obsidian_boy.kb_migrate import main as migrate_main
+from obsidian_boy.knowledge_base import FileSystemKnowledgeBase, KnowledgeBase, SQLiteKnowledgeBase
 
 @pytest.fixture
 def temp_kb():
@@ -58,3 +60,135 @@ def test_file_creation(temp_kb):
     file_path = Path(temp_kb.base_path) / f"{key}.json"
     assert file_path.exists()
     assert file_path.is_file()
+
+@pytest.fixture
+def sqlite_kb(tmp_path):
+    kb = SQLiteKnowledgeBase(tmp_path / "kb", shards=4)
+    yield kb
+    kb.close()
+
+@pytest.fixture(params=["filesystem", "compressed", "sqlite"])
+def any_kb(request, tmp_path):
+    if request.param == "filesystem":
+        yield FileSystemKnowledgeBase(tmp_path / "fs")
+    elif request.param == "compressed":
+        yield FileSystemKnowledgeBase(tmp_path / "fs", codec="zlib")
+    else:
+        kb = SQLiteKnowledgeBase(tmp_path / "sqlite", shards=4)
+        yield kb
+        kb.close()
+
+def test_store_many_and_retrieve_many(any_kb):
+    entries = {f"key{i}": f"Content {i}" for i in range(20)}
+    any_kb.store_many(entries)
+
+    found = any_kb.retrieve_many(["key3", "key17", "missing"])
+
+    assert found == {"key3": "Content 3", "key17": "Content 17"}
+    assert sorted(any_kb.keys()) == sorted(entries)
+
+def test_sqlite_store_and_retrieve(sqlite_kb):
+    sqlite_kb.store("test_key", "This is test content")
+    sqlite_kb.store("test_key", "New content")
+    assert sqlite_kb.retrieve("test_key") == "New content"
+    assert len(sqlite_kb) == 1
+
+def test_sqlite_retrieve_nonexistent_key(sqlite_kb):
+    with pytest.raises(KeyError):
+        sqlite_kb.retrieve("nonexistent_key")
+
+def test_sqlite_keys_are_spread_over_shards(sqlite_kb):
+    sqlite_kb.store_many({f"key{i}": "x" for i in range(100)})
+    assert len({sqlite_kb._shard(key) for key in sqlite_kb.keys()}) == 4
+    assert len(sqlite_kb) == 100
+
+def test_sqlite_is_persistent(tmp_path):
+    kb = SQLiteKnowledgeBase(tmp_path / "kb", shards=4)
+    kb.store("key", "content")
+    kb.close()
+    reopened = SQLiteKnowledgeBase(tmp_path / "kb", shards=4)
+    assert reopened.retrieve("key") == "content"
+    reopened.close()
+
+def test_sqlite_rejects_different_shard_count(tmp_path):
+    SQLiteKnowledgeBase(tmp_path / "kb", shards=4).close()
+    with pytest.raises(ValueError):
+        SQLiteKnowledgeBase(tmp_path / "kb", shards=8)
+
+def test_compressed_entries_are_smaller(tmp_path):
+    content = "# Page\n\n" + "Scraped markdown compresses well. " * 200
+    FileSystemKnowledgeBase(tmp_path / "json").store("page", content)
+    kb = FileSystemKnowledgeBase(tmp_path / "zlib", codec="zlib")
+    kb.store("page", content)
+    assert kb.retrieve("page") == content
+    assert (tmp_path / "zlib" / "page.obkb").stat().st_size * 5 < (tmp_path / "json" / "page.json").stat().st_size
+
+def test_compressed_kb_reads_legacy_json(tmp_path):
+    FileSystemKnowledgeBase(tmp_path).store("old", "Old content")
+    kb = FileSystemKnowledgeBase(tmp_path, codec="zlib")
+    assert kb.retrieve("old") == "Old content"
+    kb.store("old", "New content")
+    assert not (tmp_path / "old.json").exists()
+    assert list(kb.keys()) == ["old"]
+
+def test_unknown_codec_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        FileSystemKnowledgeBase(tmp_path, codec="lz4")
+
+def test_migrate_rewrites_entries_in_target_format(tmp_path):
+    FileSystemKnowledgeBase(tmp_path).store_many({"a": "Alpha", "b": "Beta"})
+    FileSystemKnowledgeBase(tmp_path, codec="none").store("c", "Gamma")
+
+    kb = FileSystemKnowledgeBase(tmp_path, codec="zlib")
+    assert kb.migrate() == 3
+    assert kb.migrate() == 0
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["a.obkb", "b.obkb", "c.obkb"]
+    assert kb.retrieve_many(["a", "b", "c"]) == {"a": "Alpha", "b": "Beta", "c": "Gamma"}
+
+def test_migrate_command_converts_back_to_json(tmp_path, capsys):
+    FileSystemKnowledgeBase(tmp_path, codec="zlib").store("a", "Alpha")
+    assert migrate_main([str(tmp_path), "--codec", "json"]) == 0
+    assert "Migrated 1 entries" in capsys.readouterr().out
+    assert FileSystemKnowledgeBase(tmp_path).retrieve("a") == "Alpha"
+    assert (tmp_path / "a.json").exists()
+
+def test_subclasses_need_not_enumerate_keys():
+    class DictKnowledgeBase(KnowledgeBase):
+        def __init__(self):
+            self.entries = {}
+
+        def store(self, key, content):
+            self.entries[key] = content
+
+        def retrieve(self, key):
+            return self.entries[key]
+
+    kb = DictKnowledgeBase()
+    kb.store_many({"a": "1"})
+    assert kb.retrieve_many(["a", "b"]) == {"a": "1"}
+    with pytest.raises(NotImplementedError):
+        list(kb.keys())
+
+def test_versions_change_with_content(any_kb):
+    any_kb.store_many({"a": "one", "b": "two"})
+    before = any_kb.versions(["a", "b", "missing"])
+    assert set(before) == {"a", "b"}
+    any_kb.store("a", "one, rewritten")
+    after = any_kb.versions(["a", "b"])
+    assert after["a"] != before["a"] and after["b"] == before["b"]
+
+def test_sqlite_adds_versions_to_old_shards(tmp_path):
+    path = tmp_path / "kb"
+    path.mkdir()
+    (path / "layout.json").write_text('{"shards": 1}')
+    connection = sqlite3.connect(path / "shard-000.sqlite")
+    connection.execute("CREATE TABLE entries (key TEXT PRIMARY KEY, content TEXT NOT NULL) WITHOUT ROWID")
+    connection.execute("INSERT INTO entries VALUES ('a', 'old')")
+    connection.commit()
+    connection.close()
+
+    kb = SQLiteKnowledgeBase(path, shards=1)
+    assert kb.retrieve("a") == "old" and "a" in kb.versions(["a"])
+    kb.store("a", "new")
+    assert kb.versions(["a"])["a"] != "0"
+    kb.close()
@@ -0,0 +1,248 @@
+import threading
+import time
+import pytest
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+from obsidian_boy import instrumentation
+from obsidian_boy.llm_caller import LLMCallError, LLMCaller, RetryPolicy, chain_names, is_retryable, retry_after
+from obsidian_boy.types import DailyNoteEntry
+from obsidian_boy.daily_note_processor import DailyNoteResponse
+
+NOW = datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc)
+RESPONSE = DailyNoteResponse(entries=[DailyNoteEntry(title="ok")])
+
+class StatusError(Exception):
+    """Mimics the errors of the provider SDKs, which carry the HTTP response."""
+
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(status_code=status_code, headers=headers or {})
+
+class APIConnectionError(Exception):
+    pass
+
+def make_llm(llm_type, *outcomes):
+    """A mock chat model answering with the given outcomes in turn; exceptions are raised."""
+    llm = MagicMock()
+    llm._llm_type = llm_type
+    llm.openai_api_base = None
+    llm.anthropic_api_url = None
+    results = iter(outcomes)
+
+    def invoke(prompt):
+        result = next(results)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    llm.with_structured_output.return_value.invoke.side_effect = invoke
+    return llm
+
+def make_caller(*models, **kwargs):
+    sleeps = []
+    caller = LLMCaller(models, sleep=sleeps.append, **kwargs)
+    return caller, sleeps
+
+@pytest.fixture(autouse=True)
+def no_instrumentation():
+    yield
+    instrumentation.disable()
+
+def test_is_retryable():
+    assert is_retryable(StatusError(429))
+    assert is_retryable(StatusError(503))
+    assert is_retryable(StatusError(529))
+    assert not is_retryable(StatusError(400))
+    assert not is_retryable(StatusError(401))
+    assert is_retryable(TimeoutError())
+    assert is_retryable(APIConnectionError())
+    assert not is_retryable(ValueError("bad output"))
+
+def test_retry_after_headers():
+    assert retry_after(StatusError(429, {"Retry-After": "7"}), NOW) == 7.0
+    assert retry_after(StatusError(429, {"retry-after-ms": "250"}), NOW) == 0.25
+    date = format_datetime(NOW + timedelta(seconds=30), usegmt=True)
+    assert retry_after(StatusError(429, {"Retry-After": date}), NOW) == 30.0
+    assert retry_after(StatusError(429, {"x-ratelimit-reset-requests": "1m2s",
+                                         "x-ratelimit-reset-tokens": "20ms"}), NOW) == 62.0
+    reset = (NOW + timedelta(seconds=5)).isoformat().replace("+00:00", "Z")
+    assert retry_after(StatusError(429, {"anthropic-ratelimit-requests-reset": reset}), NOW) == 5.0
+    assert retry_after(StatusError(429), NOW) is None
+    assert retry_after(ValueError(), NOW) is None
+
+def test_backoff_is_exponential_with_full_jitter():
+    policy = RetryPolicy(base_delay=1.0, max_delay=5.0)
+    rng = MagicMock()
+    rng.uniform.side_effect = lambda low, high: high
+    assert [policy.delay(attempt, rng=rng) for attempt in range(4)] == [1.0, 2.0, 4.0, 5.0]
+    rng.uniform.assert_called_with(0, 5.0)
+    assert policy.delay(0, retry_after=3.0) == 3.0
+
+def test_transient_errors_are_retried():
+    llm = make_llm("fake-a", StatusError(503), APIConnectionError(), RESPONSE)
+    caller, sleeps = make_caller(llm)
+    assert caller.invoke("prompt", DailyNoteResponse) == RESPONSE
+    assert len(sleeps) == 2
+    stats = caller.stats["fake-a"]
+    assert (stats.requests, stats.errors, stats.retries) == (3, 2, 2)
+    assert stats.latency.count == 1
+
+def test_rate_limit_headers_are_honoured():
+    llm = make_llm("fake-a", StatusError(429, {"retry-after": "2.5"}), RESPONSE)
+    caller, sleeps = make_caller(llm)
+    caller.invoke("prompt", DailyNoteResponse)
+    assert sleeps == [2.5]
+
+def test_retries_are_limited():
+    llm = make_llm("fake-a", *[StatusError(500)] * 5)
+    caller, sleeps = make_caller(llm, policy=RetryPolicy(max_attempts=3))
+    with pytest.raises(LLMCallError) as exc_info:
+        caller.invoke("prompt", DailyNoteResponse)
+    assert isinstance(exc_info.value.errors["fake-a"], StatusError)
+    assert caller.stats["fake-a"].requests == 3 and len(sleeps) == 2
+
+def test_non_retryable_errors_fall_back_immediately():
+    primary = make_llm("fake-a", StatusError(401))
+    fallback = make_llm("fake-b", RESPONSE)
+    caller, sleeps = make_caller(primary, fallback)
+    assert caller.invoke("prompt", DailyNoteResponse) == RESPONSE
+    assert sleeps == []
+    assert caller.stats["fake-a"].fallbacks == 1
+    assert caller.stats["fake-b"].requests == 1
+
+def test_long_retry_after_falls_back_instead_of_waiting():
+    primary = make_llm("fake-a", StatusError(429, {"retry-after": "3600"}))
+    fallback = make_llm("fake-b", RESPONSE)
+    caller, sleeps = make_caller(primary, fallback)
+    assert caller.invoke("prompt", DailyNoteResponse) == RESPONSE
+    assert sleeps == []
+
+def test_all_providers_failing_raises():
+    caller, _ = make_caller(make_llm("fake-a", ValueError("a")), make_llm("fake-b", ValueError("b")))
+    with pytest.raises(LLMCallError) as exc_info:
+        caller.invoke("prompt", DailyNoteResponse)
+    assert list(exc_info.value.errors) == ["fake-a", "fake-b"]
+
+def test_failing_provider_cools_down():
+    now = [0.0]
+    primary = make_llm("fake-a", ValueError("down"), ValueError("down"), RESPONSE)
+    fallback = make_llm("fake-b", RESPONSE, RESPONSE, RESPONSE)
+    caller, _ = make_caller(primary, fallback, failure_threshold=2, cooldown=30.0, clock=lambda: now[0])
+    caller.invoke("prompt", DailyNoteResponse)
+    caller.invoke("prompt", DailyNoteResponse)
+    # The primary failed twice in a row and is skipped during its cooldown
+    caller.invoke("prompt", DailyNoteResponse)
+    assert caller.stats["fake-a"].requests == 2
+    now[0] = 31.0
+    caller.invoke("prompt", DailyNoteResponse)
+    assert caller.stats["fake-a"].requests == 3
+    assert caller.stats["fake-a"].consecutive_failures == 0
+
+def test_fallbacks_are_counted_in_the_order_tried():
+    now = [0.0]
+    primary = make_llm("fake-a", ValueError("down"), ValueError("down"))
+    fallback = make_llm("fake-b", RESPONSE, ValueError("down"))
+    caller, _ = make_caller(primary, fallback, failure_threshold=1, cooldown=30.0, clock=lambda: now[0])
+    caller.invoke("prompt", DailyNoteResponse)
+    assert caller.stats["fake-a"].fallbacks == 1
+    # The cooling primary is tried last, after the fallback failed
+    with pytest.raises(LLMCallError):
+        caller.invoke("prompt", DailyNoteResponse)
+    assert caller.stats["fake-b"].fallbacks == 1
+    assert caller.stats["fake-a"].fallbacks == 1
+
+def test_chain_names_tell_models_of_one_provider_apart():
+    gpt4o, mini, unnamed = (make_llm("openai-chat") for _ in range(3))
+    gpt4o._identifying_params = {"model_name": "gpt-4o"}
+    mini._identifying_params = {"model_name": "gpt-4o-mini"}
+    other = make_llm("anthropic-chat")
+    assert chain_names([gpt4o, mini, other]) == ["openai-chat/gpt-4o", "openai-chat/gpt-4o-mini", "anthropic-chat"]
+    assert chain_names([gpt4o, gpt4o, unnamed]) == ["openai-chat/gpt-4o", "openai-chat/gpt-4o#2", "openai-chat"]
+
+def test_models_of_one_provider_cool_down_separately():
+    now = [0.0]
+    primary = make_llm("fake-a", ValueError("down"), ValueError("down"))
+    primary._identifying_params = {"model": "big"}
+    fallback = make_llm("fake-a", RESPONSE, RESPONSE)
+    fallback._identifying_params = {"model": "small"}
+    caller, _ = make_caller(primary, fallback, failure_threshold=1, cooldown=30.0, clock=lambda: now[0])
+    assert caller.invoke("prompt", DailyNoteResponse) == RESPONSE
+    # Only the failed model cools down, the other one is tried first now
+    assert caller.invoke_with_model("prompt", DailyNoteResponse) == (RESPONSE, fallback)
+    assert caller.stats["fake-a/big"].requests == 1
+    assert caller.stats["fake-a/small"].requests == 2
+
+def test_slow_requests_are_hedged():
+    release = threading.Event()
+    calls = []
+
+    def invoke(prompt):
+        calls.append(prompt)
+        if len(calls) == 1:
+            release.wait(5)
+            return DailyNoteResponse(entries=[])
+        return RESPONSE
+
+    llm = make_llm("fake-a")
+    llm.with_structured_output.return_value.invoke.side_effect = invoke
+    caller, _ = make_caller(llm, hedge_after=0.05)
+    try:
+        assert caller.invoke("prompt", DailyNoteResponse) == RESPONSE
+        assert caller.stats["fake-a"].hedges == 1
+    finally:
+        release.set()
+        caller.close()
+
+def test_fast_requests_are_not_hedged():
+    caller, _ = make_caller(make_llm("fake-a", RESPONSE), hedge_after=5.0)
+    assert caller.invoke("prompt", DailyNoteResponse) == RESPONSE
+    assert caller.stats["fake-a"].hedges == 0
+    caller.close()
+
+def test_rate_limit_wait_does_not_trigger_hedging():
+    limiter = MagicMock()
+    limiter.acquire.side_effect = lambda: time.sleep(0.2)
+    rate_limiters = MagicMock()
+    rate_limiters.get.return_value = limiter
+    caller, _ = make_caller(make_llm("fake-a", RESPONSE), hedge_after=0.05, rate_limiters=rate_limiters)
+    assert caller.invoke("prompt", DailyNoteResponse) == RESPONSE
+    assert caller.stats["fake-a"].hedges == 0
+    assert limiter.acquire.call_count == 1
+    caller.close()
+
+def test_no_hedging_while_rate_limited():
+    release = threading.Event()
+
+    def invoke(prompt):
+        release.wait(0.2)
+        return RESPONSE
+
+    llm = make_llm("fake-a")
+    llm.with_structured_output.return_value.invoke.side_effect = invoke
+    limiter = MagicMock()
+    limiter.try_acquire.return_value = False
+    rate_limiters = MagicMock()
+    rate_limiters.get.return_value = limiter
+    caller, _ = make_caller(llm, hedge_after=0.05, rate_limiters=rate_limiters)
+    try:
+        assert caller.invoke("prompt", DailyNoteResponse) == RESPONSE
+        assert caller.stats["fake-a"].hedges == 0 and caller.stats["fake-a"].requests == 1
+    finally:
+        release.set()
+        caller.close()
+
+def test_per_provider_metrics_are_recorded():
+    recorder = instrumentation.enable(export=False)
+    primary = make_llm("fake-a", StatusError(503), StatusError(400))
+    fallback = make_llm("fake-b", RESPONSE)
+    caller, _ = make_caller(primary, fallback)
+    caller.invoke("prompt", DailyNoteResponse)
+    assert recorder.counters["llm.fake-a.requests"] == 2
+    assert recorder.counters["llm.fake-a.errors"] == 2
+    assert recorder.counters["llm.fake-a.retries"] == 1
+    assert recorder.counters["llm.fake-a.fallbacks"] == 1
+    assert recorder.counters["llm.requests"] == 3
+    assert recorder.histograms["llm.fake-b.latency"].count == 1
@@ -0,0 +1,46 @@
+import pytest
+from obsidian_boy.note_parser import extract_links, extract_tags, parse_frontmatter, split_frontmatter, split_sections
+
+def test_split_frontmatter():
+    frontmatter, body = split_frontmatter("---\ntype: daily\n---\n## Title\n")
+    assert frontmatter == "type: daily"
+    assert body == "## Title\n"
+
+def test_split_frontmatter_without_frontmatter():
+    assert split_frontmatter("## Title\n---\n") == ("", "## Title\n---\n")
+
+def test_parse_frontmatter_lists_and_scalars():
+    data = parse_frontmatter("type: daily\ntags:\n  - one\n  - 'two'\naliases: [a, \"b\"]")
+    assert data == {"type": "daily", "tags": ["one", "two"], "aliases": ["a", "b"]}
+
+@pytest.mark.parametrize("content, expected", [
+    ("Content with #tag1 and #tag2", ["tag1", "tag2"]),
+    ("Nested #ai/agents and #ai/dev, end", ["ai/agents", "ai/dev"]),
+    ("# Heading\nissue #123 and a url https://x.com/#anchor", []),
+    ("`#code` and\n```\n#fenced\n```\n#real", ["real"]),
+    ("---\ntags: daily, work\n---\n#work #extra", ["daily", "work", "extra"]),
+    ("---\ntags: [\"#a/b\", c]\n---\nbody", ["a/b", "c"]),
+    ("---\ntags:\n  - x\n  - y\n---\n", ["x", "y"]),
+])
+def test_extract_tags(content, expected):
+    assert extract_tags(content) == expected
+
+def test_extract_links():
+    content = (
+        "See [[Other Note]], [[Folder/Note#Heading|alias]] and ![[image.png]].\n"
+        "[Site](https://example.com) and [local](notes/a.md \"title\")\n"
+        "```\n[[in code]]\n```\n"
+    )
+    assert extract_links(content) == [
+        "Other Note", "Folder/Note", "image.png", "https://example.com", "notes/a.md"
+    ]
+
+def test_split_sections():
+    body = "intro\n## One\ntext\n```\n## not a heading\n```\n# Two #\nmore\n"
+    sections = split_sections(body)
+    assert [s.heading for s in sections] == [None, "One", "Two"]
+    assert "## not a heading" in sections[1].text
+    assert sections[2].text == "# Two #\nmore\n"
+
+def test_split_sections_drops_blank_preamble():
+    assert [s.heading for s in split_sections("\n\n## One\n")] == ["One"]
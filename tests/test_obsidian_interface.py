@@ -1,6 +1,11 @@
+import os
+import stat
 import pytest
 from pathlib import Path
+from unittest.mock import patch
+from obsidian_boy.note_writer import atomic_write_text
 from obsidian_boy.obsidian_interface import ObsidianInterface
+from obsidian_boy.types import DailyNoteEntry, Note, ProcessedNote
 
 @pytest.fixture
 def fs_interface(tmp_path):
@@ -56,3 +61,90 @@ def test_move_temp_to_vault(fs_interface):
     assert moved_note.exists()
     assert moved_note.read_text(encoding="utf-8") == "Temporary content"
     assert moved_note.name == "final_note.md"
+
+@pytest.fixture
+def obsidian_interface(tmp_path):
+    return ObsidianInterface(tmp_path)
+
+def processed(title, content):
+    return ProcessedNote(
+        original_entry=DailyNoteEntry(title=title),
+        note=Note(location=Path(f"{title}.md"), type="tech-tool"),
+        content=content,
+    )
+
+def test_atomic_write_text_leaves_no_temp_files(tmp_path):
+    note_path = tmp_path / "note.md"
+    atomic_write_text(note_path, "first")
+    atomic_write_text(note_path, "second")
+    assert note_path.read_text(encoding="utf-8") == "second"
+    assert [path.name for path in tmp_path.iterdir()] == ["note.md"]
+
+@pytest.mark.skipif(os.name == "nt", reason="POSIX permissions")
+def test_atomic_write_text_keeps_file_mode(tmp_path):
+    note_path = tmp_path / "note.md"
+    note_path.write_text("old", encoding="utf-8")
+    note_path.chmod(0o644)
+    atomic_write_text(note_path, "new")
+    assert stat.S_IMODE(note_path.stat().st_mode) == 0o644
+
+    umask = os.umask(0o022)
+    try:
+        atomic_write_text(tmp_path / "new.md", "content")
+    finally:
+        os.umask(umask)
+    assert stat.S_IMODE((tmp_path / "new.md").stat().st_mode) == 0o644
+
+def test_failed_atomic_write_keeps_old_content(tmp_path):
+    note_path = tmp_path / "note.md"
+    note_path.write_text("old", encoding="utf-8")
+    with patch("obsidian_boy.note_writer.os.replace", side_effect=OSError("disk full")):
+        with pytest.raises(OSError):
+            atomic_write_text(note_path, "new")
+    assert note_path.read_text(encoding="utf-8") == "old"
+    assert [path.name for path in tmp_path.iterdir()] == ["note.md"]
+
+def test_update_note_is_atomic(obsidian_interface, tmp_path):
+    note_path = tmp_path / "note.md"
+    note_path.write_text("old", encoding="utf-8")
+    obsidian_interface.update_note(Note(location=note_path, type="concept"), "new")
+    assert note_path.read_text(encoding="utf-8") == "new"
+
+def test_create_note_writes_content_to_new_note_dir(obsidian_interface):
+    obsidian_interface.NEW_NOTE_DIR.mkdir(parents=True)
+    note = Note(location=Path("LangGraph.md"), type="tech-tool")
+    obsidian_interface.create_note(note, "# LangGraph")
+    assert note.location == obsidian_interface.NEW_NOTE_DIR / "LangGraph.md"
+    assert note.location.read_text(encoding="utf-8") == "# LangGraph"
+
+def test_batch_commits_writes_and_moves_together(obsidian_interface):
+    existing = obsidian_interface.NEW_NOTE_DIR / "Old.md"
+    existing.parent.mkdir(parents=True)
+    existing.write_text("old", encoding="utf-8")
+    old_note = Note(location=existing, type="concept")
+    notes = [processed(f"Note {i}", f"content {i}") for i in range(3)]
+
+    with patch("obsidian_boy.note_writer.fsync_directory") as fsync_directory:
+        with obsidian_interface.batch() as batch:
+            for note in notes:
+                batch.create_note(note)
+            batch.move_note(old_note, obsidian_interface.NOTE_DIR)
+            assert sorted(path.name for path in obsidian_interface.NEW_NOTE_DIR.iterdir() if not path.name.startswith(".")) == ["Old.md"]
+            assert notes[0].note.location == Path("Note 0.md")
+
+    assert [note.note.location.read_text(encoding="utf-8") for note in notes] == [f"content {i}" for i in range(3)]
+    assert old_note.location == obsidian_interface.NOTE_DIR / "Old.md"
+    assert old_note.location.read_text(encoding="utf-8") == "old"
+    assert sorted(call.args[0] for call in fsync_directory.call_args_list) == sorted(
+        [obsidian_interface.NEW_NOTE_DIR, obsidian_interface.NOTE_DIR]
+    )
+    assert sorted(path.name for path in obsidian_interface.NEW_NOTE_DIR.iterdir()) == ["Note 0.md", "Note 1.md", "Note 2.md"]
+
+def test_batch_rolls_back_on_error(obsidian_interface):
+    note = processed("Note", "content")
+    with pytest.raises(RuntimeError):
+        with obsidian_interface.batch() as batch:
+            batch.create_note(note)
+            raise RuntimeError("processing failed")
+    assert list(obsidian_interface.NEW_NOTE_DIR.iterdir()) == []
+    assert note.note.location == Path("Note.md")
@@ -0,0 +1,51 @@
+import pytest
+from pathlib import Path
+from obsidian_boy.processing_ledger import ProcessingLedger, entry_hash
+from obsidian_boy.types import DailyNoteEntry, Note, ProcessedNote, ProcessingStatus
+
+NOTE = Path("Daily/2024-05-01.md")
+
+@pytest.fixture
+def ledger(tmp_path):
+    ledger = ProcessingLedger(tmp_path / "ledger.sqlite")
+    yield ledger
+    ledger.close()
+
+def test_entry_hash_depends_on_all_fields():
+    entry = DailyNoteEntry(title="LangGraph", tags=["ai"])
+    assert entry_hash(entry) == entry_hash(DailyNoteEntry(title="LangGraph", tags=["ai"]))
+    assert entry_hash(entry) != entry_hash(DailyNoteEntry(title="LangGraph", tags=["ml"]))
+
+def test_only_new_or_changed_notes_are_selected(ledger):
+    other = Path("Daily/2024-05-02.md")
+    ledger.record_note(NOTE, "content", ProcessingStatus.EXTRACTED)
+    ledger.record_note(other, "content", ProcessingStatus.FAILED)
+
+    assert ledger.is_current(NOTE, "content")
+    assert ledger.note_status(NOTE, "edited") is None
+    assert ledger.changed_notes({
+        NOTE: "content",
+        other: "content",
+        Path("Daily/2024-05-03.md"): "new",
+    }) == [other, Path("Daily/2024-05-03.md")]
+    assert ledger.changed_notes({NOTE: "edited"}) == [NOTE]
+
+def test_processed_entries_are_not_pending(ledger):
+    done = DailyNoteEntry(title="LangGraph")
+    new = DailyNoteEntry(title="CrewAI")
+    ledger.record_processed(NOTE, ProcessedNote(
+        original_entry=done, note=Note(location=Path("ObsidianBoy/New/LangGraph.md"), type="tech-tool"), content="",
+    ))
+    ledger.record_entries(NOTE, [new], ProcessingStatus.EXTRACTED)
+
+    assert ledger.pending_entries(NOTE, [done, new]) == [new]
+    assert ledger.pending_entries(Path("Daily/other.md"), [done]) == [done]
+    assert ledger.outputs(NOTE) == [Path("ObsidianBoy/New/LangGraph.md")]
+
+def test_ledger_is_durable(tmp_path):
+    ledger = ProcessingLedger(tmp_path / "ledger.sqlite")
+    ledger.record_note(NOTE, "content", ProcessingStatus.PROCESSED)
+    ledger.close()
+    reopened = ProcessingLedger(tmp_path / "ledger.sqlite")
+    assert reopened.note_status(NOTE, "content") == ProcessingStatus.PROCESSED
+    reopened.close()
@@ -0,0 +1,73 @@
+from obsidian_boy.prompt_compaction import CompactedText, compact, estimate_tokens, split_to_budget
+from obsidian_boy.types import DailyNoteEntry
+
+LONG_URL = "https://github.com/someone/some-project/blob/main/docs/getting-started.md#installation"
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 1
+    assert estimate_tokens("a" * 400) == 101
+
+def test_frontmatter_and_comments_are_removed():
+    text = "---\ntags: [daily]\n---\n# Day\n<!-- clipped -->Note %%private%%\n![shot](data:image/png;base64,AAAA)"
+    assert compact(text).text == "# Day\nNote"
+
+def test_frontmatter_is_kept_on_request():
+    assert compact("---\na: b\n---\nx", strip_frontmatter=False).text == "---\na: b\n---\nx"
+
+def test_whitespace_is_collapsed_but_indentation_kept():
+    text = "- item   with    gaps  \n\n\n\n\n\t- nested\n    - deeper"
+    assert compact(text).text == "- item with gaps\n\n    - nested\n    - deeper"
+
+def test_long_urls_are_replaced_and_restored():
+    text = f"- [Guide]({LONG_URL})\n- again {LONG_URL}.\n- short https://x.org/a"
+    compacted = compact(text)
+    assert compacted.text == "- [Guide](https://github.com/~1)\n- again https://github.com/~1.\n- short https://x.org/a"
+    assert compacted.urls == {"https://github.com/~1": LONG_URL}
+    assert compacted.restore("[Guide](https://github.com/~1)") == f"[Guide]({LONG_URL})"
+    assert estimate_tokens(compacted.text) < estimate_tokens(text)
+
+def test_placeholders_with_common_prefixes_are_restored_exactly():
+    urls = {f"https://a.com/~{i}": f"https://a.com/{'x' * 50}/{i}" for i in range(1, 12)}
+    compacted = CompactedText("", urls)
+    assert compacted.restore("https://a.com/~1 https://a.com/~11") == f"{urls['https://a.com/~1']} {urls['https://a.com/~11']}"
+
+def test_restore_entries():
+    compacted = compact(f"- {LONG_URL}")
+    entry = DailyNoteEntry(title="Guide", link="https://github.com/~1", description="See https://github.com/~1",
+                           tags=["docs"])
+    assert compacted.restore_entries([entry]) == [
+        DailyNoteEntry(title="Guide", link=LONG_URL, description=f"See {LONG_URL}", tags=["docs"])
+    ]
+
+def test_split_to_budget_keeps_small_content_whole():
+    assert split_to_budget("- a\n- b", 100) == ["- a\n- b"]
+
+def test_split_to_budget_cuts_at_lines():
+    lines = [f"- entry number {i:02d}" for i in range(10)]
+    parts = split_to_budget("\n".join(lines), 15)
+    assert "\n".join(parts).split("\n") == lines
+    assert len(parts) > 1
+    assert all(sum(estimate_tokens(line) for line in part.split("\n")) <= 15 for part in parts)
+
+def test_split_to_budget_cuts_long_lines():
+    parts = split_to_budget("x" * 1000, 50)
+    assert "".join(parts) == "x" * 1000
+    assert all(estimate_tokens(part) <= 51 for part in parts)
+
+def test_markdown_escapes_are_removed_from_urls():
+    compacted = compact(r"see https://x.org/a\_b?c\=d\&e\_f and https://example.com/some\_long\_path/with\_many\_parts")
+    assert compacted.text == "see https://x.org/a_b?c=d&e_f and https://example.com/~1"
+    assert compacted.urls == {"https://example.com/~1": "https://example.com/some_long_path/with_many_parts"}
+
+def test_split_to_budget_never_cuts_urls():
+    words = [LONG_URL if i % 7 == 0 else f"word{i}" for i in range(200)]
+    parts = split_to_budget(" ".join(words), 30)
+    assert " ".join(parts).split(" ") == words
+    assert len(parts) > 1
+    assert all(estimate_tokens(part) <= 30 or part == LONG_URL for part in parts)
+
+def test_placeholders_do_not_collide_with_text():
+    text = f"- see https://github.com/~1 and https://github.com/~3\n- {LONG_URL}\n- {LONG_URL}/other"
+    compacted = compact(text)
+    assert compacted.urls == {"https://github.com/~2": LONG_URL, "https://github.com/~4": f"{LONG_URL}/other"}
+    assert compacted.restore("https://github.com/~1 https://github.com/~2") == f"https://github.com/~1 {LONG_URL}"
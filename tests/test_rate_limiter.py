@@ -0,0 +1,66 @@
+import pytest
+from unittest.mock import MagicMock
+from obsidian_boy.rate_limiter import RateLimiter, RateLimiterRegistry, provider_name
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+def test_rate_limiter_allows_burst_then_waits():
+    clock = FakeClock()
+    limiter = RateLimiter(2.0, burst=2, clock=clock, sleep=clock.sleep)
+
+    limiter.acquire()
+    limiter.acquire()
+    assert clock.sleeps == []
+
+    limiter.acquire()
+    assert clock.sleeps == [pytest.approx(0.5)]
+
+def test_rate_limiter_refills_over_time():
+    clock = FakeClock()
+    limiter = RateLimiter(1.0, clock=clock, sleep=clock.sleep)
+    limiter.acquire()
+    clock.now += 1.0
+    limiter.acquire()
+    assert clock.sleeps == []
+
+def test_try_acquire_does_not_wait():
+    clock = FakeClock()
+    limiter = RateLimiter(1.0, clock=clock, sleep=clock.sleep)
+    assert limiter.try_acquire()
+    assert not limiter.try_acquire()
+    clock.now += 1.0
+    assert limiter.try_acquire()
+    assert clock.sleeps == []
+
+def test_rate_limiter_rejects_invalid_rate():
+    with pytest.raises(ValueError):
+        RateLimiter(0)
+
+def test_registry_shares_limiter_per_provider():
+    registry = RateLimiterRegistry({"openai-chat": 5.0})
+    assert registry.get("openai-chat") is registry.get("openai-chat")
+    assert registry.get("anthropic-chat") is None
+
+def test_registry_default_rate():
+    registry = RateLimiterRegistry(default_requests_per_second=1.0)
+    assert registry.get("anything").requests_per_second == 1.0
+
+@pytest.mark.parametrize("attributes, expected", [
+    ({"_llm_type": "openai-chat", "openai_api_base": None}, "openai-chat"),
+    ({"_llm_type": "openai-chat", "openai_api_base": "https://api.deepseek.com/v1"}, "openai-chat@api.deepseek.com"),
+    ({"_llm_type": "anthropic-chat", "openai_api_base": None, "anthropic_api_url": None}, "anthropic-chat"),
+])
+def test_provider_name(attributes, expected):
+    llm = MagicMock()
+    llm.configure_mock(**attributes)
+    assert provider_name(llm) == expected
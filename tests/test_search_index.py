@@ -0,0 +1,108 @@
+import pytest
+from unittest.mock import patch
+from obsidian_boy.knowledge_base import FileSystemKnowledgeBase, SQLiteKnowledgeBase
+from obsidian_boy.search_index import (BM25Index, SQLiteBM25Index, SearchableKnowledgeBase, make_snippet,
+                                       tokenize)
+
+DOCUMENTS = {
+    "langgraph": "LangGraph builds resilient language agents as graphs of nodes and edges.",
+    "crewai": "CrewAI orchestrates role-playing agents that collaborate on tasks.",
+    "obsidian": "Obsidian stores notes as Markdown files in a local vault.",
+}
+
+@pytest.fixture(params=["memory", "sqlite"])
+def index(request, tmp_path):
+    index = BM25Index() if request.param == "memory" else SQLiteBM25Index(tmp_path / "index.sqlite")
+    for key, text in DOCUMENTS.items():
+        index.add(key, text)
+    yield index
+    index.close()
+
+@pytest.fixture
+def kb(tmp_path):
+    inner = SQLiteKnowledgeBase(tmp_path / "kb", shards=2)
+    inner.store_many(DOCUMENTS)
+    yield SearchableKnowledgeBase(inner)
+    inner.close()
+
+def test_tokenize():
+    assert tokenize("The Graph-based agents, in a vault!") == ["graph", "based", "agents", "vault"]
+
+def test_search_ranks_best_match_first(index):
+    results = index.search("agents graphs", k=2)
+    assert [key for key, _ in results] == ["langgraph", "crewai"]
+    assert results[0][1] > results[1][1] > 0
+
+def test_search_without_matches(index):
+    assert index.search("kubernetes") == []
+    assert BM25Index().search("anything") == []
+
+def test_add_replaces_and_remove_deletes(index):
+    index.add("obsidian", "Now about kubernetes clusters")
+    assert index.search("markdown") == []
+    assert index.search("kubernetes")[0][0] == "obsidian"
+
+    index.remove("obsidian")
+    assert "obsidian" not in index
+    assert len(index) == 2
+    assert index.search("kubernetes") == []
+
+def test_make_snippet():
+    content = "x" * 100 + " the vault is here " + "y" * 100
+    snippet = make_snippet(content, "vault", width=40)
+    assert "vault" in snippet
+    assert snippet.startswith("...") and snippet.endswith("...")
+
+def test_searchable_knowledge_base(kb):
+    results = kb.search("markdown notes", k=5)
+    assert results[0].key == "obsidian"
+    assert "Markdown" in results[0].snippet
+
+def test_searchable_knowledge_base_indexes_new_entries(kb):
+    kb.search("warm up")
+    kb.store("scraper", "A web scraper converts HTML pages to Markdown.")
+    kb.store_many({"phoenix": "Phoenix collects traces of LLM calls."})
+
+    assert kb.search("html scraper")[0].key == "scraper"
+    assert kb.search("traces")[0].key == "phoenix"
+    assert kb.retrieve("phoenix").startswith("Phoenix")
+    assert len(list(kb.keys())) == 5
+
+def test_sqlite_index_ranks_like_the_in_memory_index(tmp_path):
+    memory, persisted = BM25Index(), SQLiteBM25Index(tmp_path / "index.sqlite")
+    memory.add_many(DOCUMENTS)
+    persisted.add_many(DOCUMENTS)
+    for query in ["agents graphs", "markdown vault", "tasks"]:
+        assert persisted.search(query) == pytest.approx(memory.search(query))
+    persisted.close()
+
+def test_persisted_index_only_indexes_changes(tmp_path):
+    inner = SQLiteKnowledgeBase(tmp_path / "kb", shards=2)
+    inner.store_many(DOCUMENTS)
+    first = SearchableKnowledgeBase(inner, index_path=tmp_path / "index.sqlite")
+    assert first.search("markdown notes")[0].key == "obsidian"
+    first.close()
+
+    # Written without the wrapper while no index was open
+    inner.store("obsidian", "Obsidian syncs kubernetes clusters.")
+    inner.store("scraper", "A web scraper converts HTML pages to Markdown.")
+    second = SearchableKnowledgeBase(inner, index_path=tmp_path / "index.sqlite")
+    with patch.object(second.index, "add_many", wraps=second.index.add_many) as add_many:
+        assert second.search("kubernetes")[0].key == "obsidian"
+        assert second.search("html scraper")[0].key == "scraper"
+    assert sorted(key for call in add_many.call_args_list for key in call.args[0]) == ["obsidian", "scraper"]
+    second.close()
+    inner.close()
+
+def test_sync_drops_deleted_entries(tmp_path):
+    inner = FileSystemKnowledgeBase(tmp_path / "kb")
+    inner.store_many(DOCUMENTS)
+    searchable = SearchableKnowledgeBase(inner, index_path=tmp_path / "index.sqlite")
+    searchable.search("warm up")
+    searchable.close()
+    (tmp_path / "kb" / "crewai.json").unlink()
+
+    searchable = SearchableKnowledgeBase(inner, index_path=tmp_path / "index.sqlite")
+    assert searchable.search("role-playing agents")[0].key == "langgraph"
+    assert "crewai" not in searchable.index
+    searchable.close()
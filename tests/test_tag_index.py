@@ -0,0 +1,63 @@
+import os
+import pytest
+from pathlib import Path
+from obsidian_boy.tag_index import TagIndex
+
+@pytest.fixture
+def vault(tmp_path):
+    vault_path = tmp_path / "vault"
+    (vault_path / "sub").mkdir(parents=True)
+    (vault_path / ".obsidian").mkdir()
+    (vault_path / "note1.md").write_text("Content with #tag1 and #tag2", encoding="utf-8")
+    (vault_path / "sub" / "note2.md").write_text("---\ntags: [tag3]\n---\n#tag2/nested", encoding="utf-8")
+    (vault_path / ".obsidian" / "hidden.md").write_text("#hidden", encoding="utf-8")
+    return vault_path
+
+@pytest.fixture
+def index(vault, tmp_path):
+    return TagIndex(vault, tmp_path / "state" / "tag_index.json")
+
+def test_tags(index):
+    assert index.tags() == ["tag1", "tag2", "tag2/nested", "tag3"]
+    assert index.tags_for("sub/note2.md") == ["tag3", "tag2/nested"]
+
+def test_refresh_only_reads_changed_files(index, vault):
+    assert index.refresh() == 2
+    assert index.refresh() == 0
+
+    note = vault / "note1.md"
+    note.write_text("Now only #tag9", encoding="utf-8")
+    os.utime(note, ns=(1, 1))
+    (vault / "sub" / "note2.md").unlink()
+    (vault / "note3.md").write_text("#tag4", encoding="utf-8")
+
+    assert index.refresh() == 3
+    assert index.tags() == ["tag4", "tag9"]
+
+def test_unreadable_files_are_retried(index, vault):
+    note = vault / "note3.md"
+    note.write_bytes(b"#tag5 \xff")
+    index.refresh()
+    assert "tag5" not in index.tags()
+
+    # Same size and mtime, so only a failed scan would make the index read it again
+    stat = note.stat()
+    note.write_bytes(b"#tag5 x")
+    os.utime(note, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert "tag5" in index.tags()
+
+def test_index_is_persisted(index, vault, tmp_path, monkeypatch):
+    index.refresh()
+    assert index.index_path.exists()
+
+    def fail(*args, **kwargs):
+        raise AssertionError("unchanged file was re-read")
+
+    monkeypatch.setattr(Path, "read_text", fail)
+    reloaded = TagIndex(vault, index.index_path)
+    assert reloaded.tags() == ["tag1", "tag2", "tag2/nested", "tag3"]
+
+def test_corrupt_index_is_rebuilt(index, vault):
+    index.index_path.parent.mkdir(parents=True)
+    index.index_path.write_text("not json", encoding="utf-8")
+    assert index.tags() == ["tag1", "tag2", "tag2/nested", "tag3"]
@@ -3,6 +3,8 @@ from pathlib import Path
 from unittest.mock import patch, MagicMock
 from obsidian_boy.terminal_interface import TerminalInterface
 from obsidian_boy.obsidian_interface import ObsidianInterface
+from obsidian_boy.processing_ledger import ProcessingLedger
+from obsidian_boy.types import ProcessingStatus
 
 @pytest.fixture
 def mock_fs_interface():
@@ -57,3 +59,17 @@ def test_select_daily_notes_invalid_input(terminal_interface, mock_fs_interface)
     with patch('builtins.input', return_value='1,4,2'):
         selected = terminal_interface.select_daily_notes()
     assert selected == [Path('2023-05-01.md'), Path('2023-05-02.md')]
+
+def test_process_daily_notes_skips_unchanged_notes(mock_fs_interface, tmp_path, capsys):
+    ledger = ProcessingLedger(tmp_path / "ledger.sqlite")
+    ledger.record_note(Path('2023-05-01.md'), "old note", ProcessingStatus.EXTRACTED)
+    mock_fs_interface.list_daily_notes.return_value = [Path('2023-05-01.md'), Path('2023-05-02.md')]
+    mock_fs_interface.read_daily_note.side_effect = lambda path: "old note" if path.stem == "2023-05-01" else "new note"
+    terminal_interface = TerminalInterface(mock_fs_interface, ledger=ledger)
+    with patch('builtins.input', return_value='1,2'):
+        terminal_interface.process_daily_notes()
+    captured = capsys.readouterr()
+    assert "Skipping 1 notes that were already processed." in captured.out
+    assert "Processing note: 2023-05-02" in captured.out
+    assert "Processing note: 2023-05-01" not in captured.out
+    ledger.close()
@@ -0,0 +1,82 @@
+import pytest
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from unittest.mock import patch
+from obsidian_boy.vault_scanner import VaultAggregate, VaultScanner, scan_note, walk_markdown_files
+
+@pytest.fixture
+def vault(tmp_path):
+    for i in range(20):
+        folder = tmp_path / f"folder{i % 3}"
+        folder.mkdir(exist_ok=True)
+        (folder / f"note{i}.md").write_text(
+            f"---\ntags: [common]\n---\n#tag{i} links to [[note{i + 1}]]", encoding="utf-8"
+        )
+    (tmp_path / "folder0" / "image.png").write_bytes(b"")
+    return tmp_path
+
+def test_walk_markdown_files(vault):
+    files = dict(walk_markdown_files(vault))
+    assert len(files) == 20
+    assert "folder1/note1.md" in files
+
+def test_scan_note(vault):
+    scan = scan_note(str(vault), "folder2/note2.md", (0, 0))
+    assert scan.tags == ["common", "tag2"]
+    assert scan.links == ["note3"]
+    assert scan.frontmatter == {"tags": ["common"]}
+    assert scan.error is None
+
+def test_scan_note_missing_file(vault):
+    scan = scan_note(str(vault), "missing.md", (0, 0))
+    assert scan.error is not None
+
+@pytest.mark.parametrize("use_processes", [False, True])
+def test_parallel_scan_matches_inline_scan(vault, use_processes):
+    items = list(walk_markdown_files(vault))
+    parallel = VaultScanner(max_workers=2, use_processes=use_processes, chunk_size=3, inline_threshold=0)
+    inline = VaultScanner(max_workers=1)
+
+    parallel_result = parallel.scan_into(vault, items)
+    inline_result = inline.scan_into(vault, items)
+
+    assert parallel_result.notes == inline_result.notes == 20
+    assert parallel_result.tag_counts == inline_result.tag_counts
+    assert parallel_result.tag_counts["common"] == 20
+    assert parallel_result.links == inline_result.links
+
+class BreakingExecutor(ThreadPoolExecutor):
+    """Runs the first two chunks, then behaves like a pool whose worker died."""
+
+    def __init__(self):
+        super().__init__(max_workers=2)
+        self.submitted = 0
+
+    def submit(self, fn, *args):
+        self.submitted += 1
+        if self.submitted <= 2:
+            return super().submit(fn, *args)
+        future = Future()
+        future.set_exception(BrokenProcessPool("a worker process died"))
+        return future
+
+def test_broken_pool_falls_back_to_inline_scan(vault):
+    items = list(walk_markdown_files(vault))
+    scanner = VaultScanner(max_workers=2, chunk_size=3, inline_threshold=0)
+    with patch.object(scanner, "_executor", return_value=BreakingExecutor()):
+        scans = list(scanner.scan(vault, items))
+    assert sorted(scan.path for scan in scans) == sorted(path for path, _ in items)
+    assert all(scan.error is None for scan in scans)
+
+def test_worker_processes_are_not_forked():
+    # Forking while other threads hold locks can deadlock the workers
+    with VaultScanner(max_workers=2, use_processes=True)._executor() as executor:
+        assert executor._mp_context.get_start_method() != "fork"
+
+def test_aggregate_records_errors():
+    aggregate = VaultAggregate()
+    scanner = VaultScanner(max_workers=1)
+    scanner.scan_into("/nonexistent", [("a.md", (0, 0))], aggregate)
+    assert aggregate.notes == 1
+    assert "a.md" in aggregate.errors
+    assert aggregate.tags == []
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+from obsidian_boy.vector_index import HashingEmbedder, VectorIndex
+
+DIM = 64
+
+@pytest.fixture
+def index(tmp_path):
+    return VectorIndex(tmp_path / "vectors", HashingEmbedder(DIM), DIM)
+
+def test_hashing_embedder_is_deterministic():
+    embed = HashingEmbedder(DIM)
+    first, second = embed(["obsidian vault notes", "obsidian vault notes"])
+    assert first.shape == (DIM,)
+    assert np.array_equal(first, second)
+
+def test_search_ranks_similar_texts_first(index):
+    index.add(
+        ["python.md", "cooking.md", "garden.md"],
+        ["python asyncio event loop tutorial", "pasta tomato sauce recipe", "planting tomatoes in the garden"],
+    )
+    results = index.search("asyncio event loop in python", k=2)
+    assert results[0][0] == "python.md"
+    assert results[0][1] == pytest.approx(max(score for _, score in results))
+    assert len(results) == 2
+
+def test_add_replaces_existing_ids(index):
+    index.add(["note.md"], ["python asyncio"])
+    index.add(["note.md"], ["pasta recipe"])
+    assert len(index) == 1
+    assert index.search("pasta recipe", k=1)[0] == ("note.md", pytest.approx(1.0))
+
+def test_delete_removes_items_and_reuses_rows(index):
+    index.add(["a.md", "b.md"], ["python asyncio", "pasta recipe"])
+    index.delete(["a.md", "missing.md"])
+    assert "a.md" not in index
+    assert [item_id for item_id, _ in index.search("python asyncio")] == ["b.md"]
+    index.add(["c.md"], ["garden tomatoes"])
+    assert index._rows["c.md"] == 0
+
+def test_index_grows_and_persists(tmp_path):
+    path = tmp_path / "vectors"
+    index = VectorIndex(path, HashingEmbedder(DIM), DIM)
+    vectors = np.random.default_rng(0).normal(size=(1500, DIM)).astype(np.float32)
+    index.add_vectors([f"n{i}" for i in range(1500)], vectors)
+    index.close()
+
+    reopened = VectorIndex(path, HashingEmbedder(DIM), DIM)
+    assert len(reopened) == 1500
+    assert reopened.search_vectors(vectors[[7, 1234]], k=1) == [
+        [("n7", pytest.approx(1.0, abs=1e-5))],
+        [("n1234", pytest.approx(1.0, abs=1e-5))],
+    ]
+
+def test_search_spans_chunks(index, monkeypatch):
+    monkeypatch.setattr(VectorIndex, "SEARCH_CHUNK_ROWS", 16)
+    vectors = np.random.default_rng(1).normal(size=(100, DIM)).astype(np.float32)
+    index.add_vectors([f"n{i}" for i in range(100)], vectors)
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    expected = np.argsort(-(normalized @ normalized[42]))[:5]
+    assert [item_id for item_id, _ in index.search_vectors(vectors[[42]], k=5)[0]] == [f"n{i}" for i in expected]
+
+def test_quantized_index_finds_nearest(tmp_path):
+    index = VectorIndex(tmp_path / "vectors", HashingEmbedder(DIM), DIM, quantize=True)
+    vectors = np.random.default_rng(2).normal(size=(200, DIM)).astype(np.float32)
+    index.add_vectors([f"n{i}" for i in range(200)], vectors)
+    assert (tmp_path / "vectors" / "vectors.bin").stat().st_size == index._capacity * DIM
+    assert index.search_vectors(vectors[[99]], k=1)[0][0][0] == "n99"
+
+def test_reopening_with_other_dimensions_fails(tmp_path):
+    VectorIndex(tmp_path / "vectors", HashingEmbedder(DIM), DIM).flush()
+    with pytest.raises(ValueError):
+        VectorIndex(tmp_path / "vectors", HashingEmbedder(32), 32)
@@ -1,12 +1,22 @@
+import threading
+import time
 import pytest
-from obsidian_boy.web_scraper import WebScraper
+from obsidian_boy.http_cache import HttpCache
+from obsidian_boy.web_scraper import WebScraper, detect_charset, html_to_markdown
+from bs4 import BeautifulSoup
 from unittest.mock import patch, Mock
 from requests.exceptions import RequestException
 
+def make_page(status_code=200, text="<p>fresh</p>", headers=None):
+    page = Mock()
+    page.status_code = status_code
+    page.iter_content.return_value = [text.encode("utf-8")]
+    page.headers = headers or {}
+    return page
+
 @pytest.fixture
 def mock_response():
-    mock = Mock()
-    mock.text = """
+    return make_page(text="""
     <html>
         <head>
             <title>Test Page</title>
@@ -18,12 +28,10 @@ def mock_response():
             <p>This is some test content.</p>
         </body>
     </html>
-    """
-    mock.apparent_encoding = 'utf-8'
-    return mock
+    """)
 
 def test_web_scraper(mock_response):
-    with patch('requests.get', return_value=mock_response):
+    with patch('requests.Session.get', return_value=mock_response):
         scraper = WebScraper("https://example.com")
         result = scraper.scrape()
 
@@ -31,7 +39,7 @@ def test_web_scraper(mock_response):
     assert "This is some test content" in result
 
 def test_web_scraper_error():
-    with patch('requests.get', side_effect=RequestException("Test error")):
+    with patch('requests.Session.get', side_effect=RequestException("Test error")):
         scraper = WebScraper("https://example.com")
         result = scraper.scrape()
 
@@ -44,7 +52,7 @@ def test_web_scraper_no_url():
         scraper.scrape()
 
 def test_extract_title(mock_response):
-    with patch('requests.get', return_value=mock_response):
+    with patch('requests.Session.get', return_value=mock_response):
         scraper = WebScraper("https://example.com")
         scraper.scrape()  # This will populate the soup object
         title = scraper._extract_title(scraper.soup)
@@ -52,10 +60,130 @@ def test_extract_title(mock_response):
     assert title == "Test Page"
 
 def test_extract_metadata(mock_response):
-    with patch('requests.get', return_value=mock_response):
+    with patch('requests.Session.get', return_value=mock_response):
         scraper = WebScraper("https://example.com")
         scraper.scrape()  # This will populate the soup object
         metadata = scraper._extract_metadata(scraper.soup)
     
     assert metadata['description'] == "This is a test page"
     assert metadata['og:title'] == "Open Graph Test Title"
+
+def test_scrape_reuses_session(mock_response):
+    scraper = WebScraper()
+    with patch.object(scraper.session, 'get', return_value=mock_response) as get:
+        scraper.scrape("https://example.com/a")
+        scraper.scrape("https://example.com/b")
+    assert get.call_count == 2
+    assert scraper.session.headers['User-Agent'].startswith('Mozilla')
+
+def test_scrape_many_keeps_order(mock_response):
+    def respond(url, **kwargs):
+        return make_page(text=f"<p>page {url.rsplit('/', 1)[1]}</p>")
+
+    scraper = WebScraper()
+    urls = [f"https://host{i % 2}.com/{i}" for i in range(6)]
+    with patch.object(scraper.session, 'get', side_effect=respond):
+        results = scraper.scrape_many(urls)
+    assert [result.strip() for result in results] == [f"page {i}" for i in range(6)]
+
+def test_scrape_many_limits_requests_per_host():
+    in_flight = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def respond(url, **kwargs):
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        time.sleep(0.02)
+        with lock:
+            in_flight -= 1
+        return make_page(text="<p>ok</p>")
+
+    scraper = WebScraper(max_workers=8, per_host_limit=2)
+    with patch.object(scraper.session, 'get', side_effect=respond):
+        results = scraper.scrape_many([f"https://example.com/{i}" for i in range(8)])
+    assert len(results) == 8
+    assert peak == 2
+
+def test_scrape_many_reports_errors_per_url(mock_response):
+    def respond(url, **kwargs):
+        if url.endswith("bad"):
+            raise RequestException("Test error")
+        return mock_response
+
+    scraper = WebScraper()
+    with patch.object(scraper.session, 'get', side_effect=respond):
+        results = scraper.scrape_many(["https://example.com/good", "https://example.com/bad"])
+    assert "Welcome to the Test Page" in results[0]
+    assert results[1].startswith("Error scraping https://example.com/bad")
+
+def test_scrape_serves_fresh_responses_from_cache(tmp_path):
+    cache = HttpCache(tmp_path / "http.sqlite", ttl=3600)
+    scraper = WebScraper(cache=cache)
+    with patch.object(scraper.session, 'get', return_value=make_page(headers={"ETag": '"v1"'})) as get:
+        first = scraper.scrape("https://example.com")
+        second = scraper.scrape("https://example.com")
+    assert first == second
+    assert get.call_count == 1
+
+def test_scrape_revalidates_stale_responses(tmp_path):
+    cache = HttpCache(tmp_path / "http.sqlite", ttl=0)
+    scraper = WebScraper(cache=cache)
+    with patch.object(scraper.session, 'get', return_value=make_page(headers={"ETag": '"v1"'})):
+        scraper.scrape("https://example.com")
+    with patch.object(scraper.session, 'get', return_value=make_page(status_code=304, text="")) as get:
+        result = scraper.scrape("https://example.com")
+    assert "fresh" in result
+    assert get.call_args.kwargs["headers"] == {"If-None-Match": '"v1"'}
+
+@pytest.mark.parametrize("content_type, head, expected", [
+    ("text/html; charset=ISO-8859-1", b"<html>", "iso8859-1"),
+    (None, b'<html><head><meta charset="windows-1252">', "cp1252"),
+    ("text/html", b'<meta http-equiv="Content-Type" content="text/html; charset=utf-8">', "utf-8"),
+    ("text/html; charset=bogus", b"<html>", "utf-8"),
+    ("text/html; charset=latin-1", b"\xef\xbb\xbf<html>", "utf-8-sig"),
+])
+def test_detect_charset(content_type, head, expected):
+    assert detect_charset(content_type, head) == expected
+
+def test_scrape_decodes_with_declared_charset():
+    html = '<html><head><meta charset="iso-8859-1"></head><body><p>Caf\xe9</p></body></html>'
+    page = make_page()
+    page.iter_content.return_value = [html.encode("iso-8859-1")]
+    scraper = WebScraper()
+    with patch.object(scraper.session, 'get', return_value=page):
+        assert "Café" in scraper.scrape("https://example.com")
+
+def test_scrape_stops_reading_at_byte_cap():
+    page = make_page()
+    page.iter_content.return_value = iter([b"<p>" + b"a" * 50, b"b" * 50, b"c" * 50 + b"</p>"])
+    scraper = WebScraper(max_bytes=80)
+    with patch.object(scraper.session, 'get', return_value=page):
+        result = scraper.scrape("https://example.com")
+    assert "b" in result and "c" not in result
+    page.close.assert_called_once()
+
+def test_html_to_markdown_keeps_main_content_only():
+    soup = BeautifulSoup(
+        "<html><body><nav>Menu</nav><script>var x;</script>"
+        "<main><h1>Title</h1><p>Body text</p><style>p {}</style></main>"
+        "<footer>Imprint</footer></body></html>",
+        "html.parser",
+    )
+    markdown = html_to_markdown(soup)
+    assert "Title" in markdown and "Body text" in markdown
+    for boilerplate in ["Menu", "var x", "p {}", "Imprint"]:
+        assert boilerplate not in markdown
+
+def test_html_to_markdown_keeps_article_headers_and_forms():
+    soup = BeautifulSoup(
+        "<html><body><header>Site logo</header>"
+        "<article><header><h1>Post title</h1></header><p>Body text</p>"
+        "<form><label>Query</label><input name='q'></form></article></body></html>",
+        "html.parser",
+    )
+    markdown = html_to_markdown(soup)
+    assert "Post title" in markdown and "Body text" in markdown and "Query" in markdown
+    assert "Site logo" not in markdown